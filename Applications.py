@@ -1,23 +1,28 @@
 #!/usr/bin/python3
 
 from Engine import Engine
+from Breaker import ServiceUnavailable
+from Scheduler import Scheduler
+from Sounds import Sounds
 import os
-import wikipedia 
-import random
 import webbrowser 
-import urllib.request
 import re
 import tools as t
 import threading
 import subprocess as sp
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from pymongo import ASCENDING
 from numpy import sqrt, cbrt
 import telegram_send
-import base64
+from telegram.error import NetworkError, TelegramError
+import configparser
+import unicodedata
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pydub import AudioSegment
 from pydub.playback import play
-from io import BytesIO
-from time import sleep
+from time import sleep, monotonic
 
 
 class Applications(Engine):
@@ -79,16 +84,50 @@ class Applications(Engine):
         # Atributo de localización por defecto
         self.defaultLocation = "Madrid"
 
-        # Inicialización del módulo de wikipedia
-        wikipedia.set_lang("es")
+        # Peticiones simultáneas y caché del tiempo meteorológico por lugar (segundos de validez)
+        self.__fetch = ThreadPoolExecutor(max_workers = 4, thread_name_prefix = "Fetch")
+        self.weatherTTL = 600
+        self.__weather = {}                     # Lugar normalizado -> (caducidad, speech, imagen)
+        self.__weatherLock = threading.Lock()
+
+        # Efectos de sonido, decodificados en segundo plano: nombre -> archivo de GridFS y tonos si no existe
+        self.soundEffects = {
+            "emergency": ("EmergencyCall", None),
+            "alarm": ("AlarmTone", [880, 0, 880, 0]),
+            "chime": ("Chime", [660, 990]),
+        }
+        if Engine.sounds is None:
+            Engine.sounds = Sounds()
+        threading.Thread(target = self.loadSounds, name = "Sounds", daemon = True).start()
+
+        # API de la Wikipedia en español
+        self.wikipediaAPI = "https://es.wikipedia.org/w/api.php"
 
         # Inicialización del comando Switch propio para unidades del tiempo
         self.s_time_unit = t.Tools(3)	        #Instancia objeto Switch
         self.s_time_unit.setSwitch_time_unit()	#Creador del switch
 
+        # Índice de recordatorios por usuario y fecha de vencimiento
+        self.db["Reminders"].create_index([("usuario", ASCENDING), ("due", ASCENDING)])
+
+        # Índice de alarmas por usuario y nombre
+        self.db["Alarms"].create_index([("usuario", ASCENDING), ("nombre", ASCENDING)])
+
+        # Planificador de alarmas y recordatorios del usuario actual. Los avisos se enuncian en un hilo propio, de uno en
+        # uno, y las alarmas y recordatorios pendientes se protegen con un cerrojo (se modifican desde ambos hilos)
+        self.scheduler = Scheduler()
+        self.__announcer = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "Announce")
+        self.__scheduleLock = threading.RLock()
+        self.__alarms = {}                      # Usuario -> nombre -> _id -> (entrada del planificador, vencimiento)
+        self.__reminders = {}
+
         # Instanciación de la superclase Engine de la que hereda la clase Applications
         Engine.__init__(self, self.Names)
 
+        # Carga de alarmas y recordatorios: las vencidas se enuncian al momento, por lo que necesitan el motor de voz
+        self.loadAlarms()
+        self.loadReminders(self.User)
+
 
 #   ******************  Spotify  ******************
 
@@ -109,7 +148,7 @@ class Applications(Engine):
                     * Nombre.
                     * Álbum.
                     * Artista.
-            window (tkinter.Tk, optional): Ventana de la interfaz de usuario. Defaults to None.
+            window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
 
         Returns:
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
@@ -161,14 +200,10 @@ class Applications(Engine):
             request = self.GUI("Text", text="Introduce tu búsqueda")
         else:
             request = query.replace("busca", "").replace ("en", "").replace("wikipedia", "")
-        try:
-            page = wikipedia.page(request)
-            webbrowser.open(page.url)
-        except wikipedia.DisambiguationError as e:
-            s = random.choice(e.options)
-            page = wikipedia.page(s)
-            webbrowser.open(page.url)
-            os.system("clear") 
+        params = {"action": "opensearch", "search": request.strip(), "limit": 1, "namespace": 0, "format": "json"}
+        urls = self.breaker("wikipedia").request("GET", self.wikipediaAPI, params = params).json()[3]
+        if urls:
+            webbrowser.open(urls[0])
 
     def youtube(self, query): 
         """
@@ -185,8 +220,9 @@ class Applications(Engine):
         if "búsqueda" in query or "busca" in query:                                                                                            # Búsqueda web Youtube
             webbrowser.open("https://www.youtube.com/results?search_query=" + request.replace(" ", "+"))
         else:                                                                                                           # Reproducción de vídeo youtube    
-            html = urllib.request.urlopen("https://www.youtube.com/results?search_query=" + request.replace(" ", "+"))
-            video_ids = re.findall(r"watch\?v=(\S{11})", html.read().decode())
+            html = self.breaker("youtube").request("GET", "https://www.youtube.com/results",
+                                                   params = {"search_query": request}).text
+            video_ids = re.findall(r"watch\?v=(\S{11})", html)
             webbrowser.open("https://www.youtube.com/watch?v=" + video_ids[0])
 
 
@@ -195,7 +231,12 @@ class Applications(Engine):
     def weather(self, query):
         """
         Función que realiza una búsqueda sobre las condiciones meterológicas de una determinada zona. El resultado es
-        expuesto al usuario a través de una imagen.
+        expuesto al usuario a través de una imagen, que se descarga en memoria.
+
+        La imagen y la descripción se piden a la vez por el cliente HTTP compartido, de forma que una consulta cuesta
+        una única espera al servicio. El resultado se guarda durante *weatherTTL* segundos por lugar (sin distinguir
+        mayúsculas, tildes ni espacios), y las consultas repetidas se responden desde la caché. Sólo se guardan las
+        consultas en las que el servicio ha devuelto la imagen; si la imagen falla, se responde sólo con la descripción.
 
         Args:
             query (str): palabras clave.
@@ -203,6 +244,8 @@ class Applications(Engine):
         Returns:
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
             place (str): Nombre del lugar de la búsqueda.
+            image (bytes): Imagen PNG con la información meteorológica, o None si el servicio no la ha devuelto (lugar
+            desconocido, límite de peticiones...).
         """
         # Obtenición del lugar
         if "en" in query:
@@ -211,9 +254,65 @@ class Applications(Engine):
         else:
             place = self.GUI("Text", text="Introduce la localización", default_text=self.defaultLocation)
 
-        # Obtención información meteorológica
-        os.system("curl http://es.wttr.in/" + place + ".png --output '" + place + ".png'")
-        weather = os.popen("curl 'wttr.in/"+ place + "?format=%C%t&lang=es'").read()
+        # Caché por lugar
+        key = self.normalizePlace(place)
+        with self.__weatherLock:
+            cached = self.__weather.get(key)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1], place, cached[2]
+
+        # Obtención información meteorológica: imagen y descripción a la vez
+        image = self.__fetch.submit(self.breaker("wttr").request, "GET", "http://es.wttr.in/" + place + ".png")
+        speech = self.weatherReport(place)
+        try:
+            image = self.imageContent(image.result())
+        except ServiceUnavailable:                  # Sin imagen, pero con la descripción ya obtenida
+            image = None
+
+        if image is not None:
+            with self.__weatherLock:
+                now = monotonic()
+                self.__weather = {k: v for k, v in self.__weather.items() if v[0] > now}     # Descarte de caducadas
+                self.__weather[key] = (now + self.weatherTTL, speech, image)
+        return speech, place, image
+
+    def imageContent(self, response):
+        """
+        Función que devuelve el contenido de una respuesta HTTP si es una imagen.
+
+        Args:
+            response: Respuesta de la petición.
+
+        Returns:
+            image (bytes): Contenido de la respuesta, o None si no es una respuesta correcta (200) con una imagen.
+        """
+        if response.status_code != 200 or not response.headers.get("content-type", "").startswith("image/"):
+            return None
+        return response.content
+
+    def normalizePlace(self, place):
+        """
+        Función que normaliza el nombre de un lugar para la caché del tiempo meteorológico: minúsculas, sin tildes y
+        sin espacios.
+
+        Args:
+            place (str): Nombre del lugar.
+        """
+        place = unicodedata.normalize("NFKD", place.lower())
+        return "".join(c for c in place if not unicodedata.combining(c) and not c.isspace())
+
+    def weatherReport(self, place):
+        """
+        Función que obtiene la descripción y la temperatura de una determinada zona a través del servicio wttr.in.
+
+        Args:
+            place (str): Nombre del lugar de la búsqueda.
+
+        Returns:
+            speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
+        """
+        weather = self.breaker("wttr").request("GET", "https://wttr.in/" + place,
+                                               params = {"format": "%C%t", "lang": "es"}).text
 
         # Obtención temperatura y descripción
         if "+" in weather:
@@ -230,42 +329,143 @@ class Applications(Engine):
             temp = "0"   
 
         speech = "En " + place + ",  está " + desc + " y hace " + str(temp) + " grados."
-        return speech, place
+        return speech
 
 
 #   ******************  Alarmas  ******************
 
-    def setAlarm(self, query):
+    def setAlarm(self, query, user):
         """
-        Función que realiza la puesta de alarmas. Se creará una alarma no bloqueante del sistema a través de un thread.
+        Función que realiza la puesta de alarmas. La alarma se guarda en la base de conocimiento y se añade al
+        planificador, de forma que no necesita un hilo propio y se recupera al reiniciar el sistema.
+        Si la petición no contiene la duración o el nombre de la alarma, se preguntan por voz.
 
         Args:
             query (str): palabras clave.
+            user (str): usuario creador de la alarma.
 
         Returns:
-            t (int): tiempo en segundos para la finalización de la alarma.
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
             text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
         """
         # Obtención de duración
         list_of_words = query.split()
-        try:
-            t = int(list_of_words[list_of_words.index("de") + 1])
-            unit = list_of_words[list_of_words.index("de") + 2]
-            m = self.s_time_unit.switch(unit)
-        except:
-            t, m = self.GUI("Alarm", text="Introduce duración", default_text="5")
+        duration = None
+        if "de" in list_of_words:
+            duration = self.slotParser().duration(' '.join(list_of_words[list_of_words.index("de") + 1:]))
+        if duration is None:
+            duration = self.askSlot("duration", "¿Dentro de cuánto tiempo?", text="Introduce duración", default_text="5")
+        t, m = duration
         t *= m # Duración en segundos
 
         # Obtención de nombre
         try:
             name = ' '.join(list_of_words[list_of_words.index("nombre")+1:])
         except:
-            name = self.GUI("Text", text="Introduce nombre", default_text="Alarma")
+            name = self.askSlot("text", "¿Qué nombre le pongo a la alarma?", text="Introduce nombre", default_text="Alarma")
 
+        new_alarm = {"usuario": user, "nombre": name, "due": datetime.now() + timedelta(seconds = t)}
+        self.db["Alarms"].insert_one(new_alarm)
+        self.scheduleAlarm(new_alarm)
+
+        speech = "Alarma " + name + " puesta para las " + new_alarm["due"].strftime("%H:%M")
+        text = "Alarma " + name + "\n" + new_alarm["due"].strftime("%H:%M:%S")
+        return speech, text
+
+    def loadAlarms(self):
+        """
+        Función que carga en el planificador las alarmas pendientes de todos los usuarios, al iniciar el sistema. Las
+        alarmas suenan aunque se cambie de usuario, como una alarma de cocina; las vencidas mientras el sistema estaba
+        apagado suenan al momento.
+        """
+        for alarm in self.db["Alarms"].find({}, {"usuario": 1, "nombre": 1, "due": 1}):
+            self.scheduleAlarm(alarm)
+
+    def scheduleAlarm(self, alarm):
+        """
+        Función que añade una alarma al planificador.
+
+        Args:
+            alarm (dict): Alarma (*_id*, *usuario*, *nombre* y *due*).
+        """
+        with self.__scheduleLock:
+            entry = self.scheduler.schedule(alarm["due"].timestamp(), self.announce,
+                                            self.checkAlarm, alarm["_id"], alarm["usuario"], alarm["nombre"])
+            user = self.__alarms.setdefault(alarm["usuario"], {})
+            user.setdefault(alarm["nombre"], {})[alarm["_id"]] = (entry, alarm["due"])
+
+    def checkAlarm(self, alarm_id, user, name):
+        """
+        Función que enuncia una alarma vencida, en el hilo de avisos (*announce*). Se llama a *alarm* y, una vez
+        enunciada, se borra de la base de conocimiento; si el enunciado falla, la alarma se mantiene y suena en el
+        siguiente arranque. Si la alarma es de otro usuario distinto del actual, se le nombra en el aviso.
+
+        Args:
+            alarm_id (ObjectId): *_id* de la alarma.
+            user (str): Usuario creador de la alarma.
+            name (str): Nombre de la alarma.
+        """
+        with self.__scheduleLock:
+            names = self.__alarms.get(user, {})
+            alarms = names.get(name, {})
+            alarms.pop(alarm_id, None)
+            if not alarms:
+                names.pop(name, None)
+            if not names:
+                self.__alarms.pop(user, None)
+        if self.db["Alarms"].count_documents({"_id": alarm_id}, limit = 1) == 0:      # Alarma ya cancelada
+            return
         speech = "Riiiiiiiiiing riiiiiiiiiing. Fin de la alarma de nombre " + name
+        if user != self.User:
+            speech += " de " + user
         text = "Fin de la alarma \n " + name
-        return t, speech, text
+        self.alarm(speech, text)
+        self.db["Alarms"].delete_one({"_id": alarm_id})
+
+    def listAlarms(self):
+        """
+        Función que enumera las alarmas pendientes del usuario actual, ordenadas por hora.
+
+        Returns:
+            speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
+            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+        """
+        with self.__scheduleLock:
+            alarms = sorted((due, name) for name, entries in self.__alarms.get(self.User, {}).items()
+                            for entry, due in entries.values())
+        if not alarms:
+            return "No tienes ninguna alarma", "No hay alarmas pendientes"
+        speech = "Tienes " + str(len(alarms)) + (" alarma: " if len(alarms) == 1 else " alarmas: ")
+        speech += ", ".join(name + " a las " + due.strftime("%H:%M") for due, name in alarms)
+        text = "\n".join("   -" + name + " a las " + due.strftime("%H:%M:%S") for due, name in alarms)
+        return speech, text
+
+    def cancelAlarm(self, query):
+        """
+        Función que cancela las alarmas pendientes del usuario actual con un nombre. Si la petición no contiene el nombre
+        ("nombre ..."), se pregunta por voz.
+
+        Args:
+            query (str): palabras clave.
+
+        Returns:
+            speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
+            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+        """
+        list_of_words = query.split()
+        try:
+            name = ' '.join(list_of_words[list_of_words.index("nombre")+1:])
+        except:
+            name = self.askSlot("text", "¿Qué alarma quieres cancelar?", text="Introduce nombre", default_text="Alarma")
+
+        with self.__scheduleLock:
+            alarms = self.__alarms.get(self.User, {}).pop(name, {})
+        if not alarms:
+            return "No tienes ninguna alarma de nombre " + name, "Alarma " + name + "\nno encontrada"
+        for entry, due in alarms.values():
+            self.scheduler.cancel(entry)
+        self.db["Alarms"].delete_many({"_id": {"$in": list(alarms)}})
+        return "Alarma " + name + " cancelada", "Alarma " + name + "\ncancelada"
 
     def alarm(self, speech, text):
         """
@@ -276,19 +476,30 @@ class Applications(Engine):
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
             text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
         """
-        if self.spotify("status") == "Playing": # Comprobación del status de Spotify
-            self.spotify("pause")               # Pausar reproducción
-            self.speak(speech)                  # Enunciar *speech*
-            self.spotify("play")                # Reanudar reproducción
-        else:
-            self.speak(speech)                  # Enunciar *speech*     
-        self.GUI("Show", text = text)           # Mostrar *text*
+        with self.speechLock:                       # Sonido y voz seguidos, sin que hable entre medias el hilo principal
+            if self.spotify("status") == "Playing": # Comprobación del status de Spotify
+                self.spotify("pause")               # Pausar reproducción
+                self.playSound("alarm", block = True)
+                self.speak(speech)                  # Enunciar *speech*
+                self.spotify("play")                # Reanudar reproducción
+            else:
+                self.playSound("alarm", block = True)
+                self.speak(speech)                  # Enunciar *speech*
+        self.GUI("Show", text = text)                       # Mostrar *text*
     
 #   ******************  Recordatorios  ******************
 
     def setReminder(self, query, user):
         """
-        Función que realiza la creación de recordatorios. Estos son guardados en la base de conocimientos.
+        Función que realiza la creación de recordatorios. Estos son guardados en la base de conocimientos. Si la petición
+        no contiene el nombre, la hora ("a las ...") o el día ("para ...") del recordatorio, se preguntan por voz.
+
+        Los recordatorios pueden repetirse ("todos los días", "entre semana", "todos los lunes", "cada mes"...). Un
+        recordatorio periódico se guarda una única vez con su regla (*repetir*) y su próxima fecha (*due*), que se
+        actualiza cada vez que se enuncia. La regla se busca en el texto que sigue a la frase de activación, para no
+        confundirla con ella ("pon *un* recordatorio"). En los semanales, el día de la primera vez sólo se toma de un día
+        de la semana explícito ("todos los lunes"); si no se indica el día, la primera vez es la próxima en que llega la
+        hora ("cada semana a las nueve": hoy o mañana a las nueve) y, en el resto de reglas, la próxima que la cumpla.
 
         Args:
             query (str): palabras clave.
@@ -304,83 +515,175 @@ class Applications(Engine):
         try:
             name = ' '.join(list_of_words[list_of_words.index("nombre")+1:])
         except:
-            name = self.GUI("Text", text="Introduce el nombre del recordatorio", default_text="Recordatorio")
-       
+            name = self.askSlot("text", "¿Qué nombre le pongo al recordatorio?",
+                                text="Introduce el nombre del recordatorio", default_text="Recordatorio")
+        request = query.partition(" nombre")[0]
+        details = self.matcher.remainder("Reminder", request)             # Datos tras la frase de activación
+
         # Obtención de la hora
-        hour = self.GUI("Hour", text="Introduce la hora del recordatorio")
+        hour = None
+        if " a las " in request:
+            hour = self.slotParser().hour(request.partition(" a las ")[2])
+        if hour is None:
+            hour = self.askSlot("hour", "¿A qué hora?", text="Introduce la hora del recordatorio")
+
+        # Obtención de la regla de repetición
+        rule = self.slotParser().recurrence(details.partition(" a las ")[0])
 
         # Obtención de la fecha
-        try:
-            day = list_of_words[list_of_words.index("para") + 1]
-            today = datetime.today().date()
-            if day == "hoy":
-                day = str(today)
-            elif day == "mañana":
-                day = str(today + timedelta(days=1))
-            elif day == "pasado mañana":
-                day = str(today + timedelta(days=2))
-            else:
-                day = list_of_words[list_of_words.index("para") + 2]
-                key_list = list(self.Numbers.keys())
-                val_list = list(self.Numbers.values())
-                position = val_list.index(day)
-                day = key_list[position]
-        except:
-            day = self.GUI("Date", text="Introduce la fecha del recordatorio",  geometry = "400x300")
+        day = None
+        if "para" in list_of_words:
+            day = self.slotParser().date(request.partition("para")[2].partition(" a las ")[0])
+        elif rule == "semanal":
+            day = self.slotParser().weekday(details.partition(" a las ")[0])
+        implicit = day is None                                              # Sin día indicado
+        if day is None and rule is not None:
+            day = str(datetime.today().date())
+        elif day is None:
+            day = self.askSlot("date", "¿Para qué día?", text="Introduce la fecha del recordatorio", geometry = "400x300")
         
-        new_rem = {"usuario": user, "nombre": name, "día": day, "hora": hour}
+        due = datetime.strptime(day + " " + hour, "%Y-%m-%d %H:%M")
+        new_rem = {"usuario": user, "nombre": name, "día": day, "hora": hour, "due": due}
+        if rule is not None:
+            if due <= datetime.now() or (rule == "laborables" and due.weekday() >= 5):
+                first = "diario" if implicit and rule == "semanal" else rule      # Próxima vez que llega la hora
+                due = self.nextReminder(due, first, due.day)
+            new_rem.update({"repetir": rule, "díaMes": due.day, "due": due,
+                            "día": str(due.date()), "hora": due.strftime("%H:%M")})
         self.db["Reminders"].insert_one(new_rem)
+        if user == self.User:
+            self.scheduleReminder(new_rem)
 
         speech = "Recordatorio creado"
         text = "Recordatorio de nombre: " + name + "\ncreado correctamente"
+        if rule is not None:
+            text += "\nSe repite: " + rule
         return speech, text
 
-    def checkReminder(self, user):
+    def nextReminder(self, due, rule, month_day):
         """
-        Función que comprueba si se ha de enunciar algún recordatorio. Se la llama periódicamente a través del 
-        bucle principal.
+        Función que calcula la siguiente vez que debe enunciarse un recordatorio periódico, posterior al momento actual.
 
         Args:
-            user (str): usuario actual del sistema.
+            due (datetime): Fecha del recordatorio.
+            rule (str): Regla de repetición ("diario", "laborables", "semanal" o "mensual").
+            month_day (int): Día del mes de los recordatorios mensuales (se ajusta al último día en los meses más cortos).
 
         Returns:
-            speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
-            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+            due (datetime): Siguiente fecha del recordatorio.
         """
-        
-        # Obtención día y hora actuales
-        t = datetime.now() 
-        hour = t.strftime('%H:%M')
-        today = datetime.today()
-        number = str(today.date())
-
-        # Obtención de recordatorios de la colección Reminders
-        reminders = []
-        for collection in self.db.list_collection_names():
-            if collection == "Reminders":
-                for element in self.db[collection].find({}):
-                    reminders.append(element)
-        
-        # Obtención *speech* y *text*
-        if not len(reminders):                                                                       
-            speech = None
-            text = None
+        now = datetime.now()
+        while True:
+            if rule == "diario":
+                due += timedelta(days = 1)
+            elif rule == "laborables":
+                due += timedelta(days = 1)
+                while due.weekday() >= 5:       # Sábado o domingo
+                    due += timedelta(days = 1)
+            elif rule == "semanal":
+                due += timedelta(days = 7)
+            else:
+                due += relativedelta(months = 1, day = month_day)
+            if due > now:
+                return due
+
+    def loadReminders(self, user):
+        """
+        Función que carga en el planificador los recordatorios pendientes de un usuario, sustituyendo a los del usuario
+        anterior. Se la llama al iniciar el sistema y al cambiar de usuario; los recordatorios vencidos mientras el
+        sistema estaba apagado se enuncian al momento.
+
+        Args:
+            user (str): usuario actual del sistema.
+        """
+        with self.__scheduleLock:
+            for entry, rem in self.__reminders.values():
+                self.scheduler.cancel(entry)
+            self.__reminders = {}
+        for rem in self.db["Reminders"].find({"usuario": user, "due": {"$ne": None}},
+                                             {"nombre": 1, "due": 1, "repetir": 1, "díaMes": 1}):
+            self.scheduleReminder(rem)
+
+    def scheduleReminder(self, rem):
+        """
+        Función que añade un recordatorio al planificador.
+
+        Args:
+            rem (dict): Recordatorio (*_id*, *nombre*, *due* y, si es periódico, *repetir* y *díaMes*).
+        """
+        with self.__scheduleLock:
+            entry = self.scheduler.schedule(rem["due"].timestamp(), self.announce, self.checkReminder, rem)
+            self.__reminders[rem["_id"]] = (entry, rem)
+
+    def checkReminder(self, rem):
+        """
+        Función que enuncia un recordatorio vencido, en el hilo de avisos (*announce*). Una
+        vez enunciado, los recordatorios de una sola vez se borran de la base de conocimiento; en los periódicos sólo se
+        actualiza la fecha a la siguiente vez y se vuelven a añadir al planificador. Si el enunciado falla, el
+        recordatorio se mantiene en la base de conocimiento y se enuncia en el siguiente arranque.
+
+        Args:
+            rem (dict): Recordatorio.
+        """
+        with self.__scheduleLock:
+            self.__reminders.pop(rem["_id"], None)
+        pending = {"_id": rem["_id"], "due": rem["due"]}
+        if self.db["Reminders"].count_documents(pending, limit = 1) == 0:          # Recordatorio borrado o ya enunciado
+            return
+        self.speak("Tienes un recordatorio para esta hora de nombre " + rem["nombre"])
+        self.GUI("Show", text = "Recordatorio " + rem["nombre"])
+        if rem.get("repetir"):
+            due = self.nextReminder(rem["due"], rem["repetir"], rem.get("díaMes", rem["due"].day))
+            result = self.db["Reminders"].update_one(
+                pending, {"$set": {"due": due, "día": str(due.date()), "hora": due.strftime("%H:%M")}})
+            if result.modified_count:
+                self.scheduleReminder(dict(rem, due = due))
         else:
-            for rem in range(len(reminders)):
-                if reminders[rem]["usuario"] == user:
-                    if reminders[rem]["día"] == number and reminders[rem]["hora"] <= hour:                          # Comprobación del recordatorio
-                        speech = "Tienes un recordatorio para esta hora de nombre " + reminders[rem]["nombre"]
-                        text = "Recordatorio " + reminders[rem]["nombre"]
-                        del_rem = {"hora" : reminders[rem]["hora"]}
-                        self.db["Reminders"].delete_one(del_rem)                                                    # Borrado del recordatorio
-                    elif reminders[rem]["día"] > number:
-                        del_rem = {"hora" : reminders[rem]["hora"]}
-                        self.db["Reminders"].delete_one(del_rem)                                                    # Borrado del recordatorio
-                    else:
-                        speech = None
-                        text = None
-        
-        return speech, text
+            self.db["Reminders"].delete_one(pending)
+
+    def detachSchedule(self):
+        """
+        Función que retira del planificador los recordatorios del usuario actual, al cambiar de usuario, y los devuelve
+        para poder restablecerlos después sin consultar la base de conocimiento (*attachSchedule*). Las alarmas no se
+        retiran: suenan aunque se cambie de usuario.
+
+        Returns:
+            schedule (dict): Recordatorios pendientes del usuario.
+        """
+        with self.__scheduleLock:
+            for entry, rem in self.__reminders.values():
+                self.scheduler.cancel(entry)
+            schedule = self.__reminders
+            self.__reminders = {}
+        return schedule
+
+    def attachSchedule(self, schedule):
+        """
+        Función que vuelve a añadir al planificador los recordatorios de un usuario retirados con *detachSchedule*.
+
+        Args:
+            schedule (dict): Recordatorios pendientes del usuario.
+        """
+        for entry, rem in schedule.values():
+            self.scheduleReminder(rem)
+
+    def announce(self, callback, *args):
+        """
+        Función a la que llama el planificador cuando vence una alarma o un recordatorio. El aviso (pausa de Spotify,
+        sonido, voz y GUI) se entrega al hilo de avisos, de forma que el hilo del planificador no se bloquea mientras
+        suena y el resto de tareas vencen a su hora. Los avisos se enuncian de uno en uno, en el orden en que vencen.
+
+        Args:
+            callback (function): Función del aviso (*checkAlarm* o *checkReminder*).
+            *args: Argumentos de la función.
+        """
+        self.__announcer.submit(self.__announce, callback, *args)
+
+    def __announce(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            logging.getLogger("Applications").exception("Error en el aviso %s", callback.__name__)
 
 
 #   ******************  Operaciones matemáticas  ******************
@@ -448,6 +751,22 @@ class Applications(Engine):
         return speech, text
 
 
+#   ******************  Efectos de sonido  ******************
+
+    def loadSounds(self):
+        """
+        Función que decodifica todos los efectos de sonido (*soundEffects*) desde la caché local de GridFS. Los que no
+        existen en GridFS se generan con sus tonos.
+        """
+        for name, (filename, tones) in self.soundEffects.items():
+            try:
+                with self.media.open(filename) as audio:
+                    Engine.sounds.load(name, audio)
+            except Exception:                   # Sin archivo en GridFS
+                if tones is not None:
+                    Engine.sounds.tone(name, tones)
+
+
 #   ******************  Funcionalidades del teléfono móvil  ******************
 
     def checkPhone(self):
@@ -465,11 +784,10 @@ class Applications(Engine):
             if code.startswith('on'):                                           # Inicio Teodoro en el teléfono móvil
                 self.macroPhone = code[2:]
             elif code == 'c':                                                   # Reproducción audio de llamada de emergencia
-                audio = self.fs.find_one({"filename":"EmergencyCall"})          # Reproducción del audio
-                bytedata = audio.read()
-                aud_IO = BytesIO(base64.b64decode(bytedata))
-                song = AudioSegment.from_file(aud_IO, format="mp3")
-                play(song)
+                if not self.playSound("emergency", block = True):               # Reproducción del audio ya decodificado
+                    with self.media.open("EmergencyCall") as audio:             # Reproducción del audio (caché local)
+                        song = AudioSegment.from_file(audio, format="mp3")
+                    play(song)
                 return 1
             elif code == 'b':                                                   # Batería baja
                 self.speak(self.User + ", te queda poca batería en el móvil")   
@@ -487,10 +805,49 @@ class Applications(Engine):
         Returns:
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
         """
-        telegram_send.send(messages=[self.macroPhone])  # Trigger a través de bot en Telegram
+        if not self.telegram(self.macroPhone):          # Trigger a través de bot en Telegram
+            return "No he podido avisar al móvil, revisa la configuración del bot de Telegram"
         speech = "Voy a ello"
         return speech
 
+    def telegram(self, message):
+        """
+        Función que envía un mensaje a través del bot de Telegram configurado con *telegram-send*. El mensaje se envía
+        directamente a la API de bots con el cliente HTTP compartido; si no se puede leer la configuración, se usa
+        *telegram_send*.
+
+        Args:
+            message (str): Mensaje.
+
+        Returns:
+            (bool): False si Telegram rechaza el mensaje (token o *chat_id* no válidos, mensaje vacío...). Los fallos
+            del servicio se propagan como *ServiceUnavailable*.
+        """
+        if getattr(self, "_Applications__telegram", None) is None:
+            config = configparser.ConfigParser()
+            config.read(telegram_send.get_config_path())
+            self.__telegram = config["telegram"] if config.has_section("telegram") else {}
+        if "token" not in self.__telegram or "chat_id" not in self.__telegram:
+            try:
+                self.breaker("telegram").call(self.__telegramSend, message)
+            except TelegramError:               # Errores de red ya convertidos: sólo quedan los rechazos
+                return False
+            return True
+        url = "https://api.telegram.org/bot" + self.__telegram["token"] + "/sendMessage"
+        response = self.breaker("telegram").request("POST", url, json = {"chat_id": self.__telegram["chat_id"],
+                                                                         "text": message})
+        return response.status_code < 400
+
+    def __telegramSend(self, message):
+        """
+        Función que envía un mensaje con *telegram_send*. Sus errores de red se convierten en errores de transporte, que
+        son los únicos que cuentan como caída del servicio (*Breaker*).
+        """
+        try:
+            telegram_send.send(messages=[message])
+        except NetworkError as e:           # También *TimedOut*
+            raise ConnectionError(str(e)) from e
+
     def EmergencyCall(self):
         """
         Función que realiza la funcionalidad de llamada de emergencia con el teléfono móvil de usuario. 
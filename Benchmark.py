@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+
+from Engine import Engine
+from Headless import Headless
+from Scheduler import Scheduler
+from Sounds import Sounds
+from Teodoro import Teodoro
+
+from time import perf_counter, time, sleep
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import argparse
+import random
+
+
+def benchmarkScheduler(pending = 5000, fired = 500, horizon = 5, cancel = 0.5, ring = 0):
+    """
+    Función que mide el retraso (*jitter*) con el que el planificador ejecuta las tareas cuando tiene muchas pendientes
+    y, a la vez, se añaden y cancelan tareas desde otro hilo.
+
+    Con *ring*, una de cada 50 tareas simula una alarma que suena durante *ring* segundos. Como en *Applications.announce*,
+    el aviso se entrega a un hilo de avisos, por lo que no debe retrasar al resto de tareas.
+
+    Args:
+        pending (int, optional): Tareas pendientes que no vencen durante la medida. Defaults to 5000.
+        fired (int, optional): Tareas que vencen durante la medida, repartidas en *horizon* segundos. Defaults to 500.
+        horizon (float, optional): Duración de la medida en segundos. Defaults to 5.
+        cancel (float, optional): Fracción de las tareas pendientes que se cancelan durante la medida. Defaults to 0.5.
+        ring (float, optional): Duración en segundos de los avisos largos simulados. Defaults to 0.
+
+    Returns:
+        delays (list): Retrasos en segundos de las tareas ejecutadas.
+    """
+    scheduler = Scheduler()
+    announcer = ThreadPoolExecutor(max_workers = 1)
+    delays = []
+    done = threading.Event()
+
+    def task(due):
+        delays.append(time() - due)
+        if ring and due and len(delays) % 50 == 1:
+            announcer.submit(sleep, ring)               # Alarma sonando en el hilo de avisos
+        if len(delays) == fired:
+            done.set()
+
+    start = perf_counter()
+    entries = [scheduler.schedule(time() + 3600 + i, task, 0) for i in range(pending)]
+    insert = (perf_counter() - start) / pending
+
+    now = time()
+    for _ in range(fired):
+        due = now + random.uniform(0.5, horizon)
+        scheduler.schedule(due, task, due)
+
+    # Carga: cancelaciones y nuevas tareas durante la medida
+    random.shuffle(entries)
+    start = perf_counter()
+    for entry in entries[:int(cancel * pending)]:
+        scheduler.cancel(entry)
+        scheduler.schedule(time() + 3600, task, 0)
+        sleep(0)
+    load = (perf_counter() - start) / max(int(cancel * pending), 1)     # Cancelación + inserción
+
+    done.wait(horizon + 5)
+    delays.sort()
+    n = len(delays)
+    print("%8s %8s %12s %12s %10s %10s %10s" % ("pendientes", "n", "insert (us)", "carga (us)", "p50 (ms)", "p99 (ms)", "max (ms)"))
+    print("%8d %8d %12.2f %12.2f %10.2f %10.2f %10.2f" % (len(scheduler), n, 1e6 * insert, 1e6 * load,
+          1000 * delays[n // 2], 1000 * delays[int(0.99 * (n - 1))], 1000 * delays[-1]))
+    return delays
+
+
+def benchmarkSounds(repeat = 20):
+    """
+    Función que mide el retraso de inicio de los efectos de sonido: desde que se pide la reproducción hasta que el primer
+    bloque se entrega a la salida de audio, más la latencia de salida del dispositivo.
+
+    Args:
+        repeat (int, optional): Número de reproducciones de cada sonido. Defaults to 20.
+
+    Returns:
+        latencies (dict): Retrasos en segundos de cada sonido.
+    """
+    sounds = Sounds()
+    if not sounds.available:
+        print("Salida de audio (PyAudio) no disponible")
+        return {}
+    sounds.tone("alarm", [880, 0, 880, 0])
+    sounds.tone("chime", [660, 990])
+
+    latencies = {}
+    print("%10s %10s %10s %10s" % ("sonido", "p50 (ms)", "p99 (ms)", "max (ms)"))
+    for name in sounds.buffers:
+        results = []
+        for _ in range(repeat):
+            sounds.play(name, block = True)
+            results.append(sounds.latency[name])
+        results.sort()
+        latencies[name] = results
+        print("%10s %10.2f %10.2f %10.2f" % (name, 1000 * results[len(results) // 2],
+              1000 * results[int(0.99 * (len(results) - 1))], 1000 * results[-1]))
+    return latencies
+
+
+def benchmarkIntents(Teo, intents, repeat = 20):
+    """
+    Función que mide el tiempo de ejecución de funcionalidades completas (*getAction*) con la interfaz sin pantalla.
+    Para cada funcionalidad se construye la petición a partir de su primera frase de activación en la base de
+    conocimiento.
+
+    Args:
+        Teo (Teodoro): Instancia de la clase Teodoro iniciada con la interfaz *Headless*.
+        intents (list): Funcionalidades a medir (*Reminder*, *NewInformation*, *SetCalendar*).
+        repeat (int, optional): Número de ejecuciones de cada funcionalidad. Defaults to 20.
+
+    Returns:
+        results (dict): Tiempos de ejecución en segundos por funcionalidad.
+    """
+    queries = {
+        "Reminder": " para mañana nombre benchmark",
+        "NewInformation": "",
+        "SetCalendar": " para mañana nombre benchmark",
+    }
+
+    results = {}
+    print("%-16s %6s %10s %10s %10s %8s" % ("funcionalidad", "n", "media (ms)", "p50 (ms)", "p95 (ms)", "GUIs"))
+    for intent in intents:
+        query = Teo.Commands[intent][0] + queries[intent]
+        start_requests = len(Engine.interface.requests)
+        times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            Teo.getAction(query)
+            times.append(perf_counter() - start)
+        results[intent] = times
+
+        times = sorted(times)
+        dialogs = (len(Engine.interface.requests) - start_requests) / repeat
+        print("%-16s %6d %10.2f %10.2f %10.2f %8.1f" % (intent, repeat, 1000 * sum(times) / repeat,
+              1000 * times[len(times) // 2], 1000 * times[int(0.95 * (len(times) - 1))], dialogs))
+
+    # Limpieza de los datos creados en la base de conocimiento
+    Teo.db["Reminders"].delete_many({"usuario": Teo.User, "nombre": "benchmark"})
+    Teo.profile.unset(["benchmark"])
+
+    return results
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = "Medición de funcionalidades completas sin pantalla")
+    parser.add_argument("--user", default = "usuario")
+    parser.add_argument("--password", default = "")
+    parser.add_argument("--repeat", type = int, default = 20)
+    parser.add_argument("--calendar", action = "store_true", help = "Incluye SetCalendar (crea eventos reales)")
+    parser.add_argument("--scheduler", type = int, metavar = "N",
+                        help = "Mide sólo el retraso del planificador con N tareas pendientes")
+    parser.add_argument("--ring", type = float, default = 0, metavar = "S",
+                        help = "Con --scheduler, simula alarmas que suenan S segundos en el hilo de avisos")
+    parser.add_argument("--sounds", action = "store_true", help = "Mide sólo el retraso de inicio de los sonidos")
+    args = parser.parse_args()
+
+    if args.scheduler:
+        benchmarkScheduler(args.scheduler, ring = args.ring)
+        raise SystemExit
+    if args.sounds:
+        benchmarkSounds(args.repeat)
+        raise SystemExit
+
+    # Respuestas guionizadas de las GUIs
+    def text_answer(text, default_text):
+        if text == "Introduce el campo":
+            return "benchmark"
+        return default_text or "valor"
+
+    Engine.interface = Headless({
+        "Login": lambda text, default_text: (args.user, args.password, 0),
+        "Text": text_answer,
+        "Hour": lambda text, default_text: "23:59",
+    })
+
+    Teo = Teodoro(default_user = args.user, del_speak = False)
+    Teo.speak = lambda audio: None          # Sin salida de audio
+    Teo.voiceSlots = False                  # Datos que faltan directamente por GUI
+
+    intents = ["Reminder", "NewInformation"]
+    if args.calendar:
+        intents.append("SetCalendar")
+    benchmarkIntents(Teo, intents, args.repeat)
+    Engine.http.report()                    # Reutilización de conexiones por servidor
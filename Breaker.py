@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import threading
+import time
+
+
+class ServiceUnavailable(Exception):
+
+    """ Clase ServiceUnavailable.
+
+    Error de un servicio externo caído o que no ha respondido a tiempo. Contiene la frase que debe pronunciar el sistema
+    (*speech*) y si ha sido este fallo el que ha abierto el circuito (*opened*).
+    """
+
+    def __init__(self, breaker, opened = False):
+        self.service = breaker.name
+        self.opened = opened
+        self.speech = "Ahora mismo " + breaker.spoken + " no responde, inténtalo más tarde"
+        super().__init__(self.speech)
+
+
+class Breaker():
+
+    """ Clase Breaker.
+
+    Cortacircuitos (*circuit breaker*) de un servicio externo. Cada petición HTTP al servicio tiene un plazo máximo total
+    (*deadline*), desde que se envía hasta que se ha leído la respuesta completa. Tras *threshold* fallos seguidos el
+    circuito se abre: las llamadas siguientes fallan al momento con *ServiceUnavailable*, sin esperar al servicio.
+    Mientras está abierto, un hilo en segundo plano comprueba el servicio (estado semiabierto) pasados *reset* segundos,
+    con espera exponencial hasta *max_reset*, y cierra el circuito en cuanto responde.
+
+    Sólo cuentan como fallos los errores indicados en *errors* (por defecto, los de transporte, *OSError*) y, en las
+    peticiones HTTP, las respuestas 5xx. El resto de errores (fallos locales, configuración...) se propagan sin abrir el
+    circuito.
+
+    Las peticiones se realizan en un hilo del pool compartido (*pool*) y quien llama espera como mucho *deadline*; la
+    petición abandonada se corta sola al superar el plazo (*Http.request*).
+    """
+
+    pool = ThreadPoolExecutor(max_workers = 16, thread_name_prefix = "Breaker")
+
+    def __init__(self, name, spoken, http, probe_url, deadline = 10, threshold = 3, reset = 30, max_reset = 300,
+                 errors = (OSError,)):
+        """
+        Función de inicialización de la clase Breaker.
+
+        Args:
+            name (str): Nombre del servicio.
+            spoken (str): Nombre del servicio en las frases del sistema.
+            http (Http): Cliente HTTP compartido.
+            probe_url (str): Dirección de comprobación del servicio.
+            deadline (float, optional): Plazo máximo total de cada petición HTTP en segundos. Defaults to 10.
+            threshold (int, optional): Fallos seguidos que abren el circuito. Defaults to 3.
+            reset (float, optional): Segundos hasta la primera comprobación con el circuito abierto. Defaults to 30.
+            max_reset (float, optional): Espera máxima entre comprobaciones. Defaults to 300.
+            errors (tuple, optional): Errores que cuentan como fallo del servicio. Defaults to (OSError,).
+        """
+        self.name = name
+        self.spoken = spoken
+        self.http = http
+        self.probe_url = probe_url
+        self.deadline = deadline
+        self.threshold = threshold
+        self.reset = reset
+        self.max_reset = max_reset
+        self.errors = errors
+        self.state = "closed"               # "closed", "open" o "half-open"
+        self.failures = 0                   # Fallos seguidos
+        self.__lock = threading.Lock()
+
+
+#   ******************  Llamadas  ******************
+
+    def call(self, function, *args, **kwargs):
+        """
+        Función que llama al servicio a través del cortacircuitos.
+
+        Args:
+            function (function): Función que llama al servicio.
+            *args, **kwargs: Argumentos de la función.
+
+        Returns:
+            Resultado de la función.
+        """
+        with self.__lock:
+            if self.state != "closed":
+                raise ServiceUnavailable(self)
+        try:
+            result = function(*args, **kwargs)
+        except self.errors as e:
+            raise ServiceUnavailable(self, self.failure()) from e
+        self.success()
+        return result
+
+    def request(self, method, url, **kwargs):
+        """
+        Función que realiza una petición HTTP al servicio con el cliente compartido. La petición, incluida la lectura
+        de la respuesta, se corta con *TimeoutError* (un fallo del servicio) al superar el plazo total (*deadline*).
+
+        Args:
+            method (str): Método HTTP.
+            url (str): Dirección de la petición.
+            **kwargs: Argumentos de la petición.
+
+        Returns:
+            response: Respuesta de la petición.
+        """
+        kwargs.setdefault("timeout", self.deadline)
+
+        def send():
+            future = Breaker.pool.submit(self.http.request, method, url, deadline = self.deadline, **kwargs)
+            try:
+                response = future.result(timeout = self.deadline)
+            except FutureTimeout:
+                raise TimeoutError("Plazo de %.1f s superado: %s" % (self.deadline, url)) from None
+            if response.status_code >= 500:
+                raise IOError("HTTP " + str(response.status_code))
+            return response
+
+        return self.call(send)
+
+    def success(self):
+        with self.__lock:
+            self.failures = 0
+
+    def failure(self):
+        """
+        Función que cuenta un fallo del servicio y abre el circuito si se alcanza *threshold*.
+
+        Returns:
+            (bool): True si este fallo ha abierto el circuito.
+        """
+        with self.__lock:
+            self.failures += 1
+            if self.state != "closed" or self.failures < self.threshold:
+                return False
+            self.state = "open"
+        threading.Thread(target = self.__probe, name = "Breaker " + self.name, daemon = True).start()
+        return True
+
+
+#   ******************  Comprobación en segundo plano  ******************
+
+    def __probe(self):
+        """
+        Función del hilo de comprobación del servicio con el circuito abierto.
+        """
+        wait = self.reset
+        while True:
+            time.sleep(wait)
+            with self.__lock:
+                self.state = "half-open"
+            try:
+                if self.http.head(self.probe_url, timeout = self.deadline).status_code < 500:
+                    break
+            except Exception:
+                pass
+            with self.__lock:
+                self.state = "open"
+            wait = min(2 * wait, self.max_reset)
+        with self.__lock:
+            self.state = "closed"
+            self.failures = 0
@@ -1,10 +1,12 @@
 #!/usr/bin/python3
 
 from Engine import Engine
+from Breaker import ServiceUnavailable
 from dateutil.relativedelta import relativedelta
 import datefinder
 from datetime import datetime, timedelta
 from apiclient.discovery import build
+from Http import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 import pickle
 import iso8601
@@ -48,23 +50,74 @@ class Calendar(Engine):
         self.Numbers = Numbers
         self.Months = Months
         
-        # Inicialización del calendario
-        if os.path.isfile('.tokenCalendar.pkl'):
-            self.__credentials = pickle.load(open(".tokenCalendar.pkl", "rb"))  
-            self.service = build("calendar", "v3", credentials = self.__credentials)
-        if self.CalendarsAPI:
-            with open(".client_secret.json", "w") as outfile:
-                json.dump(self.CalendarsAPI, outfile)
-            scopes = ['https://www.googleapis.com/auth/calendar']
-            flow = InstalledAppFlow.from_client_secrets_file(".client_secret.json", scopes=scopes)
-            self.__credentials = flow.run_local_server()
-            pickle.dump(self.__credentials, open(".tokenCalendar.pkl", "wb")) 
-            os.remove(".client_secret.json")
+        # Inicialización del calendario del usuario actual
+        self.loadCalendar(self.User)
 
         # Instanciación de la superclase Enigne de la que hereda la clase Calendar
         Engine.__init__(self, self.Names)
         
 
+#   ******************  Credenciales  ******************
+
+    def loadCalendar(self, user):
+        """
+        Función que carga las credenciales del calendario de un usuario. Cada usuario guarda las suyas en el archivo
+        ".tokenCalendar_<usuario>.pkl"; el usuario por defecto, que era el único de versiones anteriores, puede usar
+        también el archivo común ".tokenCalendar.pkl". Sólo si el usuario tiene acceso a la API (*CalendarsAPI*) y no
+        tiene unas credenciales válidas o renovables, se solicitan unas nuevas (en el navegador).
+
+        Args:
+            user (str): Nombre del usuario.
+        """
+        self.__token = ".tokenCalendar_" + user + ".pkl"
+        self.__credentials = None
+        self.service = None
+        tokens = [self.__token]
+        if user == getattr(self, "default_user", None):            # Archivo común: sólo para su propietario
+            tokens.append(".tokenCalendar.pkl")
+        for token in tokens:
+            if os.path.isfile(token):
+                self.__credentials = pickle.load(open(token, "rb"))
+                break
+        credentials = self.__credentials
+        if credentials is not None and (credentials.valid or getattr(credentials, "refresh_token", None)):
+            self.service = self.__build()       # Las credenciales caducadas se renuevan en la primera petición
+        elif self.CalendarsAPI:
+            self.__authorize()
+
+    def __authorize(self):
+        """
+        Función que solicita al usuario nuevas credenciales para la API de Google Calendar y las guarda.
+        """
+        with open(".client_secret.json", "w") as outfile:
+            json.dump(self.CalendarsAPI, outfile)
+        scopes = ['https://www.googleapis.com/auth/calendar']
+        flow = InstalledAppFlow.from_client_secrets_file(".client_secret.json", scopes=scopes)
+        self.__credentials = flow.run_local_server()
+        pickle.dump(self.__credentials, open(self.__token, "wb"))
+        os.remove(".client_secret.json")
+        self.service = self.__build()
+
+    def __build(self):
+        """
+        Función que construye el servicio de la API de Google Calendar sobre el cliente HTTP compartido (*Http*).
+        """
+        return build("calendar", "v3", http = AuthorizedHttp(self.http, self.__credentials, self.breaker("calendar")))
+
+    def calendarState(self):
+        """
+        Función que devuelve el estado del calendario del usuario actual (credenciales y servicio), para guardarlo en su
+        contexto.
+        """
+        return self.__token, self.__credentials, self.service
+
+    def setCalendarState(self, state):
+        """
+        Función que restablece el estado del calendario de un usuario guardado con *calendarState*.
+        """
+        self.__token, self.__credentials, self.service = state
+
+
 #   ******************  Funciones auxiliares de Calendar  ******************
 
     def __get_date_hours(self, date_input, time_format = "date"):
@@ -89,6 +142,37 @@ class Calendar(Engine):
         elif time_format == "day_complete":
             return date_obj.strftime('%d-%m-%Y ')
 
+    def __get_pages(self, calendarID, tmin, tmax, maxResults):
+        """
+        Función que devuelve, página a página, los eventos de un intervalo. Cada página se solicita a la API cuando se
+        necesita, de forma que sólo hay una página en memoria.
+
+        Las páginas se piden con un servicio propio, no con *service*: la primera se descarga en el hilo que llama y el
+        resto desde el hilo de la ventana *GetCalendar*, y los servicios de la API no pueden compartirse entre hilos.
+
+        Args:
+            calendarID (str): ID del calendarios de Google.
+            tmin (str): Inicio del intervalo (ISO 8601).
+            tmax (str): Fin del intervalo (ISO 8601).
+            maxResults (int): Número máximo de eventos por página.
+
+        Yields:
+            eventsResult(dict): Página de eventos.
+        """
+        events = self.__build().events()
+        request = events.list(
+            calendarId = calendarID,
+            timeMin = tmin,
+            timeMax = tmax,
+            maxResults = maxResults,
+            singleEvents = True,
+            orderBy = 'startTime',
+        )
+        while request is not None:
+            eventsResult = request.execute()
+            yield eventsResult
+            request = events.list_next(request, eventsResult)
+
     def __get_relative_events(self, calendarID, duration, offset = 0, maxResults = 50):
         """
         Función que devuelve los eventos que tienen lugar en un tiempo relativo respecto a hoy. Por ejemplo, los eventos
@@ -98,10 +182,10 @@ class Calendar(Engine):
             calendarID (str): ID del calendarios de Google.
             duration (int): Número de días del intervalo buscado.
             offset (int, optional): Desplazamiento en días desde el día actual al primero del intervalo buscado. Defaults to 0.
-            maxResults (int, optional): Número máximo de resultados que se devuelven. Defaults to 50.
+            maxResults (int, optional): Número máximo de resultados por página. Defaults to 50.
 
         Returns:
-            eventsResult(???): Listado de eventos.
+            eventsResult(generator): Páginas de eventos.
         """
         today = datetime.today()
         today = datetime.combine(today, datetime.min.time())
@@ -109,15 +193,7 @@ class Calendar(Engine):
         diff = today + relativedelta(days = duration)
         tmin = today.isoformat('T') + "Z"
         tmax = diff.isoformat('T') + "Z"
-        eventsResult = self.service.events().list(
-            calendarId = calendarID,
-            timeMin = tmin,
-            timeMax = tmax,
-            maxResults = maxResults,
-            singleEvents = True,
-            orderBy = 'startTime',
-        ).execute()
-        return eventsResult
+        return self.__get_pages(calendarID, tmin, tmax, maxResults)
 
     def __get_absolute_events(self, calendarID, day_str, maxResults = 50):
         """
@@ -127,25 +203,44 @@ class Calendar(Engine):
         Args:
             calendarID (str): ID del calendarios de Google.
             day_str (???): La fecha del día solicitado.
-            maxResults (int, optional): Número máximo de resultados que se devuelven. Defaults to 50.
+            maxResults (int, optional): Número máximo de resultados por página. Defaults to 50.
 
         Returns:
-            eventsResult(???): Listado de eventos.
+            eventsResult(generator): Páginas de eventos.
         """
         matches = list(datefinder.find_dates(day_str))
         day = matches[0]
         diff = day + relativedelta(days = 1)
         tmin = day.isoformat('T') + "Z"
         tmax = diff.isoformat('T') + "Z"
-        eventsResult = self.service.events().list(
-            calendarId = calendarID,
-            timeMin = tmin,
-            timeMax = tmax,
-            maxResults = maxResults,
-            singleEvents = True,
-            orderBy = 'startTime',
-        ).execute()
-        return eventsResult
+        return self.__get_pages(calendarID, tmin, tmax, maxResults)
+
+    def __format_events(self, eventsResult, pages, time_format):
+        """
+        Función que da formato a los eventos, página a página. Si el servicio deja de responder al pedir una página, se
+        muestra el aviso en la ventana en lugar del resto de eventos.
+
+        Args:
+            eventsResult (dict): Primera página de eventos, ya descargada.
+            pages (generator): Resto de páginas de eventos.
+            time_format (str): Formato de la fecha de los eventos (ver *__get_date_hours*).
+
+        Yields:
+            text (str): Texto de los eventos de una página.
+        """
+        while eventsResult is not None:
+            lines = []
+            for event in eventsResult.get('items', []):
+                if 'dateTime' in event['start'].keys():
+                    lines.append("   -" + event['summary'] + " a las " + self.__get_date_hours(event['start']['dateTime'], time_format) + "\n")
+                else:
+                    lines.append("   -" + event['summary'] + " el día " + self.__get_date_hours(event['start']['date'], 'day_complete') + "\n")
+            yield "".join(lines)
+            try:
+                eventsResult = next(pages, None)
+            except ServiceUnavailable as e:             # Desde el hilo de la ventana: no llega a *runAction*
+                yield "\n   " + e.speech + "\n"
+                return
 
     def __create_event(self, start_time_str, summary, duration = 1, description = None, location = None):
         """
@@ -207,11 +302,13 @@ class Calendar(Engine):
 
         Returns:
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
-            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+            text (str or generator): Cadena de texto que contiene la frase que debe mostrar el sistema. Si hay eventos, es un
+                generador que devuelve el texto de cada página de eventos a medida que se descarga.
         """
         try:
             # Inicialización calendario
-            self.service = build("calendar", "v3", credentials=self.__credentials)
+            if self.service is None:
+                self.service = self.__build()
 
             # Elección del calendario a enseñar
             list_of_words = query.split()
@@ -338,33 +435,28 @@ class Calendar(Engine):
                     day_str = str(day) + "/" + str(month) + "/" + str(year)
                     eventsResult = self.__get_absolute_events(calendarID, day_str)
 
-            # Obtener resultados
+            # Obtener resultados: sólo se descarga la primera página, el resto se descarga al mostrarse
+            pages = eventsResult
+            eventsResult = next(pages)
             if eventsResult['items']:
                 speech = "Tus " + event_type + "  para " + time_str + " son:"
-                text = str()
-                for event in eventsResult['items']:
-                    if 'dateTime' in event['start'].keys():
-                        text += "   -" + event['summary'] + " a las " + self.__get_date_hours(event['start']['dateTime'], time_format) + "\n"
-                    else:
-                        text += "   -" + event['summary'] + " el día " + self.__get_date_hours(event['start']['date'], 'day_complete') + "\n"
+                text = self.__format_events(eventsResult, pages, time_format)
             else:
                 speech = "No tienes nada para " + time_str
                 text = "No tienes nada para " + time_str
         
             return speech, text
 
+        # Servicio caído o sin respuesta: no es un error de credenciales
+        except ServiceUnavailable:
+            raise
+
         # Error de credenciales
         except:
             # if os.path.isfile('.client_secret.json'):
             if self.CalendarsAPI:
-                with open(".client_secret.json", "w") as outfile:
-                    json.dump(self.CalendarsAPI, outfile)
                 self.speak("Parece que ha habido un error. Por favor, vuelve a actualizar sus credenciales.")
-                scopes = ['https://www.googleapis.com/auth/calendar']
-                flow = InstalledAppFlow.from_client_secrets_file(".client_secret.json", scopes=scopes)
-                self.__credentials = flow.run_local_server()
-                pickle.dump(self.__credentials, open(".tokenCalendar.pkl", "wb")) 
-                os.remove(".client_secret.json")
+                self.__authorize()
                 speech = "Se han actualizado las credenciales"
                 text = "Credenciales actualizadas.\nVuelva a intentar su petición"
             else:
@@ -380,6 +472,7 @@ class Calendar(Engine):
             - Mañana.
             - Pasado mañana.
             - Fecha concreta.
+        Si la petición no contiene la fecha ("para ..."), la hora ("a las ...") o el nombre del evento, se preguntan por voz.
         Args:
             query (str): Cadena de texto de la frase que define el tiempo de los eventos buscados.
 
@@ -389,57 +482,25 @@ class Calendar(Engine):
         """
         try:
             # Inicialización calendario
-            self.service = build("calendar", "v3", credentials=self.__credentials)
+            if self.service is None:
+                self.service = self.__build()
 
             # Obtención de la fecha
             list_of_words = query.split()
-            time_unit = "para"
-            date_format = "%d/%m/%Y"
-            if time_unit not in list_of_words:
-                day_str = self.GUI("Date", text="Introduce la fecha del evento",  geometry = "400x300")
-            else:
-                if list_of_words[list_of_words.index(time_unit) + 1] == "hoy":
-                    time_str = "hoy"
-                    today = datetime.today()
-                    time_str = today.strftime(date_format)
-                elif list_of_words[list_of_words.index(time_unit) + 1] == "mañana":
-                    day_str = "mañana"
-                    today = datetime.today()
-                    day_str = today + timedelta(days=1)
-                    day_str = day_str.strftime(date_format)
-                elif list_of_words[list_of_words.index(time_unit) + 1] == "pasado":
-                    time_str = "pasado mañana"
-                    today = datetime.today()
-                    day_str = today + timedelta(days=2)
-                    day_str = day_str.strftime(date_format)
-                else:
-                    try:
-                        day = list_of_words[list_of_words.index(time_unit) + 2]
-                        key_list = list(self.Numbers.keys())
-                        val_list = list(self.Numbers.values())
-                        position = val_list.index(day)
-                        day = key_list[position]
-                    except:
-                        day = list_of_words[list_of_words.index(time_unit) + 2]
-                    try:
-                        month = list_of_words[list_of_words.index(time_unit) + 4]
-                        key_list = list(self.Months.keys())
-                        val_list = list(self.Months.values())
-                        position = val_list.index(month)
-                        month = key_list[position]
-                    except:
-                        today = datetime.today()
-                        month = today.month
-                    try:
-                        year = int(list_of_words[list_of_words.index(time_unit) + 6])
-                    except:
-                        today = datetime.today()
-                        year = today.year
+            request = query.partition(" nombre")[0]
+            day_str = None
+            if "para" in list_of_words:
+                day_str = self.slotParser().date(request.partition("para")[2].partition(" a las ")[0])
+            if day_str is None:
+                day_str = self.askSlot("date", "¿Para qué día es el evento?", text="Introduce la fecha del evento",
+                                       geometry = "400x300")
 
-                    day_str = str(day) + "/" +  str(month) + "/" + str(year)
-            
             # Obtención de la hora
-            hours_str = self.GUI("Hour", text="Introduce la hora del evento")
+            hours_str = None
+            if " a las " in request:
+                hours_str = self.slotParser().hour(request.partition(" a las ")[2])
+            if hours_str is None:
+                hours_str = self.askSlot("hour", "¿A qué hora?", text="Introduce la hora del evento")
 
             # Obtención del tiempo del evento
             time_str = day_str + " " + hours_str
@@ -448,7 +509,8 @@ class Calendar(Engine):
             try:
                 summary = ' '.join(list_of_words[list_of_words.index("nombre")+1:])
             except:
-                summary = self.GUI("Text", text="Introduce el nombre del evento", default_text="Evento")
+                summary = self.askSlot("text", "¿Cómo se llama el evento?", text="Introduce el nombre del evento",
+                                       default_text="Evento")
 
             # Obtención de la descripción y localización
             description, location = self.GUI("SetCalendar", geometry="800x400")
@@ -461,18 +523,16 @@ class Calendar(Engine):
 
             return speech, text
 
+        # Servicio caído o sin respuesta: no es un error de credenciales
+        except ServiceUnavailable:
+            raise
+
         # Error de credenciales
         except:
             # if os.path.isfile('.client_secret.json'):
             if self.CalendarsAPI:
-                with open(".client_secret.json", "w") as outfile:
-                    json.dump(self.CalendarsAPI, outfile)
                 self.speak("Parece que ha habido un error. Por favor, vuelve a actualizar sus credenciales.")
-                scopes = ['https://www.googleapis.com/auth/calendar']
-                flow = InstalledAppFlow.from_client_secrets_file(".client_secret.json", scopes=scopes)
-                self.__credentials = flow.run_local_server()
-                pickle.dump(self.__credentials, open(".tokenCalendar.pkl", "wb")) 
-                os.remove(".client_secret.json")
+                self.__authorize()
                 speech = "Se han actualizado las credenciales"
                 text = "Credenciales actualizadas.\nVuelva a intentar su petición"
             else:
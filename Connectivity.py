@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+
+import threading
+
+
+class Connectivity():
+
+    """ Clase Connectivity.
+
+    Monitor de la conexión a Internet en segundo plano. Un hilo propio comprueba la conexión (petición HEAD a *url*) cada
+    *interval* segundos mientras hay conexión; sin conexión, vuelve a comprobarla con espera exponencial (1, 2, 4...
+    hasta *max_backoff* segundos), de forma que detecta pronto la recuperación sin saturar una red inestable.
+
+    El estado se publica en *online*, por lo que el resto del sistema lo consulta sin hacer ninguna petición. Quien
+    detecte un fallo de red puede adelantar la siguiente comprobación (*report*).
+    """
+
+    def __init__(self, http, url = "http://www.google.com", interval = 30, timeout = 5, max_backoff = 30):
+        """
+        Función de inicialización de la clase Connectivity. Se realiza una primera comprobación y se inicia el hilo del
+        monitor.
+
+        Args:
+            http (Http): Cliente HTTP compartido.
+            url (str, optional): Dirección de comprobación. Defaults to "http://www.google.com".
+            interval (float, optional): Segundos entre comprobaciones con conexión. Defaults to 30.
+            timeout (float, optional): Tiempo máximo de cada comprobación en segundos. Defaults to 5.
+            max_backoff (float, optional): Espera máxima entre comprobaciones sin conexión. Defaults to 30.
+        """
+        self.http = http
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.__wake = threading.Event()
+        self.__changed = threading.Condition()
+        self.online = self.probe()
+        threading.Thread(target = self.__run, name = "Connectivity", daemon = True).start()
+
+    def probe(self):
+        """
+        Función que comprueba la conexión a Internet.
+
+        Returns:
+            (bool): True si hay conexión.
+        """
+        try:
+            self.http.head(self.url, timeout = self.timeout)
+            return True
+        except Exception:                   # Errores de conexión de *requests* o *httpx*
+            return False
+
+    def report(self):
+        """
+        Función que adelanta la siguiente comprobación, por ejemplo tras un fallo de red en una funcionalidad.
+        """
+        self.__wake.set()
+
+    def wait(self, timeout = None):
+        """
+        Función que espera a que haya conexión.
+
+        Args:
+            timeout (float, optional): Tiempo máximo de espera en segundos. Defaults to None.
+
+        Returns:
+            (bool): True si hay conexión.
+        """
+        with self.__changed:
+            return self.__changed.wait_for(lambda: self.online, timeout)
+
+    def __run(self):
+        """
+        Función del hilo del monitor.
+        """
+        failures = 0 if self.online else 1                  # Comprobaciones fallidas seguidas
+        while True:
+            self.__wake.wait(self.interval if not failures else min(2 ** (failures - 1), self.max_backoff))
+            self.__wake.clear()
+            online = self.probe()
+            failures = 0 if online else failures + 1
+            with self.__changed:
+                self.online = online
+                self.__changed.notify_all()
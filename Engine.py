@@ -2,13 +2,18 @@
 
 import speech_recognition as sr 
 import pyttsx3 
-from tkinter import *
-from tkinter import scrolledtext
-from tkinter import font
-from tkcalendar import Calendar
-from datetime import datetime
-import requests
-import re
+from Interface import Interface
+from Headless import Headless
+from Slots import Slots
+from Notifier import Notifier
+from Connectivity import Connectivity
+from Http import Http
+from Breaker import Breaker, ServiceUnavailable
+from PIL import Image
+from collections import OrderedDict
+from io import BytesIO
+import os
+import threading
 
 
 class Engine():
@@ -21,6 +26,29 @@ class Engine():
     de la conexión a Internet del usuario.
     """
 
+    interface = None                    # Interfaz gráfica compartida (*Interface* o *Headless*)
+    interfaceLock = threading.Lock()
+    notifier = None                     # Notificaciones de escritorio compartidas (*Notifier*)
+    sounds = None                       # Efectos de sonido compartidos (*Sounds*)
+    connectivity = None                 # Monitor de la conexión a Internet compartido (*Connectivity*)
+    http = Http()                       # Cliente HTTP compartido por todas las peticiones salientes (*Http*)
+    breakers = {}                       # Cortacircuitos compartidos de los servicios externos (*Breaker*)
+    breakersLock = threading.Lock()
+    speechLock = threading.RLock()      # El motor de voz no admite llamadas simultáneas (hilo principal y avisos)
+
+    # Servicios externos: nombre en las frases del sistema, dirección de comprobación y plazo máximo en segundos
+    services = {
+        "stt": ("el reconocimiento de voz", "https://www.google.com/speech-api/v2/recognize", 8),
+        "wttr": ("el servicio del tiempo", "https://wttr.in/", 10),
+        "youtube": ("YouTube", "https://www.youtube.com/", 10),
+        "wikipedia": ("la Wikipedia", "https://es.wikipedia.org/", 10),
+        "telegram": ("Telegram", "https://api.telegram.org/", 10),
+        "calendar": ("el calendario de Google", "https://www.googleapis.com/", 15),
+    }
+    connectivityLock = threading.Lock()
+    thumbnails = OrderedDict()          # Miniaturas ya decodificadas: (origen, tamaño) -> PIL.Image
+    maxThumbnails = 16
+
 #   ******************  __init__  ******************
 
     def __init__(self, Names):
@@ -38,6 +66,7 @@ class Engine():
         # Inicialización reconocimient de voz
         self.__r = sr.Recognizer()
         self.__r.pause_threshold = 1
+        self.__r.operation_timeout = Engine.services["stt"][2]         # Plazo del reconocimiento de voz
         # r.energy_threshold = 4000
         # r.dynamic_energy_adjustment_ratio = 1
         # with sr.Microphone() as source:
@@ -52,40 +81,56 @@ class Engine():
         self.maxVoices = 7
         self.voiceEngine.setProperty('voice', self.defaultVoice)
         self.voiceEngine.setProperty('rate', self.defaultRate)
+
+        # Atributos de la petición de datos por voz
+        self.voiceSlots = True
+        self.slotAttempts = 2
     
     
 #   ******************  Comprobación de conexión a Internet  ******************
 
+    def online(self):
+        """
+        Función que devuelve el estado de la conexión a Internet publicado por el monitor (*Connectivity*), sin hacer
+        ninguna petición. El monitor se inicia en la primera llamada.
+
+        Returns:
+            (bool): True si hay conexión.
+        """
+        with Engine.connectivityLock:
+            if Engine.connectivity is None:
+                Engine.connectivity = Connectivity(Engine.http)
+        return Engine.connectivity.online
+
     def internetCheck(self):
         """
         Función de comprobación de la conexión a Internet del usuario. Sin conexión a Internet, el sistema no puede iniciarse
-        debido a la imposibilidad de utilizar el reconocimiento de voz y la base de conocimiento.
+        debido a la imposibilidad de utilizar el reconocimiento de voz y la base de conocimiento. El estado se lee del
+        monitor de la conexión (*online*), sin esperar a ninguna petición.
 
         Returns:
             response, text (int, str): En caso de éxito se devuelve un 0, sino, se devuelve la cadena de texto del mensaje de error
             que debe mostrarse por pantalla al usuario.
         """
-        url = "http://www.google.com"
-        timeout = 5
-        try:
-            requests.get(url, timeout = timeout)
+        if self.online():
             return 0
-        except (requests.ConnectionError, requests.Timeout) as exception:
-            text = "No tiene acceso \na Internet"
-            return text
+        text = "No tiene acceso \na Internet"
+        return text
 
 
 #   ******************  Motor de reconocimiento, emisión y cambio de voz  ******************
 
     def speak(self, audio): 
         """
-        Función para la emisisón de audio del asistente.
+        Función para la emisisón de audio del asistente. El motor de voz se usa de uno en uno (*speechLock*), ya que los
+        avisos de alarmas y recordatorios se enuncian desde su propio hilo.
 
         Args:
             audio (str): texto a enunciar por parte del asistente.
         """
-        self.voiceEngine.say(audio)
-        self.voiceEngine.runAndWait() 
+        with Engine.speechLock:
+            self.voiceEngine.say(audio)
+            self.voiceEngine.runAndWait()
 
     def takeCommand(self):
         """
@@ -95,7 +140,7 @@ class Engine():
 
         Returns:
             request (str): texto de la petición del usuario transcrita.
-            window (tkinter.Tk): Ventana de la interfaz de usuario.
+            window (Dialog): Ventana de la interfaz de usuario.
         """
         # r = sr.Recognizer()
 
@@ -103,20 +148,25 @@ class Engine():
             with sr.Microphone() as source:
                 audio = self.__r.listen(source, phrase_time_limit = 5)
                 try:
-                    query = self.__r.recognize_google(audio, language='es-ES')
+                    query = self.recognize(audio)
                     for name in self.Names:
                         if (query.find(name)) != -1:
-                            self.speak("¿Si?")
+                            if not self.playSound("chime"):                 # Aviso de escucha
+                                self.speak("¿Si?")
                             window = self.GUI("Status", "Reconociendo...")
                             audio = self.__r.record(source, 10)
                             # audio = r.listen(source, phrase_time_limit = 10) 
                             try:
-                                request = self.__r.recognize_google(audio, language='es-ES')
+                                request = self.recognize(audio)
                                 return request, window
                             except:
                                 self.GUI("Close", prev_window = window)
                                 return None, None		
                     return None, None
+                except ServiceUnavailable as e:
+                    if e.opened:                                            # Aviso sólo al abrirse el circuito
+                        self.speak(e.speech)
+                    return None, None
                 except: 
                     return None, None
 
@@ -126,7 +176,7 @@ class Engine():
 
         Returns:
             request (str): texto de la petición del usuario transcrita.
-            window (tkinter.Tk): Ventana de la interfaz de usuario.
+            window (Dialog): Ventana de la interfaz de usuario.
         """
         # r = sr.Recognizer()
         with sr.Microphone() as source:
@@ -134,7 +184,7 @@ class Engine():
                 window = self.GUI("Status", "Reconociendo...")
                 audio = self.__r.record(source, 10)
                 try: 
-                    request = self.__r.recognize_google(audio, language='es-ES')
+                    request = self.recognize(audio)
                     return request, window
                 except:
                     self.GUI("Close", prev_window = window)
@@ -171,7 +221,7 @@ class Engine():
             with sr.Microphone() as source:
                 audio = self.__r.listen(source, phrase_time_limit = 3)
                 try:
-                    query = self.__r.recognize_google(audio, language='es-ES')
+                    query = self.recognize(audio)
                     if query == "si":
                         change = True
                         break
@@ -203,695 +253,213 @@ class Engine():
         return speech, text
 
 
-#   ******************  GUI  ******************
+    def playSound(self, name, block = False):
+        """
+        Función que reproduce un efecto de sonido ya decodificado (*Sounds*).
+
+        Args:
+            name (str): Nombre del sonido.
+            block (bool, optional): Flag para esperar a que termine. Defaults to False.
 
-    def __get_SetCalendar_entry(self, desc_entry, loc_entry):
+        Returns:
+            (bool): False si el sonido no está disponible.
         """
-        Función para recoger la entrada de texto de la GUI *SetCalendar*
+        return Engine.sounds is not None and Engine.sounds.play(name, block)
+
+
+    def recognize(self, audio):
+        """
+        Función que transcribe un audio con el reconocimiento de voz de Google, a través de su cortacircuitos.
 
         Args:
-            desc_entry (tkinter.Tk.Entry): Caja de texto para la descripción del evento.
-            loc_entry (tkinter.Tk.Entry): Caja de texto para la localización del evento.
+            audio (speech_recognition.AudioData): Audio.
+
+        Returns:
+            text (str): Texto transcrito.
         """
-        global description, location
-        description = desc_entry.get("1.0", "1000.1000")
-        location = str(loc_entry.get())
+        return self.breaker("stt").call(self.__r.recognize_google, audio, language = 'es-ES')
+
 
-    def __get_Login_entry(self, name_entry, pwd_entry):
+#   ******************  Servicios externos  ******************
+
+    def breaker(self, service):
         """
-        Función para recoger la entrada de texto de la GUI *Login*
+        Función que devuelve el cortacircuitos compartido de un servicio externo (*services*).
 
         Args:
-            name_entry (tkinter.Tk.Entry): Caja de texto para el nombre del usuario.
-            pwd_entry (tkinter.Tk.Entry): Caja de texto para la contraseña del usuario.
+            service (str): Nombre del servicio.
 
+        Returns:
+            breaker (Breaker): Cortacircuitos del servicio.
         """
-        global name, password
-        name = str(name_entry.get())
-        password = str(pwd_entry.get())
+        with Engine.breakersLock:
+            if service not in Engine.breakers:
+                spoken, probe_url, deadline = Engine.services[service]
+                errors = (sr.RequestError, OSError) if service == "stt" else Http.errors      # Sólo errores de transporte
+                Engine.breakers[service] = Breaker(service, spoken, Engine.http, probe_url, deadline, errors = errors)
+            return Engine.breakers[service]
+
+
+#   ******************  Petición de datos por voz  ******************
 
-    def __get_Text_entry(self, text_entry):
+    def listenAnswer(self, phrase_time_limit = 4):
         """
-        Función para recoger la entrada de texto de la GUI *Text*.
+        Función que escucha una respuesta corta del usuario, sin necesidad de invocar al asistente por su nombre.
 
         Args:
-            text_entry (tkinter.Tk.Entry): Caja de texto para el texto introducido por el usuario.
+            phrase_time_limit (int, optional): Duración máxima de la respuesta en segundos. Defaults to 4.
+
+        Returns:
+            answer (str): Texto de la respuesta transcrita o None si no se ha reconocido nada.
         """
-        global info
-        info = str(text_entry.get())  
+        try:
+            with sr.Microphone() as source:
+                audio = self.__r.listen(source, timeout = 5, phrase_time_limit = phrase_time_limit)
+            return self.recognize(audio)
+        except:
+            return None
 
-    def __get_Alarm_radiobutton(self, var):
+    def askSlot(self, slot, question, text = None, default_text = None, geometry = "400x200"):
         """
-        Función para recoger el valor de los botones de la GUI *Alarm*.
+        Función que pide por voz un dato que falta en la petición del usuario. Se pregunta sólo por ese dato, se escucha
+        la respuesta y se interpreta con *Slots*. Si tras varios intentos no se ha podido interpretar, o si la petición
+        por voz está desactivada (*voiceSlots*), se pide el dato con la GUI equivalente.
 
         Args:
-            var (IntVar): Variable de recogida de unidad de tiempo.
-        """
-        global unit
-        unit = var.get()
-
-    def __get_Hour_entry(self, hour, minute):
-        global alarm_time 
-        h = hour.get()
-        m = minute.get()
-        alarm_time = h + ":" + m
-
-    def __get_Date_calendar(self, cal):
-        global date
-        date = cal.get_date()
-
-    def __isValidTime(self, time):
-        regex = "^([01]?[0-9]|2[0-3]):[0-5][0-9]$"
-        p = re.compile(regex)
-        if (time == "") :
-            return False
-        m = re.search(p, time)
-        if m is None :
-            return False
-        else :
-            return True
-
-    # REVISAR
+            slot (str): Tipo de dato (*text*, *hour*, *date* o *duration*).
+            question (str): Pregunta que debe pronunciar el asistente.
+            text (str, optional): Texto de la GUI equivalente. Defaults to None.
+            default_text (str, optional): Texto por defecto de la GUI equivalente. Defaults to None.
+            geometry (str, optional): Tamaño de la ventana de la GUI equivalente. Defaults to "400x200".
+
+        Returns:
+            Valor del dato con el mismo formato que devuelve la GUI equivalente.
+        """
+        if self.voiceSlots:
+            for _ in range(self.slotAttempts):
+                self.speak(question)
+                value = self.slotParser().parse(slot, self.listenAnswer())
+                if value is not None:
+                    return value
+
+        action = {"text": "Text", "hour": "Hour", "date": "Date", "duration": "Alarm"}[slot]
+        return self.GUI(action, text = text, default_text = default_text, geometry = geometry)
+
+    def slotParser(self):
+        """
+        Función que devuelve el intérprete de datos (*Slots*) construido con las tablas de la base de conocimiento.
+
+        Returns:
+            slots (Slots): Intérprete de datos.
+        """
+        if getattr(self, "_Engine__slots", None) is None:
+            self.__slots = Slots(getattr(self, "Numbers", None), getattr(self, "Months", None), getattr(self, "Days", None))
+        return self.__slots
+
+
+#   ******************  Notificaciones  ******************
+
+    def notify(self, text, prev_window = None, timeout = 5000):
+        """
+        Función que muestra un resultado breve como notificación de escritorio, sin ventana y sin esperar al usuario. Si
+        no hay servicio de notificaciones disponible, se muestra con la GUI *Show*.
+
+        Args:
+            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+            prev_window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
+            timeout (int, optional): Tiempo en milisegundos hasta que la notificación desaparece. Defaults to 5000.
+        """
+        if prev_window is not None:
+            self.GUI("Close", prev_window = prev_window)
+        if Engine.notifier is None:
+            Engine.notifier = Notifier(fallback = lambda text: self.GUI("Show", text = text))
+        if not Engine.notifier.notify(text, timeout = timeout):
+            self.GUI("Show", text = text)
+
+
+#   ******************  Imágenes  ******************
+
+    def showImage(self, source, key = None, text = None, size = (480, 480), prev_window = None):
+        """
+        Función que muestra una imagen en la GUI *Image*, escalada a *size* como máximo. La imagen se decodifica en
+        memoria y, si tiene una clave (*key*), su miniatura se guarda en una caché (LRU de *maxThumbnails* entradas), de
+        forma que volver a mostrarla no necesita leerla ni decodificarla de nuevo.
+
+        Args:
+            source (bytes, file, function): Contenido de la imagen, archivo abierto o función que devuelve uno de ellos
+            (sólo se llama si la miniatura no está en la caché).
+            key (str, optional): Identificador del origen de la imagen. Defaults to None.
+            text (str, optional): Texto que se muestra sobre la imagen. Defaults to None.
+            size (tuple, optional): Tamaño máximo (ancho, alto). Defaults to (480, 480).
+            prev_window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
+
+        Returns:
+            future (concurrent.futures.Future): Se resuelve cuando el usuario cierra la ventana. None si no hay imagen o
+            no se puede decodificar (respuesta de error, formato desconocido, archivo truncado...).
+        """
+        thumbnail = Engine.thumbnails.get((key, size)) if key is not None else None
+        if thumbnail is not None:
+            Engine.thumbnails.move_to_end((key, size))
+        else:
+            if callable(source):
+                source = source()
+            if source is None:
+                return None
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                source = BytesIO(source)
+            try:
+                with Image.open(source) as image:
+                    image.thumbnail(size)               # Decodificación a escala reducida (*draft*) si el formato lo permite
+                    thumbnail = image.convert("RGBA") if image.mode not in ("RGB", "RGBA") else image.copy()
+            except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):      # No es una imagen válida
+                return None
+            if key is not None:
+                Engine.thumbnails[(key, size)] = thumbnail
+                while len(Engine.thumbnails) > Engine.maxThumbnails:
+                    Engine.thumbnails.popitem(last = False)
+
+        geometry = "%dx%d" % (max(thumbnail.width + 40, 300), thumbnail.height + 140)
+        return self.GUI("Image", text = text, default_text = thumbnail, geometry = geometry, prev_window = prev_window)
+
+
+#   ******************  GUI  ******************
+
     def GUI(self, action, text = None, default_text = None,
-            size = 16, geometry = "400x200", prev_window = None):        
+            size = 16, geometry = "400x200", prev_window = None, block = None):        
         """
         Función generadora de GUIs. En este método están definidas todas las interfaces necesarias para la ejecución
-        del sistema. Son GUIs personalizadas para cada funcionalidad concreta.
+        del sistema. Son GUIs personalizadas para cada funcionalidad concreta. Todas las GUIs comparten una única raíz
+        de Tk (*Interface*), que se crea en la primera llamada y cuyo bucle de eventos se ejecuta en su propio hilo.
+        Con la variable de entorno TEODORO_GUI=headless, o asignando otra interfaz a *Engine.interface* antes de la
+        primera llamada, se usa en su lugar una interfaz sin pantalla (*Headless*).
+
+        Las GUIs de entrada de datos esperan a que el usuario las acepte y devuelven su resultado. Las GUIs que sólo
+        muestran información (*Show*, *Error*, *GetCalendar*, *Image*) y *Close* no bloquean: devuelven un *future* que
+        se resuelve cuando el usuario cierra la ventana.
 
         Args:
             action (str): Variable que diferencia qué tipo de GUI se desea usar.
-            text (str, optional): Variable para pasar un determinado texto. Defaults to None.
+            text (str, optional): Variable para pasar un determinado texto. En *GetCalendar* puede ser un generador de
+            fragmentos de texto, que se añaden a la ventana a medida que se generan. Defaults to None.
+            default_text (str, optional): Texto por defecto de la GUI. Defaults to None.
             size (int, optional): Variable para cambiar el tamaño de letra en las interfaces. Defaults to 16.
             geometry (str, optional): Variable de texto que define el tamaño de la ventana que se genera. Defaults to "400x200".
-            prev_window (tkinter.Tk, optional): Ventana de la interfaz de usuario. Defaults to None.
+            prev_window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
+            block (bool, optional): Flag para esperar al resultado de la GUI. Por defecto, sólo se espera en las GUIs de
+            entrada de datos y en *Status*. Defaults to None.
 
         Returns:
             En algunas GUIs se devuelven cadenas de texto para la ejecución de la funcionalidad a la que sirve la interfaz.
         """
-        # Cierre de ventana anterior o acción *Close*
-        if prev_window is not None or action == "Close":
-            prev_window.destroy()
-            if action == "Close":
-                return
-
-        # Inicialización de ventana de GUI
-        window = Tk()
-        window.geometry(geometry)
-        bg = "gainsboro"
-        window.configure(bg = bg)
-        window.title("Teodoro " + action)
-        window.resizable(False, False)
-        font1 = "bitstream charter"
-        font2 = "Helvetica"
-        close_label = "Cierre esta ventana para continuar"
-        ok_button = "ok.png"
-
-        # Opciones de GUI
-        if action == "Login":           # GUI Login
-            
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg
-                )
-            label.pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg
-            )
-            frame1.pack()
-
-            Label(
-                frame1, 
-                text = "Nombre de usuario", 
-                font = (font1, size-4, "bold"),
-                padx = 10,
-                pady = 5,
-                bg=bg).grid(row=0, column=0, sticky=W)
-
-            name_entry = Entry(
-                frame1,
-                font = (font1, size-6),
-                width = 30)
-            name_entry.grid(
-                row = 0, 
-                column = 1,
-                sticky = W)
-            if text:
-                name_entry.insert(0, default_text)
-
-            Label(
-                frame1, 
-                text = "Contraseña", 
-                font = (font1, size-4, "bold"),
-                padx = 10,
-                pady = 5,
-                bg=bg).grid(row=1, column=0, sticky=W)
-        
-            pwd_entry = Entry(
-                frame1,
-                font = (font1, size-6),
-                show = "*",
-                width = 30)
-            pwd_entry.grid(
-                row = 1, 
-                column = 1,
-                sticky = W)
-
-            phone = IntVar()
-            Checkbutton(
-                frame1,
-                text = " Usar funcionalidades móvil", 
-                pady = 10,
-                variable = phone).grid(row = 2, column = 1, sticky = W)
-
-            frame2 = Frame(
-                window,
-                bg = bg
-            )
-            frame2.pack()
-            b1 = Button(
-                frame2,
-                command = lambda: [self.__get_Login_entry(name_entry, pwd_entry), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-            return name, password, phone
-
-        elif action == "Status":        # GUI Status
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 0,
-                bg = bg
-                )
-            label.pack(expand = True)
-            window.update()
-            return window
-            
-        elif action == "Show":          # GUI Show
-
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 25,
-                bg = bg
-            )
-
-            cls_label = Label(
-                window,
-                text = close_label,
-                font = (font2, 10, "bold"),
-                padx = 0,
-                pady = 0,
-                bg = bg
-                )
-
-            b1 = Button(
-                window,
-                command = lambda: window.destroy())
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-
-            label.pack(expand = True)
-            cls_label.pack(expand = True)
-            b1.pack(expand = True)
-
-            window.mainloop()
-
-        elif action == "Error":         # GUI Error
-
-            Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 15,
-                bg = bg
-            ).pack()
-
-            Label(
-                window,
-                text = default_text,
-                font = (font1, size-2),
-                padx = 0,
-                pady = 20,
-                bg = bg
-            ).pack()
-
-            cls_label = Label(
-                window,
-                text = close_label,
-                font = (font2, 10, "bold"),
-                padx = 0,
-                pady = 0,
-                bg = bg
-                )
-
-            b1 = Button(
-                window,
-                command = lambda: window.destroy())
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-
-            cls_label.pack(expand = True)
-            b1.pack(expand = True)
-
-            window.mainloop()
-
-        elif action == "GetCalendar":   # GUI GetCalendar
-            
-            label = Label(
-                window,
-                text = "Estos son sus eventos",
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 20,
-                bg = bg
-            )
-            label.pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg
-            )
-            frame1.pack()
-        
-            text_area = scrolledtext.ScrolledText( 
-                frame1,
-                font = (font1, size-1),
-                width = 75, 
-                height = 22,
-                wrap = WORD)
-                
-            text_area.grid(column = 0)
-            text_area.insert(INSERT, text)
-            text_area.configure(state ='disabled')
-
-            frame2 = Frame(
-                window,
-                bg = bg
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, 10, "bold"),
-                padx = 0,
-                pady = 20,
-                bg = bg).grid(column = 0, row = 1)
-
-            frame3 = Frame(
-                window,
-                bg = bg
-            )
-            frame3.pack()
-            b1 = Button(
-                frame3,
-                command = lambda: window.destroy())
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-        elif action == "SetCalendar":   # GUI SetCalendar
-
-            Label(
-                window,
-                text = "¿Quieres añadir una descripción y localización a tu evento?",
-                font = (font1, size, "bold"),
-                padx = 10,
-                pady = 30,
-                bg = bg).pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg)
-            frame1.pack()
-
-            Label(
-                frame1, 
-                text = "Descripción", 
-                font = (font1, size, "bold"),
-                padx = 10,
-                pady = 20,
-                bg = bg).grid(row = 0, column = 0, sticky = W)
-            
-            desc_entry = scrolledtext.ScrolledText( 
-                frame1,
-                font = (font1, size-6),
-                width = 50, 
-                height = 10,
-                wrap = WORD)
-
-            desc_entry.grid(
-                row = 0, 
-                column = 1,
-                sticky = W)
-
-            Label(
-                frame1, 
-                text = "Localización", 
-                font = (font1, size, "bold"),
-                padx = 10,
-                pady = 20,
-                bg = bg).grid(row = 1, column = 0, sticky = W)
-        
-            loc_entry = Entry(
-                frame1,
-                font = (font1, size-6),
-                width = 50)
-            loc_entry.grid(
-                row = 1, 
-                column = 1,
-                sticky = W)
-
-            frame2 = Frame(
-                window,
-                bg = bg
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, 10, "bold"),
-                padx = 0,
-                pady = 5,
-                bg = bg).grid(column = 0, row = 1)
-
-            frame3 = Frame(
-                window,
-                pady = 0,
-                bg = bg).pack()
-            b1 = Button(
-                frame3,
-                command = lambda: [self.__get_SetCalendar_entry(desc_entry, loc_entry), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image=img)
-            b1.pack(expand = True)
-
-            window.mainloop()
-
-            return description, location
-
-        elif action == "Text":          # GUI Text
-            
-            if text == None:
-                text = "Introduce aquí el texto"
-
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg
-                )
-            label.pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg,
-                pady = 15
-            )
-            frame1.pack()
-
-            if text == "secret":
-                text_entry = Entry(
-                    frame1,
-                    font = (font1, size-6),
-                    show = "*",
-                    width = 50)
-            else:
-                text_entry = Entry(
-                    frame1,
-                    font = (font1, size-6),
-                    width = 50)
-            text_entry.grid(
-                row = 1, 
-                column = 0,
-                sticky = W)
-
-            if default_text:
-                text_entry.insert(0, default_text)
-
-            frame2 = Frame(
-                window,
-                bg = bg,
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, size-6, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg).grid(column=0, row=2)
-
-            frame3 = Frame(
-                window,
-                bg = bg
-            )
-            frame3.pack()
-            b1 = Button(
-                frame3,
-                command = lambda: [self.__get_Text_entry(text_entry), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-            return info
-
-        elif action == "Alarm":         # GUI Alarm
-
-            label = Label(
-                window,
-                text = "Introduce aquí el texto",
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg
-                )
-            label.pack()
-
-            frame1 = LabelFrame(
-                window,
-                text = "Tiempo",
-                padx = 10, 
-                pady = 10,
-                bg = bg,
-            )
-            frame1.pack()
-
-            text_entry = Entry(
-                frame1,
-                font = (font1, size-6),
-                width = 10)
-            text_entry.grid(
-                row = 0, 
-                column = 0,
-                sticky = W)
-
-            if default_text:
-                text_entry.insert(0, default_text)
-
-            var = IntVar()
-            var.set(60)
-            self.__get_Alarm_radiobutton(var)
-            Radiobutton(frame1, text="Segundos", variable=var, value=1, command=lambda: self.__get_Alarm_radiobutton(var)).grid(row=0, column=1)
-            Radiobutton(frame1, text="Minutos", variable=var, value=60, command=lambda: self.__get_Alarm_radiobutton(var)).grid(row=0, column=2)
-            Radiobutton(frame1, text="Horas", variable=var, value=3600, command=lambda: self.__get_Alarm_radiobutton(var)).grid(row=0, column=3)
-
-            frame2 = Frame(
-                window,
-                bg = bg,
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, size-6, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg).grid(column=0, row=2)
-
-            frame3 = Frame(
-                window,
-                bg = bg
-            )
-            frame3.pack()
-            b1 = Button(
-                frame3,
-                command = lambda: [self.__get_Text_entry(text_entry), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-            return int(info), int(unit)
-
-        elif action == "Hour":          # GUI Hour
-            
-            if text == None:
-                text = "Introduce la hora"
-
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg
-                )
-            label.pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg,
-                pady = 5
-            )
-            frame1.pack()
-
-            Label(
-                frame1,
-                text = "Horas",
-                padx = 10,
-                pady = 2,
-                font = (font1, size-5)
-            ).grid(row = 1, column = 1)
-
-            Label(
-                frame1,
-                text = "Minutos",
-                padx = 5,
-                pady = 2,
-                font = (font1, size-5)
-            ).grid(row = 1, column = 2)
-            
-            hour = StringVar()
-            minute = StringVar()
-            
-            Entry(
-                frame1,
-                textvariable = hour, 
-                bg = "#48C9B0", 
-                width = 5, 
-                font = (font1, size-6)
-                ).grid(row = 2, column = 1)
-            Entry(
-                frame1, 
-                textvariable = minute, 
-                bg = "#48C9B0", 
-                width = 5, 
-                font = (font1, size-6)
-                ).grid(row = 2, column = 2)
-
-            frame2 = Frame(
-                window,
-                pady = 5,
-                bg = bg,
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, size-6, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg).grid(column=0, row=2)
-
-            frame3 = Frame(
-                window,
-                bg = bg
-            )
-            frame3.pack()
-            b1 = Button(
-                frame3,
-                command = lambda: [self.__get_Hour_entry(hour, minute), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-            if(self.__isValidTime(alarm_time)):
-                return alarm_time
-            else:
-                self.GUI("Show", text="Por favor, introduce una\n hora en el formato correcto")
-                alarm_time_correct = self.GUI("Hour", text="Introduce la hora")
-                return alarm_time_correct
-
-        elif action == "Date":          # GUI Date
-            
-            label = Label(
-                window,
-                text = text,
-                font = (font1, size, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg
-                )
-            label.pack()
-
-            frame1 = Frame(
-                window,
-                bg = bg,
-                pady = 5
-            )
-            frame1.pack()
-            
-            cal = Calendar(
-                window, 
-                selectmode = 'day')
-            cal.pack()
-            
-            frame2 = Frame(
-                window,
-                pady = 5,
-                bg = bg,
-            )
-            frame2.pack()
-
-            Label(
-                frame2,
-                text = close_label,
-                font = (font2, size-6, "bold"),
-                padx = 0,
-                pady = 10,
-                bg = bg).grid(column=0, row=2)
-
-            frame3 = Frame(
-                window,
-                bg = bg
-            )
-            frame3.pack()
-            b1 = Button(
-                frame3,
-                command = lambda: [self.__get_Date_calendar(cal), window.destroy()])
-            img = PhotoImage(file = ok_button)
-            b1.config(image = img)
-            b1.pack()
-
-            window.mainloop()
-
-            return str(datetime.strptime(date, '%d/%m/%y').date())
\ No newline at end of file
+        with Engine.interfaceLock:
+            if Engine.interface is None:
+                if os.environ.get("TEODORO_GUI") == "headless":
+                    Engine.interface = Headless()
+                else:
+                    Engine.interface = Interface()
+        future = Engine.interface.submit(action, text, default_text, size, geometry, prev_window)
+        if block is None:
+            block = action not in ("Close", "Show", "Error", "GetCalendar", "Image")
+        if block:
+            return future.result()
+        return future
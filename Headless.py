@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+
+from concurrent.futures import Future
+from datetime import date
+import threading
+
+
+class HeadlessDialog():
+
+    """ Clase HeadlessDialog.
+
+    Ventana ficticia que devuelve la GUI *Status* en modo sin pantalla, para que el resto del sistema pueda cerrarla
+    igual que una ventana real.
+    """
+
+    def __init__(self, action, text):
+        self.action = action
+        self.text = text
+
+
+class Headless():
+
+    """ Clase Headless.
+
+    Interfaz gráfica sin pantalla. Tiene la misma interfaz que *Interface* (*submit*), pero no muestra ninguna ventana:
+    registra cada GUI solicitada y devuelve al instante respuestas guionizadas. Permite ejecutar funcionalidades completas
+    sin servidor X y sin que nadie tenga que pulsar el botón de aceptar, por ejemplo para medir su rendimiento.
+
+    Las respuestas se indican por tipo de GUI, como una lista que se consume en orden o como una función que recibe
+    (text, default_text) y devuelve la respuesta. Si no hay respuesta guionizada se usa una por defecto.
+
+    Para usarla, basta con asignarla antes de la primera GUI (*Engine.interface = Headless(...)*) o definir la variable
+    de entorno TEODORO_GUI=headless.
+    """
+
+    def __init__(self, answers = None):
+        """
+        Función de inicialización de la clase Headless.
+
+        Args:
+            answers (dict, optional): Respuestas guionizadas por tipo de GUI. Defaults to None.
+        """
+        self.answers = answers if answers is not None else {}
+        self.requests = []
+        self.__lock = threading.Lock()
+
+    def default(self, action, text, default_text):
+        """
+        Función que devuelve la respuesta por defecto de una GUI.
+
+        Args:
+            action (str): Tipo de GUI.
+            text (str): Texto de la GUI.
+            default_text (str): Texto por defecto de la GUI.
+
+        Returns:
+            Respuesta de la GUI.
+        """
+        if action == "Login":
+            return default_text or "", "", 0
+        elif action == "Status":
+            return HeadlessDialog(action, text)
+        elif action == "Text":
+            return default_text or ""
+        elif action == "Alarm":
+            return int(default_text or 5), 60
+        elif action == "Hour":
+            return "12:00"
+        elif action == "Date":
+            return str(date.today())
+        elif action == "SetCalendar":
+            return "", ""
+        return None
+
+    def submit(self, action, text = None, default_text = None,
+               size = 16, geometry = "400x200", prev_window = None):
+        """
+        Función que registra una GUI y devuelve su respuesta. Ver *Interface.submit*.
+
+        Returns:
+            future (concurrent.futures.Future): Future ya resuelto con la respuesta de la GUI.
+        """
+        if action == "GetCalendar" and not isinstance(text, str):
+            text = "".join(text)                # Texto generado por fragmentos
+        with self.__lock:
+            self.requests.append((action, text, default_text))
+            script = self.answers.get(action)
+            if callable(script):
+                result = script(text, default_text)
+            elif script:
+                result = script.pop(0)
+            else:
+                result = self.default(action, text, default_text)
+
+        future = Future()
+        future.set_result(result)
+        return future
@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+
+from urllib.parse import urlsplit
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from google.auth.transport.requests import Request
+import httplib2
+
+try:
+    import httpx
+    import h2                               # HTTP/2 en *httpx*
+except ImportError:
+    httpx = None
+
+
+class Http():
+
+    """ Clase Http.
+
+    Cliente HTTP compartido por todas las peticiones salientes del asistente. Mantiene un pool de conexiones por servidor
+    con *keep-alive*, de forma que las peticiones sucesivas a un mismo servidor reutilizan la conexión (y la negociación
+    TLS) en lugar de abrir una nueva, y aplica un mismo tiempo máximo (*timeout*) a todas las peticiones que no indican
+    otro.
+
+    Si están instalados *httpx* y *h2* se usa HTTP/2 (varias peticiones simultáneas sobre una misma conexión); si no, se
+    usa *requests* (HTTP/1.1). En ambos casos, las respuestas tienen la misma interfaz (*status_code*, *content*, *text*,
+    *json*, *raise_for_status*).
+
+    Por cada servidor se cuentan las peticiones y las conexiones abiertas (*stats*); su cociente es la tasa de
+    reutilización de conexiones.
+
+    *errors* son los errores de transporte (conexión, plazo, protocolo) del cliente en uso: los de *requests* derivan de
+    *OSError*; los de *httpx*, de *httpx.TransportError*.
+    """
+
+    errors = (OSError,) if httpx is None else (OSError, httpx.TransportError)
+
+    def __init__(self, timeout = 10, pool_size = 10):
+        """
+        Función de inicialización de la clase Http.
+
+        Args:
+            timeout (float, optional): Tiempo máximo por defecto de cada petición en segundos. Defaults to 10.
+            pool_size (int, optional): Conexiones máximas por servidor. Defaults to 10.
+        """
+        self.timeout = timeout
+        self.http2 = httpx is not None
+        self.__stats = {}                   # Servidor -> [peticiones, conexiones]
+        self.__lock = threading.Lock()
+
+        if self.http2:
+            limits = httpx.Limits(max_connections = 10 * pool_size, max_keepalive_connections = pool_size)
+            self.__client = httpx.Client(http2 = True, timeout = timeout, limits = limits, follow_redirects = True)
+        else:
+            self.__client = requests.Session()
+            adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+            adapter.poolmanager.pool_classes_by_scheme = {
+                "http": self.__countingPool(HTTPConnectionPool),
+                "https": self.__countingPool(HTTPSConnectionPool),
+            }
+            self.__client.mount("http://", adapter)
+            self.__client.mount("https://", adapter)
+
+    def __countingPool(self, pool):
+        """
+        Función que devuelve una subclase del pool de *urllib3* que cuenta las conexiones que abre.
+        """
+        http = self
+
+        class CountingPool(pool):
+            def _new_conn(self):
+                http.connection(self.host)
+                return super()._new_conn()
+
+        return CountingPool
+
+    def __trace(self, host):
+        """
+        Función que devuelve la función de *trace* de *httpcore* que cuenta las conexiones que abre *httpx*.
+        """
+        def trace(event, info):
+            if event == "connection.connect_tcp.complete":
+                self.connection(host)
+        return trace
+
+
+#   ******************  Peticiones  ******************
+
+    def request(self, method, url, deadline = None, **kwargs):
+        """
+        Función que realiza una petición HTTP. El tiempo máximo (*timeout*) se aplica a cada operación (conexión, cada
+        lectura...); con *deadline*, además, el cuerpo de la respuesta se lee por trozos y la petición se corta con
+        *TimeoutError* en cuanto se supera el plazo total, aunque el servidor siga enviando datos poco a poco.
+
+        Args:
+            method (str): Método HTTP.
+            url (str): Dirección de la petición.
+            deadline (float, optional): Plazo total de la petición en segundos. Defaults to None.
+            **kwargs: Argumentos de la petición (*params*, *headers*, *data*, *json*, *timeout*...).
+
+        Returns:
+            response: Respuesta de la petición.
+        """
+        host = urlsplit(url).hostname
+        with self.__lock:
+            self.__stats.setdefault(host, [0, 0])[0] += 1
+        kwargs.setdefault("timeout", self.timeout)
+        if self.http2:
+            kwargs["extensions"] = {"trace": self.__trace(host)}
+            if isinstance(kwargs.get("data"), (bytes, str)):       # Cuerpo sin codificar
+                kwargs["content"] = kwargs.pop("data")
+        if deadline is None:
+            return self.__client.request(method, url, **kwargs)
+
+        end = time.monotonic() + deadline
+        if self.http2:
+            response = self.__client.send(self.__client.build_request(method, url, **kwargs), stream = True)
+            chunks = response.iter_bytes()
+        else:
+            response = self.__client.request(method, url, stream = True, **kwargs)
+            chunks = response.iter_content(chunk_size = 64 * 1024)
+        content = bytearray()
+        try:
+            for chunk in chunks:
+                if time.monotonic() > end:
+                    raise TimeoutError("Plazo de %.1f s superado: %s" % (deadline, url))
+                content += chunk
+        finally:
+            response.close()
+        if time.monotonic() > end:
+            raise TimeoutError("Plazo de %.1f s superado: %s" % (deadline, url))
+        response._content = bytes(content)  # Cuerpo ya leído: *content*, *text* y *json* como sin *deadline*
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+#   ******************  Estadísticas  ******************
+
+    def connection(self, host):
+        """
+        Función que cuenta una nueva conexión con un servidor.
+
+        Args:
+            host (str): Servidor.
+        """
+        with self.__lock:
+            self.__stats.setdefault(host, [0, 0])[1] += 1
+
+    def stats(self):
+        """
+        Función que devuelve las estadísticas de reutilización de conexiones por servidor.
+
+        Returns:
+            stats (dict): Servidor -> (peticiones, conexiones, tasa de reutilización).
+        """
+        with self.__lock:
+            return {host: (n, c, 1 - c / n if n else 0.0) for host, (n, c) in self.__stats.items()}
+
+    def report(self):
+        """
+        Función que muestra las estadísticas de reutilización de conexiones por servidor.
+        """
+        print("%-30s %10s %10s %12s" % ("servidor", "peticiones", "conexiones", "reutilizadas"))
+        for host, (n, c, reuse) in sorted(self.stats().items()):
+            print("%-30s %10d %10d %11.0f%%" % (host, n, c, 100 * reuse))
+
+
+class AuthorizedHttp():
+
+    """ Clase AuthorizedHttp.
+
+    Adaptador con la interfaz de *httplib2.Http* que necesita el cliente de las APIs de Google (*googleapiclient*), de
+    forma que las peticiones a la API de Google Calendar se envían por el cliente compartido (*Http*) con las
+    credenciales del usuario, en lugar de abrir su propia conexión con *httplib2*.
+    """
+
+    def __init__(self, http, credentials, breaker = None):
+        """
+        Función de inicialización de la clase AuthorizedHttp.
+
+        Args:
+            http (Http): Cliente HTTP compartido.
+            credentials (google.auth.credentials.Credentials): Credenciales del usuario.
+            breaker (Breaker, optional): Cortacircuitos del servicio, con su plazo máximo. Defaults to None.
+        """
+        self.http = http
+        self.credentials = credentials
+        self.breaker = breaker
+        self.__refresh = Request()          # Renovación de las credenciales
+
+    def request(self, uri, method = "GET", body = None, headers = None, redirections = 5, connection_type = None):
+        """
+        Función que realiza una petición con la interfaz de *httplib2.Http.request*.
+
+        Returns:
+            (httplib2.Response, bytes): Cabeceras y estado de la respuesta, y su contenido.
+        """
+        headers = dict(headers or {})
+        self.credentials.before_request(self.__refresh, method, uri, headers)
+        if self.breaker is not None:
+            response = self.breaker.request(method, uri, data = body, headers = headers)
+        else:
+            response = self.http.request(method, uri, data = body, headers = headers)
+        info = dict(response.headers)
+        info["status"] = response.status_code
+        return httplib2.Response(info), response.content
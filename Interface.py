@@ -0,0 +1,654 @@
+#!/usr/bin/python3
+
+from tkinter import *
+from tkinter import scrolledtext
+from tkinter import font
+from tkcalendar import Calendar
+from PIL import ImageTk
+from datetime import datetime, date
+from concurrent.futures import Future
+import threading
+import queue
+import re
+
+
+class Dialog():
+
+    """ Clase Dialog.
+
+    Ventana (*Toplevel*) reutilizable de la interfaz gráfica. Los widgets de cada tipo de ventana se construyen una única
+    vez; en cada uso sólo se actualizan sus textos y valores (*fill*), se muestra la ventana y, al aceptar, se recogen
+    los valores introducidos por el usuario (*collect*), se resuelve el *future* de la petición y se oculta de nuevo.
+    """
+
+    def __init__(self, root, action, bg, on_accept):
+        """
+        Función de inicialización de la clase Dialog.
+
+        Args:
+            root (tkinter.Tk): Raíz de la interfaz gráfica.
+            action (str): Tipo de ventana.
+            bg (str): Color de fondo de la ventana.
+            on_accept (function): Función a la que se llama al aceptar o cerrar la ventana.
+        """
+        self.action = action
+        self.window = Toplevel(root)
+        self.window.withdraw()
+        self.window.configure(bg = bg)
+        self.window.title("Teodoro " + action)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.accept)  # Cerrar la ventana equivale a aceptar
+        self.on_accept = on_accept
+        self.future = None
+        self.free = False
+        self.fill = lambda text, default_text, size: None
+        self.collect = lambda: None
+        self.extend = lambda text: None
+
+    def accept(self):
+        """
+        Función asociada al botón de aceptar y al cierre de la ventana.
+        """
+        self.on_accept(self)
+
+
+class Interface():
+
+    """ Clase Interface.
+
+    Interfaz gráfica de usuario del sistema. Mantiene una única raíz de Tk durante toda la ejecución y un conjunto de
+    ventanas ya construidas para cada tipo de GUI, que se muestran y ocultan en lugar de crearse y destruirse en cada
+    llamada. La imagen del botón y las fuentes se cargan una única vez.
+
+    El bucle de eventos de Tk se ejecuta en su propio hilo. El resto del sistema, desde cualquier hilo, envía peticiones
+    a través de una cola (*submit*) y recibe un *future* que se resuelve con el resultado de la ventana cuando el
+    usuario la acepta. Así, el bucle principal no se bloquea mientras haya ventanas abiertas y cada petición recibe su
+    propio resultado.
+
+    La ventana *GetCalendar* admite, en lugar de un texto, un generador de fragmentos de texto: la ventana se muestra al
+    instante y los fragmentos se añaden a medida que se generan, desde un hilo aparte, sin bloquear la interfaz.
+
+    La ventana *Image* muestra una imagen ya decodificada (*PIL.Image*, ver *Engine.showImage*) dentro de la propia
+    interfaz, sin archivos temporales ni visores externos.
+    """
+
+    Actions = ["Login", "Status", "Show", "Error", "GetCalendar", "SetCalendar", "Text", "Alarm", "Hour", "Date", "Image"]
+    poll_ms = 10    # Periodo de lectura de la cola de peticiones
+
+#   ******************  __init__  ******************
+
+    def __init__(self):
+        """
+        Función de inicialización de la clase Interface. Se inicia el hilo de la interfaz y se espera a que la raíz de
+        Tk y las ventanas estén construidas.
+        """
+        self.__requests = queue.Queue()
+        self.__ready = threading.Event()
+        self.thread = threading.Thread(target = self.__run, name = "Interface", daemon = True)
+        self.__error = None
+        self.thread.start()
+        self.__ready.wait()
+        if self.__error is not None:
+            raise self.__error
+
+    def __run(self):
+        """
+        Función del hilo de la interfaz. Se crea la raíz de Tk (oculta), se carga la imagen del botón, se construye una
+        ventana de cada tipo y se inicia el bucle de eventos.
+        """
+        try:
+            self.root = Tk()
+            self.root.withdraw()
+            self.__setup()
+        except Exception as e:
+            self.__error = e                # Error de inicialización (por ejemplo, sin pantalla)
+            self.__ready.set()
+            return
+
+        self.__ready.set()
+        self.root.after(self.poll_ms, self.__poll)
+        self.root.mainloop()
+
+    def __setup(self):
+        """
+        Función que carga la imagen del botón y construye una ventana de cada tipo.
+        """
+        self.bg = "gainsboro"
+        self.font1 = "bitstream charter"
+        self.font2 = "Helvetica"
+        self.close_label = "Cierre esta ventana para continuar"
+        self.okImage = PhotoImage(master = self.root, file = "ok.png")
+
+        self.__fonts = {}
+        self.__free = {action: [] for action in self.Actions}
+        for action in self.Actions:
+            self.release(self.__build(action))
+
+    def __poll(self):
+        """
+        Función que atiende, desde el hilo de la interfaz, las peticiones pendientes en la cola.
+        """
+        while True:
+            try:
+                future, handler, args = self.__requests.get_nowait()
+            except queue.Empty:
+                break
+            if future is None:              # Petición sin resultado (*append*)
+                handler(*args)
+            elif future.set_running_or_notify_cancel():
+                try:
+                    handler(future, *args)
+                except Exception as e:
+                    future.set_exception(e)
+        self.root.after(self.poll_ms, self.__poll)
+
+    def font(self, family, size, weight = "normal"):
+        """
+        Función que devuelve una fuente ya cargada.
+
+        Args:
+            family (str): Familia de la fuente.
+            size (int): Tamaño de la fuente.
+            weight (str, optional): Grosor de la fuente. Defaults to "normal".
+
+        Returns:
+            font (tkinter.font.Font): Fuente.
+        """
+        key = (family, size, weight)
+        if key not in self.__fonts:
+            self.__fonts[key] = font.Font(root = self.root, family = family, size = size, weight = weight)
+        return self.__fonts[key]
+
+
+#   ******************  Gestión de ventanas  ******************
+
+    def acquire(self, action):
+        """
+        Función que devuelve una ventana libre del tipo indicado. Si todas están en uso, se construye una nueva.
+
+        Args:
+            action (str): Tipo de ventana.
+
+        Returns:
+            dialog (Dialog): Ventana.
+        """
+        if self.__free[action]:
+            dialog = self.__free[action].pop()
+            dialog.free = False
+            return dialog
+        return self.__build(action)
+
+    def release(self, dialog):
+        """
+        Función que oculta una ventana y la deja disponible para su reutilización.
+
+        Args:
+            dialog (Dialog): Ventana.
+        """
+        dialog.window.withdraw()
+        if not dialog.free:
+            dialog.free = True
+            self.__free[dialog.action].append(dialog)
+
+    def isValidTime(self, time):
+        regex = "^([01]?[0-9]|2[0-3]):[0-5][0-9]$"
+        p = re.compile(regex)
+        if (time == "") :
+            return False
+        m = re.search(p, time)
+        if m is None :
+            return False
+        else :
+            return True
+
+
+#   ******************  GUI  ******************
+
+    def submit(self, action, text = None, default_text = None,
+               size = 16, geometry = "400x200", prev_window = None):
+        """
+        Función que solicita una GUI. Puede llamarse desde cualquier hilo. Ver *Engine.GUI*.
+
+        Args:
+            action (str): Variable que diferencia qué tipo de GUI se desea usar.
+            text (str, optional): Variable para pasar un determinado texto. Defaults to None.
+            default_text (str, optional): Texto por defecto de la GUI. Defaults to None.
+            size (int, optional): Variable para cambiar el tamaño de letra en las interfaces. Defaults to 16.
+            geometry (str, optional): Variable de texto que define el tamaño de la ventana que se genera. Defaults to "400x200".
+            prev_window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
+
+        Returns:
+            future (concurrent.futures.Future): Se resuelve con el resultado de la GUI (la propia ventana en *Status*).
+        """
+        future = Future()
+        self.__requests.put((future, self.__open, (action, text, default_text, size, geometry, prev_window)))
+        return future
+
+    def append(self, dialog, future, text):
+        """
+        Función que añade texto al final de una ventana *GetCalendar*. Puede llamarse desde cualquier hilo. El texto se
+        descarta si la ventana ya no está mostrando la petición *future*.
+
+        Args:
+            dialog (Dialog): Ventana.
+            future (concurrent.futures.Future): Petición a la que pertenece el texto.
+            text (str): Texto.
+        """
+        self.__requests.put((None, self.__append, (dialog, future, text)))
+
+    def __append(self, dialog, future, text):
+        if dialog.future is future:
+            dialog.extend(text)
+
+    def __stream(self, dialog, future, chunks):
+        """
+        Función del hilo que genera los fragmentos de texto de una ventana *GetCalendar* y los envía a la interfaz. Se
+        detiene si el usuario cierra la ventana.
+        """
+        try:
+            for chunk in chunks:
+                if future.done():
+                    return
+                self.append(dialog, future, chunk)
+        except Exception:
+            self.append(dialog, future, "\n   Error al obtener el resto de resultados\n")
+
+    def __open(self, future, action, text, default_text, size, geometry, prev_window):
+        """
+        Función que muestra, desde el hilo de la interfaz, la GUI de una petición.
+        """
+        # Cierre de ventana anterior o acción *Close*
+        if prev_window is not None:
+            self.release(prev_window)
+        if action == "Close":
+            future.set_result(None)
+            return
+
+        dialog = self.acquire(action)
+        dialog.window.geometry(geometry)
+        chunks = None
+        if action == "GetCalendar" and not isinstance(text, str):
+            text, chunks = "", text         # Texto generado por fragmentos
+        dialog.fill(text, default_text, size)
+        dialog.window.deiconify()
+        dialog.window.lift()
+
+        if action == "Status":
+            future.set_result(dialog)
+        else:
+            dialog.future = future
+        if chunks is not None:
+            threading.Thread(target = self.__stream, args = (dialog, future, chunks),
+                             name = "GetCalendar", daemon = True).start()
+
+    def __accept(self, dialog):
+        """
+        Función que, desde el hilo de la interfaz, recoge el resultado de una ventana aceptada y resuelve su *future*.
+
+        Args:
+            dialog (Dialog): Ventana aceptada.
+        """
+        future, dialog.future = dialog.future, None
+        if future is None:                  # Ventana sin petición pendiente (*Status*)
+            self.release(dialog)
+            return
+
+        try:
+            result = dialog.collect()
+            if dialog.action == "Hour" and not self.isValidTime(result):
+                self.__open(Future(), "Show", "Por favor, introduce una\n hora en el formato correcto", None, 16, "400x200", None)
+                dialog.fill("Introduce la hora", None, 16)
+                dialog.future = future      # La misma petición espera a una hora correcta
+                return
+            elif dialog.action == "Date":
+                result = str(datetime.strptime(result, '%d/%m/%y').date())
+        except Exception as e:
+            self.release(dialog)
+            future.set_exception(e)
+            return
+
+        self.release(dialog)
+        future.set_result(result)
+
+
+#   ******************  Construcción de ventanas  ******************
+
+    def __build(self, action):
+        """
+        Función que construye una ventana del tipo indicado.
+
+        Args:
+            action (str): Tipo de ventana.
+
+        Returns:
+            dialog (Dialog): Ventana construida.
+        """
+        dialog = Dialog(self.root, action, self.bg, self.__accept)
+        getattr(self, "_Interface__build_" + action)(dialog)
+        return dialog
+
+    def __ok_button(self, parent, dialog):
+        """
+        Función que añade el botón de aceptar a una ventana.
+        """
+        frame = Frame(parent, bg = self.bg)
+        frame.pack()
+        Button(frame, image = self.okImage, command = dialog.accept).pack(expand = True)
+
+    def __close_label(self, parent, size, pady):
+        """
+        Función que añade la etiqueta de cierre a una ventana.
+        """
+        frame = Frame(parent, bg = self.bg)
+        frame.pack()
+        label = Label(
+            frame,
+            text = self.close_label,
+            font = self.font(self.font2, size, "bold"),
+            padx = 0,
+            pady = pady,
+            bg = self.bg)
+        label.grid(column = 0, row = 2)
+        return label
+
+    def __build_Login(self, dialog):
+        window = dialog.window
+        bg = self.bg
+
+        label = Label(window, padx = 0, pady = 10, bg = bg)
+        label.pack()
+
+        frame1 = Frame(window, bg = bg)
+        frame1.pack()
+
+        name_label = Label(frame1, text = "Nombre de usuario", padx = 10, pady = 5, bg = bg)
+        name_label.grid(row = 0, column = 0, sticky = W)
+        name_entry = Entry(frame1, width = 30)
+        name_entry.grid(row = 0, column = 1, sticky = W)
+
+        pwd_label = Label(frame1, text = "Contraseña", padx = 10, pady = 5, bg = bg)
+        pwd_label.grid(row = 1, column = 0, sticky = W)
+        pwd_entry = Entry(frame1, show = "*", width = 30)
+        pwd_entry.grid(row = 1, column = 1, sticky = W)
+
+        phone = IntVar(self.root)
+        Checkbutton(
+            frame1,
+            text = " Usar funcionalidades móvil",
+            pady = 10,
+            variable = phone).grid(row = 2, column = 1, sticky = W)
+
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+            name_label.configure(font = self.font(self.font1, size-4, "bold"))
+            pwd_label.configure(font = self.font(self.font1, size-4, "bold"))
+            name_entry.configure(font = self.font(self.font1, size-6))
+            pwd_entry.configure(font = self.font(self.font1, size-6))
+            name_entry.delete(0, END)
+            pwd_entry.delete(0, END)
+            if text and default_text:
+                name_entry.insert(0, default_text)
+            phone.set(0)
+
+        dialog.fill = fill
+        dialog.collect = lambda: (str(name_entry.get()), str(pwd_entry.get()), phone.get())
+
+    def __build_Status(self, dialog):
+        label = Label(dialog.window, padx = 0, pady = 0, bg = self.bg)
+        label.pack(expand = True)
+
+        def fill(text, default_text, size):
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+
+        dialog.fill = fill
+
+    def __build_Show(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 25, bg = self.bg)
+        cls_label = Label(
+            window,
+            text = self.close_label,
+            font = self.font(self.font2, 10, "bold"),
+            padx = 0,
+            pady = 0,
+            bg = self.bg)
+        b1 = Button(window, image = self.okImage, command = dialog.accept)
+
+        label.pack(expand = True)
+        cls_label.pack(expand = True)
+        b1.pack(expand = True)
+
+        def fill(text, default_text, size):
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+
+        dialog.fill = fill
+
+    def __build_Error(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 15, bg = self.bg)
+        label.pack()
+        detail = Label(window, padx = 0, pady = 20, bg = self.bg)
+        detail.pack()
+        cls_label = Label(
+            window,
+            text = self.close_label,
+            font = self.font(self.font2, 10, "bold"),
+            padx = 0,
+            pady = 0,
+            bg = self.bg)
+        b1 = Button(window, image = self.okImage, command = dialog.accept)
+
+        cls_label.pack(expand = True)
+        b1.pack(expand = True)
+
+        def fill(text, default_text, size):
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+            detail.configure(text = default_text, font = self.font(self.font1, size-2))
+
+        dialog.fill = fill
+
+    def __build_GetCalendar(self, dialog):
+        window = dialog.window
+
+        label = Label(window, text = "Estos son sus eventos", padx = 0, pady = 20, bg = self.bg)
+        label.pack()
+
+        frame1 = Frame(window, bg = self.bg)
+        frame1.pack()
+        text_area = scrolledtext.ScrolledText(frame1, width = 75, height = 22, wrap = WORD)
+        text_area.grid(column = 0)
+
+        self.__close_label(window, 10, 20)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            label.configure(font = self.font(self.font1, size, "bold"))
+            text_area.configure(font = self.font(self.font1, size-1), state = 'normal')
+            text_area.delete("1.0", END)
+            text_area.insert(INSERT, text)
+            text_area.configure(state = 'disabled')
+
+        def extend(text):
+            text_area.configure(state = 'normal')
+            text_area.insert(END, text)
+            text_area.configure(state = 'disabled')
+
+        dialog.fill = fill
+        dialog.extend = extend
+
+    def __build_Image(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 10, bg = self.bg)
+        label.pack()
+        image_label = Label(window, bg = self.bg)
+        image_label.pack(expand = True)
+
+        self.__close_label(window, 10, 10)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            label.configure(text = text or "", font = self.font(self.font1, size, "bold"))
+            image_label.photo = ImageTk.PhotoImage(default_text, master = self.root)    # Referencia de la imagen
+            image_label.configure(image = image_label.photo)
+
+        dialog.fill = fill
+
+    def __build_SetCalendar(self, dialog):
+        window = dialog.window
+        bg = self.bg
+
+        title = Label(
+            window,
+            text = "¿Quieres añadir una descripción y localización a tu evento?",
+            padx = 10,
+            pady = 30,
+            bg = bg)
+        title.pack()
+
+        frame1 = Frame(window, bg = bg)
+        frame1.pack()
+
+        desc_label = Label(frame1, text = "Descripción", padx = 10, pady = 20, bg = bg)
+        desc_label.grid(row = 0, column = 0, sticky = W)
+        desc_entry = scrolledtext.ScrolledText(frame1, width = 50, height = 10, wrap = WORD)
+        desc_entry.grid(row = 0, column = 1, sticky = W)
+
+        loc_label = Label(frame1, text = "Localización", padx = 10, pady = 20, bg = bg)
+        loc_label.grid(row = 1, column = 0, sticky = W)
+        loc_entry = Entry(frame1, width = 50)
+        loc_entry.grid(row = 1, column = 1, sticky = W)
+
+        self.__close_label(window, 10, 5)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            for widget in (title, desc_label, loc_label):
+                widget.configure(font = self.font(self.font1, size, "bold"))
+            desc_entry.configure(font = self.font(self.font1, size-6))
+            loc_entry.configure(font = self.font(self.font1, size-6))
+            desc_entry.delete("1.0", END)
+            loc_entry.delete(0, END)
+
+        dialog.fill = fill
+        dialog.collect = lambda: (desc_entry.get("1.0", "end-1c"), str(loc_entry.get()))
+
+    def __build_Text(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 10, bg = self.bg)
+        label.pack()
+
+        frame1 = Frame(window, bg = self.bg, pady = 15)
+        frame1.pack()
+        text_entry = Entry(frame1, width = 50)
+        text_entry.grid(row = 1, column = 0, sticky = W)
+
+        cls_label = self.__close_label(window, 10, 10)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            if text == None:
+                text = "Introduce aquí el texto"
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+            cls_label.configure(font = self.font(self.font2, size-6, "bold"))
+            text_entry.configure(font = self.font(self.font1, size-6), show = "*" if text == "secret" else "")
+            text_entry.delete(0, END)
+            if default_text:
+                text_entry.insert(0, default_text)
+
+        dialog.fill = fill
+        dialog.collect = lambda: str(text_entry.get())
+
+    def __build_Alarm(self, dialog):
+        window = dialog.window
+
+        label = Label(window, text = "Introduce aquí el texto", padx = 0, pady = 10, bg = self.bg)
+        label.pack()
+
+        frame1 = LabelFrame(window, text = "Tiempo", padx = 10, pady = 10, bg = self.bg)
+        frame1.pack()
+        text_entry = Entry(frame1, width = 10)
+        text_entry.grid(row = 0, column = 0, sticky = W)
+
+        var = IntVar(self.root)
+        Radiobutton(frame1, text="Segundos", variable=var, value=1).grid(row=0, column=1)
+        Radiobutton(frame1, text="Minutos", variable=var, value=60).grid(row=0, column=2)
+        Radiobutton(frame1, text="Horas", variable=var, value=3600).grid(row=0, column=3)
+
+        cls_label = self.__close_label(window, 10, 10)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            label.configure(font = self.font(self.font1, size, "bold"))
+            cls_label.configure(font = self.font(self.font2, size-6, "bold"))
+            text_entry.configure(font = self.font(self.font1, size-6))
+            text_entry.delete(0, END)
+            if default_text:
+                text_entry.insert(0, default_text)
+            var.set(60)
+
+        dialog.fill = fill
+        dialog.collect = lambda: (int(text_entry.get()), int(var.get()))
+
+    def __build_Hour(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 10, bg = self.bg)
+        label.pack()
+
+        frame1 = Frame(window, bg = self.bg, pady = 5)
+        frame1.pack()
+        hours_label = Label(frame1, text = "Horas", padx = 10, pady = 2)
+        hours_label.grid(row = 1, column = 1)
+        minutes_label = Label(frame1, text = "Minutos", padx = 5, pady = 2)
+        minutes_label.grid(row = 1, column = 2)
+
+        hour = StringVar(self.root)
+        minute = StringVar(self.root)
+        hour_entry = Entry(frame1, textvariable = hour, bg = "#48C9B0", width = 5)
+        hour_entry.grid(row = 2, column = 1)
+        minute_entry = Entry(frame1, textvariable = minute, bg = "#48C9B0", width = 5)
+        minute_entry.grid(row = 2, column = 2)
+
+        cls_label = self.__close_label(window, 10, 10)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            if text == None:
+                text = "Introduce la hora"
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+            hours_label.configure(font = self.font(self.font1, size-5))
+            minutes_label.configure(font = self.font(self.font1, size-5))
+            hour_entry.configure(font = self.font(self.font1, size-6))
+            minute_entry.configure(font = self.font(self.font1, size-6))
+            cls_label.configure(font = self.font(self.font2, size-6, "bold"))
+            hour.set("")
+            minute.set("")
+
+        dialog.fill = fill
+        dialog.collect = lambda: hour.get() + ":" + minute.get()
+
+    def __build_Date(self, dialog):
+        window = dialog.window
+
+        label = Label(window, padx = 0, pady = 10, bg = self.bg)
+        label.pack()
+
+        cal = Calendar(window, selectmode = 'day')
+        cal.pack()
+
+        cls_label = self.__close_label(window, 10, 10)
+        self.__ok_button(window, dialog)
+
+        def fill(text, default_text, size):
+            label.configure(text = text, font = self.font(self.font1, size, "bold"))
+            cls_label.configure(font = self.font(self.font2, size-6, "bold"))
+            cal.selection_set(date.today())
+
+        dialog.fill = fill
+        dialog.collect = lambda: cal.get_date()
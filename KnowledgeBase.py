@@ -0,0 +1,342 @@
+#!/usr/bin/python3
+
+from Matcher import Matcher
+from MediaCache import MediaCache
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from bson.errors import BSONError
+import gridfs
+import logging
+import threading
+import time
+import bson
+import zlib
+import os
+
+
+class KnowledgeBase():
+
+    """ Clase KnowledgeBase.
+
+    Clase que contiene la conexión con la base de conocimiento en MongoDB y la extracción de la información básica
+    necesaria para el funcionamiento del sistema. La utilizan tanto el asistente (*Teodoro*) como el modo servidor
+    (*Server*), de forma que un único cliente de MongoDB, con su propio pool de conexiones, puede compartirse entre
+    todas las sesiones de un mismo proceso.
+
+    La información básica (colecciones *General* y *Applications*) se guarda en una copia local en BSON comprimido
+    (*snapshotFile*) junto con su versión. En los siguientes arranques se carga desde disco y se comprueba en segundo
+    plano si la versión de la base de conocimiento ha cambiado; sólo en ese caso se vuelve a descargar. La versión es el
+    campo *version* del documento {"_id": "KnowledgeBase"} de la colección *Meta* o, si no existe, el resumen (*dbHash*)
+    que calcula MongoDB de ambas colecciones.
+
+    Los comandos (*Commands*) se vigilan durante la ejecución (*watchCommands*): cuando cambian en la base de
+    conocimiento, se descargan sólo los grupos modificados y se sustituye el reconocedor de funcionalidades sin reiniciar.
+    Sin *change streams* se consulta la versión periódicamente y, si cambia, se actualiza toda la información básica.
+    """
+
+    snapshotFile = ".knowledgeBase.bson"
+
+#   ******************  Conexión con la Base de Conocimiento  ******************
+
+    def connectKnowledgeBase(self, mongo_key, maxPoolSize = 100):
+        """
+        Función que inicializa la conexión con la base de conocimiento.
+
+        Args:
+            mongo_key (str): URL de acceso a la base de conocimiento en MongoDB.
+            maxPoolSize (int, optional): Número máximo de conexiones del pool del cliente. Defaults to 100.
+        """
+        self.client = MongoClient(mongo_key, maxPoolSize = maxPoolSize)
+        self.db = self.client.KnowledgeBase
+        self.fs = gridfs.GridFS(self.db)
+        self.media = MediaCache(self.fs)
+
+
+#   ******************  Copia local de la Base de Conocimiento  ******************
+
+    def knowledgeBaseVersion(self):
+        """
+        Función que obtiene la versión de la información básica de la base de conocimiento sin descargarla.
+
+        Returns:
+            version: Versión de la información básica, o None si no se puede obtener.
+        """
+        meta = self.db["Meta"].find_one({"_id": "KnowledgeBase"}, {"version": 1})
+        if meta is not None and "version" in meta:
+            return meta["version"]
+        try:
+            return self.db.command("dbHash", collections = ["General", "Applications"])["md5"]
+        except PyMongoError:        # Sin permiso para *dbHash*
+            return None
+
+    def fetchKnowledgeBase(self):
+        """
+        Función que descarga la información básica de la base de conocimiento. Los documentos de cada colección se
+        combinan en uno solo, de forma que no importa su orden ni en qué documento está cada campo.
+
+        Returns:
+            data (dict): Contenido de las colecciones *General* y *Applications*.
+        """
+        data = {"General": {}, "Applications": {}}
+        for collection in data:
+            for element in self.db[collection].find({}, {"_id": 0}):
+                data[collection].update(element)
+        return data
+
+    def loadSnapshot(self):
+        """
+        Función que carga la copia local de la información básica. La copia sólo contiene datos (BSON), de forma que
+        leerla nunca ejecuta código aunque el archivo haya sido modificado.
+
+        Returns:
+            (tuple): Versión y contenido de la copia local, o None si no existe o no es válida.
+        """
+        try:
+            with open(self.snapshotFile, "rb") as f:
+                snapshot = bson.decode(zlib.decompress(f.read()))
+            return snapshot["version"], snapshot["data"]
+        except (OSError, zlib.error, BSONError, KeyError, TypeError):
+            return None
+
+    def saveSnapshot(self, version, data):
+        """
+        Función que guarda la copia local de la información básica. Se escribe en un archivo temporal que después
+        reemplaza al anterior, para que nunca quede una copia a medio escribir.
+
+        Args:
+            version: Versión de la información básica.
+            data (dict): Contenido de las colecciones *General* y *Applications*.
+        """
+        tmp = self.snapshotFile + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(bson.encode({"version": version, "data": data})))
+        os.replace(tmp, self.snapshotFile)
+
+    def refreshKnowledgeBase(self, version, default_name):
+        """
+        Función que comprueba si la versión de la base de conocimiento ha cambiado respecto a la copia local y, en ese
+        caso, descarga de nuevo la información básica, la aplica y actualiza la copia local. Si no se puede obtener la
+        versión, se descarga siempre. Si la base de conocimiento no responde, se mantiene la copia local.
+
+        Args:
+            version: Versión de la copia local.
+            default_name (str): El nombre del asistente por defecto del sistema.
+
+        Returns:
+            (bool): True si se ha actualizado la información básica.
+        """
+        try:
+            current = self.knowledgeBaseVersion()
+            if current is not None and current == version:
+                return False
+            data = self.fetchKnowledgeBase()
+        except PyMongoError:
+            return False
+        if self.applyKnowledgeBase(data, default_name) == -1:
+            return False
+        self.saveSnapshot(current, data)
+        self.knowledgeVersion = current
+        return True
+
+
+#   ******************  Actualización de los comandos  ******************
+
+    def watchCommands(self, interval = 30, default_name = "Teodoro"):
+        """
+        Función que inicia el hilo de vigilancia de los comandos de la base de conocimiento. Si MongoDB admite *change
+        streams* (conjunto de réplicas), se reciben los cambios de la colección *General* al instante; si no, se consulta
+        la versión cada *interval* segundos y, si ha cambiado, se actualiza toda la información básica y la copia local
+        (*refreshKnowledgeBase*). Si no se puede obtener la versión, no se actualiza nada.
+
+        Args:
+            interval (int, optional): Periodo en segundos de consulta de la versión. Defaults to 30.
+            default_name (str, optional): El nombre del asistente por defecto del sistema. Defaults to "Teodoro".
+        """
+        threading.Thread(target = self.__watch, args = (interval, default_name),
+                         name = "Commands", daemon = True).start()
+
+    def __watch(self, interval, default_name):
+        try:
+            with self.db["General"].watch(full_document = "updateLookup") as stream:
+                for change in stream:
+                    fields = change.get("updateDescription", {}).get("updatedFields", {})
+                    removed = change.get("updateDescription", {}).get("removedFields", [])
+                    groups = {field.split(".")[1] for field in list(fields) + removed if field.startswith("Commands.")}
+                    if "Commands" in fields or "Commands" in removed or change["operationType"] != "update":
+                        self.reloadCommands()
+                    elif groups:
+                        self.reloadCommands(groups)
+        except PyMongoError:        # Sin *change streams*: consulta periódica de la versión
+            pass
+
+        while True:
+            time.sleep(interval)
+            try:
+                version = self.knowledgeBaseVersion()
+                if version is None or version == self.knowledgeVersion:     # Versión desconocida o sin cambios
+                    continue
+                start = time.perf_counter()
+                if self.refreshKnowledgeBase(self.knowledgeVersion, default_name):
+                    logging.getLogger("KnowledgeBase").info("Base de conocimiento actualizada en %.1f ms",
+                                                            1000 * (time.perf_counter() - start))
+            except PyMongoError:
+                pass
+
+    def reloadCommands(self, groups = None):
+        """
+        Función que descarga los comandos de la base de conocimiento y sustituye el reconocedor de funcionalidades. Sólo
+        se compilan de nuevo los grupos que han cambiado; el nuevo reconocedor se asigna de una sola vez, por lo que las
+        peticiones en curso no se bloquean. El tiempo de actualización se registra en el log.
+
+        La copia local conserva su versión: como sólo se actualizan los comandos, en el siguiente arranque se comprueba
+        la versión y se descarga el resto de la información básica si ha cambiado.
+
+        Args:
+            groups (set, optional): Grupos de comandos modificados. Por defecto, se descargan todos. Defaults to None.
+
+        Returns:
+            changed (list): Grupos de comandos actualizados.
+        """
+        start = time.perf_counter()
+        if groups is None:
+            projection = {"Commands": 1, "_id": 0}
+        else:
+            projection = dict({"Commands." + group: 1 for group in groups}, _id = 0)
+
+        fetched = {}
+        for element in self.db["General"].find({"Commands": {"$exists": True}}, projection):
+            fetched.update(element["Commands"])
+        if groups is None:
+            if not fetched:         # Sin comandos se mantienen los anteriores
+                return []
+            Commands = fetched
+        else:
+            Commands = dict(self.Commands)
+            for group in groups:
+                if group in fetched:
+                    Commands[group] = fetched[group]
+                else:
+                    Commands.pop(group, None)
+
+        matcher = Matcher(Commands, self.matcher)
+        self.Commands, self.matcher = Commands, matcher
+        elapsed = time.perf_counter() - start
+
+        if matcher.changed:
+            snapshot = self.loadSnapshot()
+            if snapshot is not None:
+                snapshot[1]["General"]["Commands"] = Commands
+                self.saveSnapshot(snapshot[0], snapshot[1])
+            logging.getLogger("KnowledgeBase").info("Comandos actualizados (%s) en %.1f ms",
+                                                    ", ".join(matcher.changed), 1000 * elapsed)
+        return matcher.changed
+
+
+#   ******************  Extracción de información básica de la Base de Conocimiento  ******************
+
+    def ExtractKnowledgeBase(self, default_name):
+        """
+        Función que extrae la información básica de la base de conocimiento para el correcto funcionamiento del sistema.
+        Si existe una copia local, se usa directamente y se comprueba su versión en segundo plano (*refreshKnowledgeBase*),
+        de forma que el asistente arranca aunque la base de conocimiento tarde en responder. Si no existe, se descarga y se
+        guarda la copia local.
+
+        Args:
+            default_name (str): El nombre del asistente por defecto del sistema.
+
+        Returns:
+            response (int): Variable de verificación de ejecución correcta.
+        """
+        snapshot = self.loadSnapshot()
+        if snapshot is None:
+            version = self.knowledgeBaseVersion()
+            data = self.fetchKnowledgeBase()
+            response = self.applyKnowledgeBase(data, default_name)
+            if response != -1:
+                self.saveSnapshot(version, data)
+            self.knowledgeVersion = version
+            return response
+
+        version, data = snapshot
+        response = self.applyKnowledgeBase(data, default_name)
+        self.knowledgeVersion = version
+        threading.Thread(target = self.refreshKnowledgeBase, args = (version, default_name),
+                         name = "KnowledgeBase", daemon = True).start()
+        return response
+
+    def applyKnowledgeBase(self, data, default_name):
+        """
+        Función que asigna la información básica de la base de conocimiento a los atributos del sistema.
+        En concreto, la información de las colecciones:
+            - *General*:
+                > *Names*. Si no existe, el programa pone como nombre por defecto "Teodoro".
+                > *Days*. Si no existe, funcionalidad *Today* no disponible.
+                > *Months*. Si no existe, funcionalidades *Today*, *getCalendar* y *setCalendar* no disponibles.
+                > *Numbers*. Si no existe, funcionalidades *Reminder*, *Math*, *getCalendar* y *setCalendar* no disponibles.
+                > *Commands*. Si no existe, se termina la ejecución del programa.
+            - *Applications*:
+                > *SpotifyActions*. Si no existe, funcionalidades relacionadas con Spotify no disponibles.
+                > *MathOperations*. Si no existe, funcionalidad *Math* no disponible.
+
+        Con los comandos se construye el reconocedor de funcionalidades (*matcher*).
+
+        Args:
+            data (dict): Contenido de las colecciones *General* y *Applications*.
+            default_name (str): El nombre del asistente por defecto del sistema.
+
+        Returns:
+            response (int): Variable de verificación de ejecución correcta.
+        """
+        common = data["General"]
+        applications = data["Applications"]
+
+        # Commands
+        if "Commands" not in common:
+            return -1
+        self.Commands = common["Commands"]
+        self.matcher = Matcher(self.Commands, getattr(self, "matcher", None))
+
+        # Names
+        if "Names" in common:
+            self.Names = common["Names"]
+        else:
+            self.Names = default_name
+
+        response = 0 # Por defecto, no hay ningún fallo en la Base de Conocimiento
+
+        # Days and Months
+        time = common.get("Time", {})
+        if "Days" in time:
+            self.Days = {str(i+1): day for i, day in enumerate(time["Days"])}
+        else:
+            self.Days = None
+            response = 1
+        if "Months" in time:
+            self.Months = {str(i+1): month for i, month in enumerate(time["Months"])}
+        else:
+            self.Months = None
+            response = 2
+
+        # Numbers
+        if "Numbers" in common:
+            self.Numbers = common["Numbers"]
+        else:
+            self.Numbers = None
+            response = 3
+
+        # Spotify Actions
+        if "SpotifyActions" in applications:
+            self.SpotifyActions = applications["SpotifyActions"]
+        else:
+            self.SpotifyActions = None
+            response = 4
+
+        # Math Operations
+        if "MathOperations" in applications:
+            self.MathOperations = applications["MathOperations"]
+        else:
+            self.MathOperations = None
+            response = 5
+
+        return response
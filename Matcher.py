@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+
+import re
+
+
+class Matcher():
+
+    """ Clase Matcher.
+
+    Clase que contiene la lógica de reconocimiento de la funcionalidad (*intent*) asociada a una petición del usuario.
+    Las frases de activación de cada funcionalidad se extraen de la colección *General* de la base de conocimiento
+    (*Commands*) y se compilan una única vez en una expresión regular por funcionalidad. El orden de comprobación es el
+    mismo que el de la red de if-elif-else de *getAction*, por lo que la prioridad entre funcionalidades se mantiene.
+
+    Una instancia de esta clase no se modifica tras su creación, de modo que puede compartirse entre varios hilos o
+    sesiones sin necesidad de bloqueos. Para actualizar los comandos se construye una nueva instancia a partir de la
+    anterior (*previous*), que sólo compila los grupos que han cambiado, y se sustituye la referencia de una sola vez.
+    """
+
+    # Orden de prioridad de las funcionalidades (mismo orden que *getAction*)
+    Intents = ["Name", "Greetings", "Cheer up", "Secret", "Today", "Time", "Users", "NewInformation", "Information",
+               "DelInformation", "ChgInformation", "ChangeVoice", "Google", "Wikipedia", "Youtube", "Play", "Next",
+               "Previous", "Pause", "Stop", "Song", "Weather", "Alarms", "CancelAlarm", "Alarm", "Reminder", "Math", "Phone", "EmergencyCall",
+               "GetCalendar", "SetCalendar", "Shutdown", "Suspend", "Restart", "Nothing", "Del"]
+
+#   ******************  __init__  ******************
+
+    def __init__(self, Commands, previous = None):
+        """
+        Función de inicialización de la clase Matcher. Se compila una expresión regular por cada grupo de comandos. Los
+        grupos que no han cambiado respecto al reconocedor anterior reutilizan su expresión regular.
+
+        Args:
+            Commands (dict): Diccionario de las frases de activación de cada funcionalidad.
+            previous (Matcher, optional): Reconocedor anterior. Defaults to None.
+        """
+        self.Commands = Commands
+        self.patterns = {}
+        self.changed = []       # Grupos compilados de nuevo respecto al reconocedor anterior
+        for intent in self.Intents:
+            if intent in Commands and Commands[intent]:
+                if previous is not None and intent in previous.patterns and previous.Commands[intent] == Commands[intent]:
+                    self.patterns[intent] = previous.patterns[intent]
+                else:
+                    self.patterns[intent] = self.compile(Commands[intent])
+                    self.changed.append(intent)
+            elif previous is not None and intent in previous.patterns:
+                self.changed.append(intent)
+
+    @staticmethod
+    def compile(phrases):
+        """
+        Función que compila una lista de frases de activación en una única expresión regular de búsqueda literal.
+
+        Args:
+            phrases (list): Lista de frases de activación.
+
+        Returns:
+            pattern (re.Pattern): Expresión regular compilada.
+        """
+        return re.compile("|".join(re.escape(phrase) for phrase in phrases))
+
+
+#   ******************  Reconocimiento de funcionalidad  ******************
+
+    def match(self, query):
+        """
+        Función que devuelve la funcionalidad asociada a una petición del usuario.
+
+        Args:
+            query (str): Cadena de texto que contiene la petición del usuario.
+
+        Returns:
+            intent (str): Nombre de la funcionalidad reconocida o None si no se reconoce ninguna.
+        """
+        for intent, pattern in self.patterns.items():
+            if pattern.search(query):
+                return intent
+        return None
+
+    def remainder(self, intent, query):
+        """
+        Función que devuelve el texto de una petición que sigue a la frase de activación de una funcionalidad, es decir,
+        los datos de la petición ("pon un recordatorio *cada lunes a las nueve*").
+
+        Args:
+            intent (str): Nombre de la funcionalidad.
+            query (str): Cadena de texto que contiene la petición del usuario.
+
+        Returns:
+            remainder (str): Texto tras la frase de activación, o la petición completa si no contiene ninguna.
+        """
+        pattern = self.patterns.get(intent)
+        match = pattern.search(query) if pattern is not None else None
+        return query[match.end():] if match else query
@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+
+from collections import OrderedDict
+import threading
+import base64
+import json
+import os
+
+
+class MediaCache():
+
+    """ Clase MediaCache.
+
+    Caché en disco de los archivos de GridFS (foto del usuario, audio de la llamada de emergencia...). Los archivos se
+    guardan ya decodificados y direccionados por contenido: el nombre en disco es el identificador del archivo en GridFS
+    junto con su md5 (o su fecha de subida, si GridFS no calcula el md5), de forma que un archivo que cambia en la base de
+    conocimiento nunca se confunde con su versión anterior.
+
+    Un índice (*index.json*) relaciona el nombre de cada archivo en GridFS con su entrada en la caché, por lo que los
+    archivos ya descargados se sirven sin consultar la base de conocimiento ni decodificarlos, incluso sin conexión. El
+    índice se actualiza al precargar los archivos (*prime*), que se hace en segundo plano al iniciar sesión.
+
+    El tamaño total está limitado (*max_bytes*): al superarlo se eliminan las entradas usadas hace más tiempo (LRU).
+
+    Los archivos de GridFS pueden estar guardados en base64 (formato original) o en binario, con {"encoding": "raw"} en
+    sus metadatos (ver *Migrate*). Ambos formatos se leen por trozos (*stream*), sin tener en memoria a la vez el archivo
+    completo y su copia decodificada.
+    """
+
+    def __init__(self, fs, directory = ".mediaCache", max_bytes = 64 * 1024 * 1024):
+        """
+        Función de inicialización de la clase MediaCache. Se cargan el índice y las entradas que ya hay en disco.
+
+        Args:
+            fs (gridfs.GridFS): GridFS de la base de conocimiento.
+            directory (str, optional): Directorio de la caché. Defaults to ".mediaCache".
+            max_bytes (int, optional): Tamaño máximo de la caché en bytes. Defaults to 64 MB.
+        """
+        self.fs = fs
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.__lock = threading.RLock()
+        self.__size = 0
+        self.__entries = OrderedDict()      # Entrada -> tamaño, de la usada hace más tiempo a la más reciente
+        self.__index = {}                   # Nombre en GridFS -> entrada
+
+        os.makedirs(directory, exist_ok = True)
+        files = [f for f in os.scandir(directory) if f.is_file() and not f.name.endswith((".json", ".tmp"))]
+        for f in sorted(files, key = lambda f: f.stat().st_mtime):
+            self.__entries[f.name] = f.stat().st_size
+            self.__size += f.stat().st_size
+        try:
+            with open(os.path.join(directory, "index.json")) as f:
+                self.__index = {k: v for k, v in json.load(f).items() if v in self.__entries}
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(grid_out):
+        """
+        Función que devuelve la entrada de la caché de un archivo de GridFS.
+
+        Args:
+            grid_out (gridfs.GridOut): Archivo de GridFS.
+        """
+        version = grid_out.md5 or grid_out.upload_date.strftime("%Y%m%d%H%M%S%f")
+        return "%s_%s" % (grid_out._id, version)
+
+    @staticmethod
+    def encoding(grid_out):
+        """
+        Función que devuelve el formato de un archivo de GridFS: "raw" (binario) o "base64".
+
+        Args:
+            grid_out (gridfs.GridOut): Archivo de GridFS.
+        """
+        return (grid_out.metadata or {}).get("encoding", "base64")
+
+    @staticmethod
+    def stream(grid_out):
+        """
+        Función que lee un archivo de GridFS trozo a trozo (*chunks* de GridFS) y devuelve su contenido decodificado. En
+        base64 sólo se guardan entre trozos los caracteres que no completan un grupo de 4.
+
+        Args:
+            grid_out (gridfs.GridOut): Archivo de GridFS.
+
+        Yields:
+            piece (memoryview): Siguiente trozo del contenido decodificado.
+        """
+        raw = MediaCache.encoding(grid_out) == "raw"
+        rest = b""
+        while True:
+            chunk = grid_out.readchunk()
+            if not chunk:
+                break
+            if raw:
+                yield memoryview(chunk)
+                continue
+            data = rest + chunk.translate(None, b" \t\r\n")
+            cut = len(data) - len(data) % 4
+            rest = data[cut:]
+            if cut:
+                yield memoryview(base64.b64decode(data[:cut]))
+        if rest:
+            yield memoryview(base64.b64decode(rest))
+
+
+#   ******************  Lectura  ******************
+
+    def get(self, filename):
+        """
+        Función que devuelve el contenido decodificado de un archivo. Si está en la caché, se lee de disco; si no, se
+        descarga de GridFS y se guarda.
+
+        Args:
+            filename (str): Nombre del archivo en GridFS.
+
+        Returns:
+            data (bytes): Contenido del archivo, o None si no existe.
+        """
+        with self.__lock:
+            key = self.__index.get(filename)
+            if key is not None:
+                try:
+                    path = os.path.join(self.directory, key)
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    os.utime(path)                      # El orden LRU se conserva entre ejecuciones
+                    self.__entries.move_to_end(key)
+                    return data
+                except OSError:                 # Eliminada fuera del asistente
+                    self.__forget(key)
+        path = self.fetch(filename)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def entry(self, filename):
+        """
+        Función que devuelve la entrada de la caché de un archivo ya descargado (ver *key*), o None si no está en la
+        caché. Sirve como identificador del contenido, por ejemplo para cachear su miniatura.
+
+        Args:
+            filename (str): Nombre del archivo en GridFS.
+        """
+        with self.__lock:
+            return self.__index.get(filename)
+
+    def open(self, filename):
+        """
+        Función que abre un archivo de la caché para leerlo por trozos (reproducción, visualización...). Si no está en
+        la caché, se descarga de GridFS.
+
+        Args:
+            filename (str): Nombre del archivo en GridFS.
+
+        Returns:
+            file (file): Archivo binario abierto, o None si no existe.
+        """
+        with self.__lock:
+            key = self.__index.get(filename)
+            if key is not None:
+                try:
+                    path = os.path.join(self.directory, key)
+                    f = open(path, "rb")
+                    os.utime(path)
+                    self.__entries.move_to_end(key)
+                    return f
+                except OSError:
+                    self.__forget(key)
+        path = self.fetch(filename)
+        return None if path is None else open(path, "rb")
+
+    def fetch(self, filename):
+        """
+        Función que descarga un archivo de GridFS y lo guarda en la caché. Si la versión en GridFS ya está en la caché,
+        no se descarga de nuevo. El contenido se escribe en disco a medida que se decodifica (*stream*).
+
+        Args:
+            filename (str): Nombre del archivo en GridFS.
+
+        Returns:
+            path (str): Ruta del archivo en la caché, o None si no existe.
+        """
+        grid_out = self.fs.find_one({"filename": filename})
+        if grid_out is None:
+            return None
+        key = self.key(grid_out)
+        path = os.path.join(self.directory, key)
+        with self.__lock:
+            if key in self.__entries:
+                self.__index[filename] = key
+                self.__entries.move_to_end(key)
+                self.__saveIndex()
+                return path
+
+        tmp = "%s.%d.tmp" % (path, threading.get_ident())
+        size = 0
+        with open(tmp, "wb") as f:
+            for piece in self.stream(grid_out):
+                size += f.write(piece)
+        with self.__lock:
+            os.replace(tmp, path)
+            old = self.__index.get(filename)
+            self.__index[filename] = key
+            if old is not None and old != key:              # Versión anterior del mismo archivo
+                self.__forget(old)
+            if key not in self.__entries:
+                self.__entries[key] = size
+                self.__size += size
+            self.__evict()
+            self.__saveIndex()
+        return path
+
+    def prime(self, filenames):
+        """
+        Función que precarga en segundo plano varios archivos en la caché, comprobando su versión en GridFS.
+
+        Args:
+            filenames (list): Nombres de los archivos en GridFS.
+        """
+        def run():
+            for filename in filenames:
+                try:
+                    self.fetch(filename)
+                except Exception:
+                    pass
+        threading.Thread(target = run, name = "MediaCache", daemon = True).start()
+
+
+#   ******************  Gestión de la caché  ******************
+
+    def __forget(self, key):
+        """
+        Función que elimina una entrada de la caché y de disco.
+        """
+        self.__size -= self.__entries.pop(key, 0)
+        for name in [k for k, v in self.__index.items() if v == key]:
+            del self.__index[name]
+        try:
+            os.remove(os.path.join(self.directory, key))
+        except OSError:
+            pass
+
+    def __evict(self):
+        """
+        Función que elimina las entradas usadas hace más tiempo hasta que la caché no supera *max_bytes*. La entrada más
+        reciente se mantiene siempre.
+        """
+        while self.__size > self.max_bytes and len(self.__entries) > 1:
+            self.__forget(next(iter(self.__entries)))
+
+    def __saveIndex(self):
+        """
+        Función que guarda el índice de la caché.
+        """
+        path = os.path.join(self.directory, "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.__index, f)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+from KnowledgeBase import KnowledgeBase
+from MediaCache import MediaCache
+
+from pymongo import UpdateOne
+from datetime import datetime
+from time import perf_counter
+import tracemalloc
+import argparse
+import base64
+
+
+def migrateMedia(fs, dry_run = False):
+    """
+    Función que reescribe en binario los archivos de GridFS guardados en base64. Cada archivo se copia trozo a trozo en
+    uno nuevo con el mismo nombre, tipo y metadatos, más {"encoding": "raw"}, y después se elimina el original. Mientras
+    dura la migración, los lectores (*MediaCache*) aceptan ambos formatos.
+
+    Args:
+        fs (gridfs.GridFS): GridFS de la base de conocimiento.
+        dry_run (bool, optional): Flag para sólo listar los archivos que se migrarían. Defaults to False.
+
+    Returns:
+        saved (int): Bytes ahorrados en GridFS.
+    """
+    saved = 0
+    for grid_out in fs.find():
+        if MediaCache.encoding(grid_out) == "raw":
+            continue
+        if dry_run:
+            print("%-30s %10d bytes (base64)" % (grid_out.filename, grid_out.length))
+            continue
+
+        metadata = dict(grid_out.metadata or {}, encoding = "raw")
+        options = {"filename": grid_out.filename, "metadata": metadata}
+        if grid_out.content_type is not None:
+            options["contentType"] = grid_out.content_type
+        with fs.new_file(**options) as grid_in:
+            for piece in MediaCache.stream(grid_out):
+                grid_in.write(bytes(piece))
+        fs.delete(grid_out._id)                 # El nuevo archivo ya está completo
+
+        saved += grid_out.length - grid_in.length
+        print("%-30s %10d -> %10d bytes" % (grid_out.filename, grid_out.length, grid_in.length))
+    return saved
+
+
+def migrateReminders(db, dry_run = False):
+    """
+    Función que añade la fecha de vencimiento (*due*) a los recordatorios creados antes de que existiera, a partir de
+    sus campos *día* y *hora*, en una única operación. Se ejecuta una sola vez: el asistente sólo carga los
+    recordatorios con *due*.
+
+    Args:
+        db (pymongo.database.Database): Base de conocimiento.
+        dry_run (bool, optional): Flag para sólo listar los recordatorios que se migrarían. Defaults to False.
+
+    Returns:
+        migrated (int): Número de recordatorios migrados.
+    """
+    updates = []
+    for rem in db["Reminders"].find({"due": {"$exists": False}}, {"nombre": 1, "día": 1, "hora": 1}):
+        try:
+            due = datetime.strptime(rem["día"] + " " + rem["hora"], "%Y-%m-%d %H:%M")
+        except (KeyError, TypeError, ValueError):
+            print("%-30s sin fecha válida" % rem.get("nombre"))
+            continue
+        print("%-30s %s" % (rem.get("nombre"), due))
+        updates.append(UpdateOne({"_id": rem["_id"]}, {"$set": {"due": due}}))
+    if updates and not dry_run:
+        db["Reminders"].bulk_write(updates, ordered = False)
+    return len(updates)
+
+
+def measureMedia(fs, filename):
+    """
+    Función que mide, para un archivo de GridFS, el pico de memoria y el tiempo hasta el primer byte decodificado de la
+    lectura completa (*read* y *b64decode*, como antes de *MediaCache*) y de la lectura por trozos (*stream*).
+
+    Args:
+        fs (gridfs.GridFS): GridFS de la base de conocimiento.
+        filename (str): Nombre del archivo en GridFS.
+
+    Returns:
+        results (dict): Pico de memoria (bytes) y tiempo hasta el primer byte (segundos) de cada lectura.
+    """
+    def full(grid_out):
+        data = grid_out.read()
+        if MediaCache.encoding(grid_out) != "raw":
+            data = base64.b64decode(data)
+        yield memoryview(data)
+
+    results = {}
+    for name, reader in (("read", full), ("stream", MediaCache.stream)):
+        grid_out = fs.find_one({"filename": filename})
+        tracemalloc.start()
+        start = perf_counter()
+        ttfb = None
+        size = 0
+        for piece in reader(grid_out):
+            if ttfb is None:
+                ttfb = perf_counter() - start
+            size += len(piece)
+        total = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = (peak, ttfb)
+        print("%-6s %10d bytes  pico %10d bytes  primer byte %7.1f ms  total %7.1f ms"
+              % (name, size, peak, 1000 * (ttfb or 0), 1000 * total))
+    return results
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = "Migraciones de la base de conocimiento")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    migrate_parser = subparsers.add_parser("migrate", help = "Reescribe en binario los archivos en base64")
+    migrate_parser.add_argument("--dry-run", action = "store_true", help = "Sólo lista los archivos a migrar")
+    reminders_parser = subparsers.add_parser("reminders", help = "Añade la fecha de vencimiento a los recordatorios")
+    reminders_parser.add_argument("--dry-run", action = "store_true", help = "Sólo lista los recordatorios a migrar")
+    measure_parser = subparsers.add_parser("measure", help = "Mide memoria y tiempo de lectura de un archivo")
+    measure_parser.add_argument("filename")
+    args = parser.parse_args()
+
+    with open(".MongoDBKey", "r") as file:
+        mongo_key = file.read().strip()
+    kb = KnowledgeBase()
+    kb.connectKnowledgeBase(mongo_key)
+
+    if args.command == "migrate":
+        saved = migrateMedia(kb.fs, args.dry_run)
+        if not args.dry_run:
+            print("Ahorro total: %d bytes" % saved)
+    elif args.command == "reminders":
+        migrated = migrateReminders(kb.db, args.dry_run)
+        print("Recordatorios %s: %d" % ("a migrar" if args.dry_run else "migrados", migrated))
+    else:
+        measureMedia(kb.fs, args.filename)
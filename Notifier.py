@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+
+import threading
+import queue
+
+try:
+    from jeepney import DBusAddress, MessageType, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:
+    open_dbus_connection = None
+
+
+class Notifier():
+
+    """ Clase Notifier.
+
+    Clase que envía notificaciones de escritorio a través de la interfaz *org.freedesktop.Notifications* de D-Bus.
+    Está pensada para resultados breves (la hora, la canción actual...) que no necesitan una ventana ni que el usuario
+    pulse el botón de aceptar: la notificación desaparece sola al cabo de *timeout* milisegundos.
+
+    El envío se realiza en un hilo propio sobre una única conexión con el bus, de forma que *notify* no espera a D-Bus.
+    Por defecto se usa el bus de sesión (variable de entorno DBUS_SESSION_BUS_ADDRESS), aunque puede indicarse la dirección
+    de cualquier otro bus, por ejemplo un bus local de pruebas.
+    """
+
+    def __init__(self, address = "SESSION", app_name = "Teodoro", fallback = None):
+        """
+        Función de inicialización de la clase Notifier. Se abre la conexión con el bus; si no es posible, el notificador
+        queda marcado como no disponible.
+
+        Args:
+            address (str, optional): Bus de D-Bus ("SESSION", "SYSTEM" o una dirección). Defaults to "SESSION".
+            app_name (str, optional): Nombre de la aplicación en las notificaciones. Defaults to "Teodoro".
+            fallback (function, optional): Función que recibe el texto de una notificación que no se ha podido enviar.
+                Defaults to None.
+        """
+        self.address = address
+        self.app_name = app_name
+        self.fallback = fallback
+        self.last_id = 0                    # Identificador de la última notificación, que se reemplaza con la siguiente
+        self.__conn = None
+        self.__queue = queue.Queue()
+
+        self.available = self.__connect()
+        if self.available:
+            threading.Thread(target = self.__run, name = "Notifier", daemon = True).start()
+
+    def __connect(self):
+        """
+        Función que abre la conexión con el bus.
+
+        Returns:
+            (bool): True si la conexión se ha abierto correctamente.
+        """
+        if open_dbus_connection is None:
+            return False
+        if self.__conn is not None:         # Conexión perdida
+            try:
+                self.__conn.close()
+            except Exception:
+                pass
+        try:
+            self.__conn = open_dbus_connection(bus = self.address)
+            return True
+        except Exception:
+            self.__conn = None
+            return False
+
+    def notify(self, body, summary = "Teodoro", timeout = 5000):
+        """
+        Función que solicita una notificación de escritorio. No espera a que se muestre.
+
+        Args:
+            body (str): Texto de la notificación.
+            summary (str, optional): Título de la notificación. Defaults to "Teodoro".
+            timeout (int, optional): Tiempo en milisegundos hasta que la notificación desaparece. Defaults to 5000.
+
+        Returns:
+            (bool): False si no hay servicio de notificaciones disponible.
+        """
+        if not self.available:
+            return False
+        self.__queue.put((summary, body, timeout))
+        return True
+
+    def __run(self):
+        """
+        Función del hilo de envío de notificaciones. Si la conexión se pierde, se intenta abrir de nuevo una vez y se
+        reenvía por ella la notificación; si falla, el notificador queda marcado como no disponible.
+        """
+        destination = DBusAddress("/org/freedesktop/Notifications",
+                                  bus_name = "org.freedesktop.Notifications",
+                                  interface = "org.freedesktop.Notifications")
+        while True:
+            summary, body, timeout = self.__queue.get()
+            message = new_method_call(destination, "Notify", "susssasa{sv}i",
+                                      (self.app_name, self.last_id, "", summary, body, [], {}, timeout))
+            try:
+                reply = self.__conn.send_and_get_reply(message, timeout = 2)
+            except Exception:
+                if not self.__connect():
+                    return self.__disable(body)
+                try:                                                    # Reenvío por la nueva conexión
+                    reply = self.__conn.send_and_get_reply(message, timeout = 2)
+                except Exception:
+                    return self.__disable(body)
+            if reply.header.message_type == MessageType.error:         # Sin servidor de notificaciones
+                return self.__disable(body)
+            self.last_id = reply.body[0]
+
+    def __disable(self, body):
+        """
+        Función que marca el notificador como no disponible y entrega a *fallback* la notificación pendiente y las que
+        quedan en cola.
+
+        Args:
+            body (str): Texto de la notificación que no se ha podido enviar.
+        """
+        self.available = False
+        pending = [body]
+        while not self.__queue.empty():
+            pending.append(self.__queue.get()[1])
+        if self.fallback is not None:
+            for text in pending:
+                self.fallback(text)
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+
+from contextlib import contextmanager
+import threading
+
+
+class Profile():
+
+    """ Clase Profile.
+
+    Perfil en memoria de un usuario de la colección *Users*. El documento se carga una única vez, con una sola consulta,
+    y las lecturas se sirven desde memoria. Las escrituras se envían a MongoDB (*write-through*) y actualizan a la vez la
+    copia en memoria, de forma que nunca queda desactualizada respecto a los cambios hechos desde el propio asistente.
+
+    Cada escritura incrementa el campo *_version* del documento. Si se activa la comprobación de versión
+    (*check_version*), antes de cada lectura se consulta sólo ese campo y el perfil se recarga si ha cambiado desde otro
+    proceso (por ejemplo, el modo servidor).
+
+    Los campos que empiezan por "_" son privados (contraseña, calendarios, macros...); el resto es la información pública
+    del usuario.
+
+    Los cambios se acumulan y se envían en una única operación ($set y $unset a la vez). Dentro de un bloque *batch*
+    (una interacción con el usuario), se envían al salir del bloque. Con escritura diferida (*write_behind* > 0), los
+    cambios de los siguientes *write_behind* segundos se agrupan y se envían en segundo plano, sin que el asistente
+    espere a MongoDB; *flush* fuerza el envío de los cambios pendientes.
+    """
+
+    def __init__(self, collection, doc, check_version = False, write_behind = 0):
+        """
+        Función de inicialización de la clase Profile.
+
+        Args:
+            collection (pymongo.collection.Collection): Colección *Users*.
+            doc (dict): Documento del usuario.
+            check_version (bool, optional): Flag para comprobar la versión antes de cada lectura. Defaults to False.
+            write_behind (float, optional): Segundos de agrupación de la escritura diferida (0 para escribir al momento).
+                Defaults to 0.
+        """
+        self.collection = collection
+        self.doc = doc
+        self.name = doc["nombre"]
+        self.check_version = check_version
+        self.write_behind = write_behind
+        self.__set = {}                     # Campos pendientes de guardar
+        self.__unset = set()                # Campos pendientes de eliminar
+        self.__batch = 0                    # Bloques *batch* abiertos
+        self.__timer = None                 # Envío diferido programado
+        self.__lock = threading.RLock()
+        self.__flushing = threading.Lock()  # Los envíos se realizan de uno en uno y en orden
+
+    @classmethod
+    def load(cls, collection, name, check_version = False, write_behind = 0):
+        """
+        Función que carga el perfil de un usuario.
+
+        Args:
+            collection (pymongo.collection.Collection): Colección *Users*.
+            name (str): Nombre del usuario.
+            check_version (bool, optional): Flag para comprobar la versión antes de cada lectura. Defaults to False.
+            write_behind (float, optional): Segundos de agrupación de la escritura diferida. Defaults to 0.
+
+        Returns:
+            profile (Profile): Perfil del usuario, o None si no existe.
+        """
+        doc = collection.find_one({"nombre": name}, {"_id": 0})
+        if doc is None:
+            return None
+        return cls(collection, doc, check_version, write_behind)
+
+
+#   ******************  Lectura  ******************
+
+    def refresh(self):
+        """
+        Función que recarga el perfil si su versión en la base de conocimiento es distinta de la de memoria.
+
+        Returns:
+            (bool): True si el perfil se ha recargado.
+        """
+        self.flush()
+        remote = self.collection.find_one({"nombre": self.name}, {"_id": 0, "_version": 1})
+        if remote is None or remote.get("_version") == self.doc.get("_version"):
+            return False
+        self.doc = self.collection.find_one({"nombre": self.name}, {"_id": 0})
+        return True
+
+    def get(self, field, default = None):
+        """
+        Función que devuelve un campo del perfil.
+
+        Args:
+            field (str): Nombre del campo.
+            default (optional): Valor si el campo no existe. Defaults to None.
+        """
+        if self.check_version:
+            self.refresh()
+        return self.doc.get(field, default)
+
+    def public(self, name = True):
+        """
+        Función que devuelve la información pública del usuario.
+
+        Args:
+            name (bool, optional): Flag para incluir el nombre del usuario. Defaults to True.
+
+        Returns:
+            info (dict): Campos públicos del perfil.
+        """
+        if self.check_version:
+            self.refresh()
+        return {k: v for k, v in self.doc.items() if not k.startswith("_") and (name or k != "nombre")}
+
+
+#   ******************  Escritura  ******************
+
+    def set(self, fields):
+        """
+        Función que guarda uno o varios campos del perfil.
+
+        Args:
+            fields (dict): Campos y valores.
+        """
+        with self.__lock:
+            self.doc.update(fields)
+            self.__set.update(fields)
+            self.__unset.difference_update(fields)
+            self.__written()
+
+    def unset(self, fields):
+        """
+        Función que elimina uno o varios campos del perfil.
+
+        Args:
+            fields (list): Nombres de los campos.
+        """
+        with self.__lock:
+            for field in fields:
+                self.doc.pop(field, None)
+                self.__set.pop(field, None)
+            self.__unset.update(fields)
+            self.__written()
+
+    @contextmanager
+    def batch(self):
+        """
+        Bloque en el que los cambios del perfil se acumulan y se envían juntos al salir.
+        """
+        with self.__lock:
+            self.__batch += 1
+        try:
+            yield self
+        finally:
+            with self.__lock:
+                self.__batch -= 1
+                self.__written()
+
+    def __written(self):
+        """
+        Función que decide cuándo enviar los cambios pendientes: al momento, al salir del bloque *batch* o, con escritura
+        diferida, pasados *write_behind* segundos.
+        """
+        if self.__batch or not (self.__set or self.__unset):
+            return
+        if not self.write_behind:
+            self.flush()
+        elif self.__timer is None:
+            self.__timer = threading.Timer(self.write_behind, self.flush)
+            self.__timer.daemon = True
+            self.__timer.start()
+
+    def flush(self):
+        """
+        Función que envía a MongoDB, en una única operación, los cambios pendientes del perfil. Si el envío falla, los
+        cambios vuelven a quedar pendientes (sin sustituir a los que se hayan hecho mientras tanto) y se propaga el error;
+        con escritura diferida, se programa un nuevo envío.
+        """
+        with self.__flushing:
+            with self.__lock:
+                if self.__timer is not None:
+                    self.__timer.cancel()
+                    self.__timer = None
+                if not (self.__set or self.__unset):
+                    return
+                pending_set, pending_unset = self.__set, self.__unset
+                self.__set, self.__unset = {}, set()
+            update = {"$inc": {"_version": 1}}
+            if pending_set:
+                update["$set"] = pending_set
+            if pending_unset:
+                update["$unset"] = {field: "" for field in pending_unset}
+
+            # El envío se hace fuera del bloqueo, para que los nuevos cambios no esperen a MongoDB
+            try:
+                self.collection.update_one({"nombre": self.name}, update)
+            except Exception:
+                with self.__lock:
+                    newer = set(self.__set) | self.__unset
+                    self.__set.update({k: v for k, v in pending_set.items() if k not in newer})
+                    self.__unset.update(pending_unset - newer)
+                    if self.write_behind:
+                        self.__written()
+                raise
+            with self.__lock:
+                self.doc["_version"] = self.doc.get("_version", 0) + 1
+
+
+class Context():
+
+    """ Clase Context.
+
+    Contexto de un usuario que ya ha iniciado sesión: su perfil (con sus macros), el estado de su calendario
+    (credenciales y servicio) y sus recordatorios pendientes. Se guarda en una caché para que volver a cambiar
+    a ese usuario sólo suponga restablecer el contexto, sin consultar la base de conocimiento.
+    """
+
+    def __init__(self, profile, calendar = None, schedule = None):
+        """
+        Función de inicialización de la clase Context.
+
+        Args:
+            profile (Profile): Perfil del usuario.
+            calendar (tuple, optional): Estado del calendario (*Calendar.calendarState*). Defaults to None.
+            schedule (dict, optional): Recordatorios (*Applications.detachSchedule*). Defaults to None.
+        """
+        self.profile = profile
+        self.calendar = calendar
+        self.schedule = schedule
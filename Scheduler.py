@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+import threading
+import itertools
+import logging
+import heapq
+import time
+
+
+class Scheduler():
+
+    """ Clase Scheduler.
+
+    Planificador de tareas en un único hilo. Las tareas pendientes se guardan en un montículo (*heap*) ordenado por el
+    instante en el que deben ejecutarse, y el hilo duerme hasta que vence la primera, sin consultar periódicamente la base
+    de conocimiento. Si se añade una tarea que vence antes que la primera, se despierta el hilo para recalcular la espera.
+
+    Los instantes se expresan en segundos desde la época (*time.time()*). Las tareas se ejecutan en el hilo del
+    planificador, por lo que deben ser breves o lanzar su propio hilo. Los errores de una tarea se registran (*logging*)
+    y no detienen el planificador.
+
+    Añadir una tarea cuesta O(log n). Cancelarla sólo la marca; las entradas canceladas se descartan al llegar a la cima
+    del montículo o, si llegan a ser más de la mitad, se eliminan todas de una vez.
+    """
+
+    def __init__(self):
+        """
+        Función de inicialización de la clase Scheduler. Se inicia el hilo del planificador.
+        """
+        self.__heap = []
+        self.__counter = itertools.count()      # Desempate entre tareas con el mismo instante
+        self.__cancelled = 0                    # Entradas canceladas que siguen en el montículo
+        self.__condition = threading.Condition()
+        threading.Thread(target = self.__run, name = "Scheduler", daemon = True).start()
+
+    def schedule(self, when, callback, *args):
+        """
+        Función que añade una tarea al planificador.
+
+        Args:
+            when (float): Instante en el que debe ejecutarse la tarea.
+            callback (function): Función de la tarea.
+            *args: Argumentos de la función.
+
+        Returns:
+            entry (list): Entrada de la tarea, necesaria para cancelarla.
+        """
+        entry = [when, next(self.__counter), callback, args]
+        with self.__condition:
+            heapq.heappush(self.__heap, entry)
+            if self.__heap[0] is entry:         # Nueva primera tarea: se recalcula la espera
+                self.__condition.notify()
+        return entry
+
+    def cancel(self, entry):
+        """
+        Función que cancela una tarea. La entrada se marca como cancelada y se descarta cuando llega a la cima del
+        montículo.
+
+        Args:
+            entry (list): Entrada de la tarea.
+        """
+        with self.__condition:
+            if entry[2] is None:                # Ya ejecutada o cancelada
+                return
+            entry[2] = None
+            self.__cancelled += 1
+            if self.__cancelled > 64 and 2 * self.__cancelled > len(self.__heap):
+                self.__heap = [e for e in self.__heap if e[2] is not None]
+                heapq.heapify(self.__heap)
+                self.__cancelled = 0
+                self.__condition.notify()
+
+    def __len__(self):
+        with self.__condition:
+            return len(self.__heap) - self.__cancelled
+
+    def __run(self):
+        """
+        Función del hilo del planificador.
+        """
+        while True:
+            with self.__condition:
+                while True:
+                    if not self.__heap:
+                        self.__condition.wait()
+                        continue
+                    delay = self.__heap[0][0] - time.time()
+                    if delay > 0:
+                        self.__condition.wait(delay)
+                        continue
+                    entry = heapq.heappop(self.__heap)
+                    callback, args = entry[2], entry[3]
+                    if callback is not None:
+                        entry[2] = None         # Ejecutada: ya no puede cancelarse
+                        break
+                    self.__cancelled -= 1
+            try:
+                callback(*args)
+            except Exception:
+                logging.getLogger("Scheduler").exception("Error en la tarea %s", getattr(callback, "__name__", callback))
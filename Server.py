@@ -0,0 +1,352 @@
+#!/usr/bin/python3
+
+from KnowledgeBase import KnowledgeBase
+from Applications import Applications
+from Engine import Engine
+from Breaker import ServiceUnavailable
+from Teodoro import Teodoro
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+from time import perf_counter
+import argparse
+import json
+import secrets
+import threading
+import bcrypt
+
+
+class Session():
+
+    """ Clase Session.
+
+    Contexto de un usuario conectado al modo servidor. Contiene únicamente el estado propio del usuario (nombre,
+    calendarios, funcionalidades del teléfono móvil e información pública). El resto de atributos (base de conocimiento,
+    reconocedor de funcionalidades, sesión HTTP...) se delegan en el servidor, que los comparte entre todas las sesiones.
+    """
+
+    def __init__(self, server, User, info):
+        """
+        Función de inicialización de la clase Session.
+
+        Args:
+            server (Server): Instancia del servidor que comparte los recursos comunes.
+            User (str): Nombre del usuario de la sesión.
+            info (dict): Documento del usuario en la colección *Users*.
+        """
+        self.server = server
+        self.User = User
+        self.CalendarsID = info.get("_CalendarsID")
+        self.CalendarsAPI = info.get("_CalendarsAPI")
+        self.PhoneFunctions = info.get("_PhoneFunctions")
+        self.OnMacro = info.get("_OnMacro")
+        self.OffMacro = info.get("_OffMacro")
+        self.EmergencyMacro = info.get("_EmergencyMacro")
+        self.Information = {k: v for k, v in info.items() if not k.startswith("_")}
+        self.lock = threading.Lock()    # Las peticiones de una misma sesión se atienden en orden
+
+    def __getattr__(self, attr):
+        """
+        Función que delega en el servidor los atributos compartidos que no pertenecen a la sesión.
+        """
+        if attr == "server":
+            raise AttributeError(attr)
+        return getattr(self.server, attr)
+
+
+class Server(KnowledgeBase):
+
+    """ Clase Server.
+
+    Modo servidor del asistente. Atiende peticiones de texto de varios usuarios a la vez a través de HTTP. Todos los
+    usuarios comparten un único cliente de MongoDB (con su pool de conexiones), un único reconocedor de funcionalidades
+    y una única sesión HTTP para las peticiones salientes. El estado propio de cada usuario se guarda en un objeto *Session*.
+
+    Rutas:
+        - POST /login: {"nombre", "password"} -> {"session"}
+        - POST /query: {"session", "query"} -> {"intent", "speech", "text"}
+        - POST /logout: {"session"} -> {}
+
+    Args:
+        - KnowledgeBase (class): Superclase que contiene la conexión y la extracción de información de la base de
+        conocimiento.
+    """
+
+#   ******************  __init__  ******************
+
+    def __init__(self, mongo_key, default_name = "Teodoro", maxPoolSize = 100):
+        """
+        Función de inicialización de la clase Server.
+
+        Args:
+            mongo_key (str): URL de acceso a la base de conocimiento en MongoDB.
+            default_name (str, optional): El nombre del asistente por defecto del sistema. Defaults to "Teodoro".
+            maxPoolSize (int, optional): Número máximo de conexiones del pool de MongoDB. Defaults to 100.
+        """
+        self.connectKnowledgeBase(mongo_key, maxPoolSize)
+        if self.ExtractKnowledgeBase(default_name) == -1:
+            raise RuntimeError("No existen comandos en la Base de Conocimiento")
+        self.watchCommands(default_name = default_name)
+
+        self.http = Engine.http
+        self.breaker = lambda service: Engine.breaker(self, service)     # Cortacircuitos compartidos
+        self.defaultLocation = "Madrid"
+        self.NotAvailable = "Esa funcionalidad no está disponible en modo servidor"
+
+        self.sessions = {}
+        self.__lock = threading.Lock()
+
+
+#   ******************  Sesiones  ******************
+
+    def login(self, name, password):
+        """
+        Función que verifica las credenciales de un usuario y crea su sesión.
+
+        Args:
+            name (str): Nombre del usuario.
+            password (str): Contraseña del usuario.
+
+        Returns:
+            token (str): Identificador de la sesión creada o None si las credenciales no son correctas.
+        """
+        info = self.db["Users"].find_one({"nombre": name}, {"_id": 0})
+        if info is None or "_hash" not in info:
+            return None
+        myHash = info["_hash"].encode('utf-8')
+        newHash = bcrypt.hashpw(password.encode('utf-8'), info["_salt"].encode('utf-8'))
+        if myHash != newHash:
+            return None
+
+        token = secrets.token_urlsafe(16)
+        with self.__lock:
+            self.sessions[token] = Session(self, name, info)
+        return token
+
+    def logout(self, token):
+        """
+        Función que elimina la sesión de un usuario.
+
+        Args:
+            token (str): Identificador de la sesión.
+        """
+        with self.__lock:
+            self.sessions.pop(token, None)
+
+
+#   ******************  Ejecución de funcionalidades  ******************
+
+    def answer(self, session, query):
+        """
+        Función que resuelve una petición de texto de una sesión. Sólo se atienden las funcionalidades que no necesitan
+        micrófono, interfaz gráfica ni control del ordenador local.
+
+        Args:
+            session (Session): Sesión del usuario que realiza la petición.
+            query (str): Cadena de texto que contiene la petición del usuario.
+
+        Returns:
+            intent (str): Funcionalidad reconocida.
+            speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
+            text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
+        """
+        query = query.lower()
+        intent = self.matcher.match(query)
+
+        if intent == "Name":
+            speech, text = Teodoro.tellNames(session)
+        elif intent == "Greetings":
+            speech = "Hola " + session.User + ", aquí estoy para lo que necesite."
+            text = speech
+        elif intent == "Today" and self.Days and self.Months:
+            speech, text = Teodoro.tellDay(session)
+        elif intent == "Time":
+            speech, text = Teodoro.tellTime(session)
+        elif intent == "Information":
+            text = "\n".join(str(k) + ": " + str(v) for k, v in session.Information.items())
+            speech = "Lo que sé de ti es: " + text.replace("\n", ", ")
+        elif intent == "Weather":
+            if "en" in query:
+                place = str(query.partition("en")[2]).replace(" ", "")
+            else:
+                place = self.defaultLocation
+            try:
+                speech = Applications.weatherReport(session, place)
+            except ServiceUnavailable as e:                 # Respuesta inmediata con el servicio caído
+                speech = e.speech
+            text = speech
+        elif intent == "Math" and self.Numbers and self.MathOperations:
+            speech, text = Applications.mathOperation(session, query)
+        elif intent is None:
+            speech = "Lo siento, no te he entendido"
+            text = speech
+        else:
+            speech = self.NotAvailable
+            text = speech
+
+        return intent, speech, text
+
+
+#   ******************  Servidor HTTP  ******************
+
+    def serve(self, host = "127.0.0.1", port = 8080):
+        """
+        Función que inicia el servidor HTTP. Cada conexión se atiende en su propio hilo.
+
+        Args:
+            host (str, optional): Dirección de escucha. Defaults to "127.0.0.1".
+            port (int, optional): Puerto de escucha. Defaults to 8080.
+        """
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        httpd.teodoro = self
+        print("Teodoro escuchando en http://" + host + ":" + str(port))
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.client.close()
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    """ Clase Handler.
+
+    Manejador de las peticiones HTTP del modo servidor. Las conexiones se mantienen abiertas (HTTP/1.1) para que un
+    mismo cliente pueda enviar varias peticiones sin volver a conectarse.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        teodoro = self.server.teodoro
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.__reply(400, {"error": "JSON incorrecto"})
+
+        if self.path == "/login":
+            token = teodoro.login(body.get("nombre", ""), body.get("password", ""))
+            if token is None:
+                return self.__reply(401, {"error": "Credenciales incorrectas"})
+            return self.__reply(200, {"session": token})
+
+        session = teodoro.sessions.get(body.get("session"))
+        if session is None:
+            return self.__reply(401, {"error": "Sesión no válida"})
+
+        if self.path == "/query":
+            with session.lock:
+                intent, speech, text = teodoro.answer(session, body.get("query", ""))
+            return self.__reply(200, {"intent": intent, "speech": speech, "text": text})
+        elif self.path == "/logout":
+            teodoro.logout(body.get("session"))
+            return self.__reply(200, {})
+        return self.__reply(404, {"error": "Ruta no encontrada"})
+
+    def __reply(self, status, content):
+        data = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+#   ******************  Generador de carga  ******************
+
+def loadTest(url, name, password, sessions = (1, 2, 4, 8, 16), requests_per_session = 50, query = "qué hora es"):
+    """
+    Función generadora de carga para el modo servidor. Para cada número de sesiones concurrentes, cada sesión inicia
+    sesión con su propia conexión y envía peticiones de forma secuencial. Se muestran las peticiones por segundo y los
+    percentiles de latencia de cada escenario.
+
+    Args:
+        url (str): URL del servidor.
+        name (str): Nombre del usuario con el que se inician las sesiones.
+        password (str): Contraseña del usuario.
+        sessions (tuple, optional): Números de sesiones concurrentes a probar. Defaults to (1, 2, 4, 8, 16).
+        requests_per_session (int, optional): Peticiones enviadas por cada sesión. Defaults to 50.
+        query (str, optional): Petición enviada. Defaults to "qué hora es".
+
+    Returns:
+        results (list): Lista de diccionarios con los resultados de cada escenario.
+    """
+    address = urlparse(url)
+
+    def post(conn, path, content):
+        data = json.dumps(content).encode("utf-8")
+        conn.request("POST", path, data, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def worker(latencies, barrier):
+        conn = HTTPConnection(address.hostname, address.port or 80, timeout = 30)
+        _, content = post(conn, "/login", {"nombre": name, "password": password})
+        token = content["session"]
+        barrier.wait()
+        for _ in range(requests_per_session):
+            start = perf_counter()
+            post(conn, "/query", {"session": token, "query": query})
+            latencies.append(perf_counter() - start)
+        post(conn, "/logout", {"session": token})
+        conn.close()
+
+    def percentile(values, p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    results = []
+    print("%8s %10s %10s %10s %10s" % ("sesiones", "req/s", "p50 (ms)", "p90 (ms)", "p99 (ms)"))
+    for n in sessions:
+        latencies = []
+        barrier = threading.Barrier(n + 1)
+        threads = [threading.Thread(target = worker, args = (latencies, barrier)) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+
+        latencies.sort()
+        result = {"sessions": n, "rps": len(latencies) / elapsed,
+                  "p50": percentile(latencies, 50) * 1000, "p90": percentile(latencies, 90) * 1000,
+                  "p99": percentile(latencies, 99) * 1000}
+        results.append(result)
+        print("%8d %10.1f %10.2f %10.2f %10.2f" % (n, result["rps"], result["p50"], result["p90"], result["p99"]))
+
+    return results
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = "Modo servidor de Teodoro")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    serve_parser = subparsers.add_parser("serve", help = "Inicia el servidor")
+    serve_parser.add_argument("--host", default = "127.0.0.1")
+    serve_parser.add_argument("--port", type = int, default = 8080)
+    bench_parser = subparsers.add_parser("bench", help = "Genera carga contra un servidor")
+    bench_parser.add_argument("--url", default = "http://127.0.0.1:8080")
+    bench_parser.add_argument("--user", required = True)
+    bench_parser.add_argument("--password", required = True)
+    bench_parser.add_argument("--sessions", default = "1,2,4,8,16")
+    bench_parser.add_argument("--requests", type = int, default = 50)
+    bench_parser.add_argument("--query", default = "qué hora es")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        with open(".MongoDBKey", "r") as file:
+            mongo_key = file.read().strip()
+        Server(mongo_key).serve(args.host, args.port)
+    else:
+        loadTest(args.url, args.user, args.password, tuple(int(n) for n in args.sessions.split(",")),
+                 args.requests, args.query)
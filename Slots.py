@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+
+from datetime import datetime, timedelta
+import tools as t
+import re
+
+
+class Slots():
+
+    """ Clase Slots.
+
+    Clase que interpreta las respuestas cortas del usuario a las preguntas por voz del asistente (*askSlot*). Cada
+    método recibe la transcripción de la respuesta y devuelve el valor del dato (*slot*) con el mismo formato que la GUI
+    equivalente, o None si no se ha podido interpretar. Los números y los meses se reconocen con las tablas *Numbers* y
+    *Months* de la base de conocimiento.
+
+    Datos:
+        - *text*: texto libre (GUI *Text*).
+        - *hour*: hora "HH:MM" (GUI *Hour*).
+        - *date*: fecha "AAAA-MM-DD" (GUI *Date*).
+        - *duration*: duración (cantidad, segundos por unidad) (GUI *Alarm*).
+        - *recurrence*: regla de repetición de un recordatorio ("diario", "laborables", "semanal" o "mensual").
+    """
+
+    def __init__(self, Numbers, Months, Days = None):
+        """
+        Función de inicialización de la clase Slots.
+
+        Args:
+            Numbers (dict): Diccionario que contiene la transcripción de algunos números.
+            Months (dict): Diccionario que contiene la transcripción de los meses.
+            Days (dict, optional): Diccionario que contiene la transcripción de los días de la semana. Defaults to None.
+        """
+        self.Numbers = {v: int(k) for k, v in (Numbers or {}).items()}
+        self.Numbers.update({"un": 1, "una": 1})
+        self.Months = {v: int(k) for k, v in (Months or {}).items()}
+        self.Days = {v: int(k) for k, v in (Days or {}).items()}
+
+        self.s_time_unit = t.Tools(3)
+        self.s_time_unit.setSwitch_time_unit()
+
+    def parse(self, slot, answer):
+        """
+        Función que interpreta una respuesta según el tipo de dato.
+
+        Args:
+            slot (str): Tipo de dato (*text*, *hour*, *date* o *duration*).
+            answer (str): Transcripción de la respuesta del usuario.
+
+        Returns:
+            Valor del dato o None si no se ha podido interpretar.
+        """
+        if not answer:
+            return None
+        return getattr(self, slot)(answer.lower())
+
+    def number(self, word):
+        """
+        Función que devuelve el valor de un número escrito con cifras o con letras.
+
+        Args:
+            word (str): Palabra.
+
+        Returns:
+            number (int): Valor del número o None si la palabra no es un número.
+        """
+        if word.isdigit():
+            return int(word)
+        return self.Numbers.get(word)
+
+
+#   ******************  Datos  ******************
+
+    def text(self, answer):
+        return answer.strip() or None
+
+    def hour(self, answer):
+        """
+        Función que interpreta una hora: "17:30", "a las cinco y media de la tarde", "las ocho menos cuarto"...
+        """
+        m = re.search(r"(\d{1,2})\s*[:.h]\s*(\d{2})", answer)
+        if m:
+            hour, minute = int(m.group(1)), int(m.group(2))
+        else:
+            words = answer.split()
+            numbers = [(i, self.number(w)) for i, w in enumerate(words) if self.number(w) is not None]
+            if not numbers:
+                return None
+            i, hour = numbers[0]
+            rest = words[i+1:]
+            minute = 0
+            if rest[:2] == ["y", "media"]:
+                minute = 30
+            elif rest[:2] == ["y", "cuarto"]:
+                minute = 15
+            elif rest[:2] == ["menos", "cuarto"]:
+                hour, minute = hour - 1, 45
+            elif len(rest) > 1 and rest[0] in ("y", "menos") and self.number(rest[1]) is not None:
+                minute = self.number(rest[1])
+                if rest[0] == "menos":
+                    hour, minute = hour - 1, 60 - minute
+            elif rest and self.number(rest[0]) is not None:
+                minute = self.number(rest[0])
+            if ("tarde" in words or "noche" in words) and hour < 12:
+                hour += 12
+
+        if 0 <= hour <= 23 and 0 <= minute <= 59:
+            return "%02d:%02d" % (hour, minute)
+        return None
+
+    def date(self, answer):
+        """
+        Función que interpreta una fecha: "hoy", "mañana", "pasado mañana", "el viernes", "el cinco de marzo de 2027"...
+        """
+        today = datetime.today().date()
+        words = answer.split()
+
+        if "pasado" in words and "mañana" in words:
+            return str(today + timedelta(days = 2))
+        elif "mañana" in words:
+            return str(today + timedelta(days = 1))
+        elif "hoy" in words:
+            return str(today)
+
+        weekday = self.weekday(answer)
+        if weekday is not None:
+            return weekday
+
+        numbers = [self.number(w) for w in words if self.number(w) is not None]
+        months = [self.Months[w] for w in words if w in self.Months]
+        if not numbers:
+            return None
+        day = numbers[0]
+        month = months[0] if months else today.month
+        year = next((n for n in numbers[1:] if n > 1000), None)
+        try:
+            result = datetime(year or today.year, month, day).date()
+            if year is None and result < today:     # Sin año, la fecha es la próxima vez que llegue ese día
+                result = datetime(today.year + 1, month, day).date()
+            return str(result)
+        except ValueError:
+            return None
+
+    def weekday(self, answer):
+        """
+        Función que interpreta un día de la semana ("el viernes", "los sábados") y devuelve la fecha de la próxima vez que
+        llegue, o None si la respuesta no contiene ningún día de la semana.
+        """
+        today = datetime.today().date()
+        for word in answer.split():
+            if word not in self.Days and word[:-1] in self.Days:       # Plural: "los sábados"
+                word = word[:-1]
+            if word in self.Days:
+                return str(today + timedelta(days = (self.Days[word] - 1 - today.weekday()) % 7 or 7))
+        return None
+
+    def duration(self, answer):
+        """
+        Función que interpreta una duración: "cinco minutos", "1 hora", "30 segundos"...
+        """
+        words = answer.split()
+        for i, word in enumerate(words[:-1]):
+            amount = self.number(word)
+            unit = self.s_time_unit.switch(words[i+1])
+            if amount is not None and unit != "Invalid key":
+                return amount, unit
+        return None
+
+    def recurrence(self, answer):
+        """
+        Función que interpreta una regla de repetición: "todos los días", "a diario", "entre semana", "de lunes a
+        viernes", "cada semana", "todos los martes", "todos los meses"...
+        """
+        words = answer.split()
+        if "laborables" in words or "entre semana" in answer or ("lunes" in words and "viernes" in words):
+            return "laborables"
+        elif "diario" in words or "diariamente" in words or (("todos" in words or "cada" in words) and
+                                                            ("días" in words or "día" in words)):
+            return "diario"
+        elif "semanalmente" in words or (("todas" in words or "cada" in words) and
+                                         ("semanas" in words or "semana" in words)):
+            return "semanal"
+        elif "mensualmente" in words or (("todos" in words or "cada" in words) and
+                                         ("meses" in words or "mes" in words)):
+            return "mensual"
+        elif "todos" in words or "cada" in words:
+            for word in words:
+                if word in self.Days or word[:-1] in self.Days:
+                    return "semanal"
+        return None
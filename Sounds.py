@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+
+from pydub import AudioSegment
+from pydub.playback import play
+from time import perf_counter
+import numpy as np
+import threading
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+
+class Sounds():
+
+    """ Clase Sounds.
+
+    Efectos de sonido del asistente (llamada de emergencia, tono de alarma, aviso de escucha...). Cada sonido se
+    decodifica a PCM una única vez, al cargarlo, y se guarda en memoria con el formato de la salida de audio, de forma que
+    reproducirlo no necesita decodificar ni lanzar procesos.
+
+    La reproducción se realiza sobre un único *stream* de salida de PyAudio que se abre al principio y permanece abierto:
+    su función de *callback* entrega el sonido actual o silencio, por lo que un sonido empieza a sonar en el siguiente
+    bloque (*frames_per_buffer* muestras, unos 6 ms por defecto). Un sonido nuevo interrumpe al anterior. El retraso de
+    inicio de la última reproducción de cada sonido se guarda en *latency*.
+
+    Sin PyAudio, los sonidos se reproducen con *pydub.playback.play* a partir del PCM ya decodificado.
+    """
+
+    def __init__(self, rate = 44100, channels = 1, frames_per_buffer = 256):
+        """
+        Función de inicialización de la clase Sounds. Se abre el *stream* de salida; si no es posible, se usa *pydub*.
+
+        Args:
+            rate (int, optional): Frecuencia de muestreo. Defaults to 44100.
+            channels (int, optional): Número de canales. Defaults to 1.
+            frames_per_buffer (int, optional): Muestras por bloque del *stream*. Defaults to 256.
+        """
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.buffers = {}                   # Nombre -> PCM de 16 bits
+        self.latency = {}                   # Nombre -> retraso de inicio de la última reproducción (s)
+        self.__frame = 2 * channels         # Bytes por muestra de todos los canales
+        self.__current = None               # [PCM, posición, nombre, instante de petición, evento de fin]
+        self.__lock = threading.Lock()
+        self.__stream = None
+        self.available = self.__open()
+
+    def __open(self):
+        """
+        Función que abre el *stream* de salida.
+
+        Returns:
+            (bool): True si el *stream* se ha abierto correctamente.
+        """
+        if pyaudio is None:
+            return False
+        try:
+            audio = pyaudio.PyAudio()
+            self.__stream = audio.open(format = pyaudio.paInt16, channels = self.channels, rate = self.rate,
+                                       output = True, frames_per_buffer = self.frames_per_buffer,
+                                       stream_callback = self.__callback)
+            self.__stream.start_stream()
+            return True
+        except Exception:
+            self.__stream = None
+            return False
+
+    def __callback(self, in_data, frame_count, time_info, status):
+        """
+        Función de *callback* del *stream*: entrega el siguiente bloque del sonido actual o silencio.
+        """
+        size = frame_count * self.__frame
+        with self.__lock:
+            current = self.__current
+            if current is None:
+                return bytes(size), pyaudio.paContinue
+            data, position, name, start, done = current
+            if position == 0:
+                self.latency[name] = perf_counter() - start + self.__stream.get_output_latency()
+            block = data[position:position + size]
+            current[1] = position + size
+            if current[1] >= len(data):
+                self.__current = None
+                done.set()
+        if len(block) < size:
+            return bytes(block) + bytes(size - len(block)), pyaudio.paContinue
+        return bytes(block), pyaudio.paContinue
+
+
+#   ******************  Carga de sonidos  ******************
+
+    def load(self, name, source, format = None):
+        """
+        Función que decodifica un archivo de audio y guarda su PCM.
+
+        Args:
+            name (str): Nombre del sonido.
+            source (str, file): Ruta o archivo abierto.
+            format (str, optional): Formato del archivo ("mp3", "wav"...). Defaults to None.
+        """
+        segment = AudioSegment.from_file(source, format = format)
+        segment = segment.set_frame_rate(self.rate).set_channels(self.channels).set_sample_width(2)
+        self.buffers[name] = segment.raw_data
+
+    def tone(self, name, frequencies, duration = 0.15, repeat = 1, volume = 0.4):
+        """
+        Función que genera un sonido formado por tonos puros consecutivos y guarda su PCM.
+
+        Args:
+            name (str): Nombre del sonido.
+            frequencies (list): Frecuencias de los tonos en Hz (0 para un silencio).
+            duration (float, optional): Duración de cada tono en segundos. Defaults to 0.15.
+            repeat (int, optional): Número de repeticiones de la secuencia. Defaults to 1.
+            volume (float, optional): Volumen entre 0 y 1. Defaults to 0.4.
+        """
+        t = np.arange(int(self.rate * duration)) / self.rate
+        fade = np.minimum(1, np.minimum(t, duration - t) / 0.01)                # Sin chasquidos
+        wave = np.concatenate([np.sin(2 * np.pi * f * t) * fade for f in frequencies] * repeat)
+        pcm = (wave * volume * 32767).astype(np.int16)
+        self.buffers[name] = np.repeat(pcm, self.channels).tobytes()
+
+
+#   ******************  Reproducción  ******************
+
+    def play(self, name, block = False):
+        """
+        Función que reproduce un sonido cargado.
+
+        Args:
+            name (str): Nombre del sonido.
+            block (bool, optional): Flag para esperar a que termine. Defaults to False.
+
+        Returns:
+            (bool): False si el sonido no está cargado.
+        """
+        data = self.buffers.get(name)
+        if data is None:
+            return False
+        done = threading.Event()
+        if self.available:
+            with self.__lock:
+                if self.__current is not None:          # Se interrumpe el sonido anterior
+                    self.__current[4].set()
+                self.__current = [memoryview(data), 0, name, perf_counter(), done]
+        else:
+            segment = AudioSegment(data, sample_width = 2, frame_rate = self.rate, channels = self.channels)
+            threading.Thread(target = lambda: (play(segment), done.set()), name = "Sounds", daemon = True).start()
+        if block:
+            done.wait()
+        return True
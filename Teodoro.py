@@ -3,23 +3,23 @@
 from Applications import Applications
 from Calendar import Calendar
 from System import System
+from KnowledgeBase import KnowledgeBase
+from Profile import Profile, Context
+from Token import Token
+from Breaker import ServiceUnavailable
 
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 import os
 import sys
 from time import time
-import threading
-from pymongo import MongoClient
-import gridfs
-import base64
-from io import BytesIO
-from PIL import Image
 import socket
 import webbrowser
 import bcrypt
 
 
-class Teodoro(System, Applications, Calendar):
+class Teodoro(System, Applications, Calendar, KnowledgeBase):
 
     """ Clase Teodoro.
 
@@ -47,6 +47,8 @@ class Teodoro(System, Applications, Calendar):
             aplicación como búsquedas web, alarmas y recordatorios, control de la música, conexión con el teléfono...
             - Calendar (class): Superclase que contiene las funcionalidades relacionadas con el control del calendario
             del usuario.
+            - KnowledgeBase (class): Superclase que contiene la conexión y la extracción de información de la base de
+            conocimiento.
     """
 
 #   ******************  __init__ y __del__  ******************
@@ -95,6 +97,23 @@ class Teodoro(System, Applications, Calendar):
         self.__CalendarsAPI = False
         self.__MongoFile = '.MongoDBKey'
 
+        # Comprobación de la versión del perfil antes de cada lectura (cambios desde otros procesos)
+        self.profileVersionCheck = False
+        # Segundos de agrupación de los cambios del perfil antes de enviarlos en segundo plano (0: al terminar cada petición)
+        self.profileWriteBehind = 0
+
+        # Caché LRU de contextos de los últimos usuarios (cambio de usuario sin recargar su información)
+        self.maxContexts = 4
+        self.contexts = OrderedDict()
+
+        # Verificación de contraseñas en segundo plano, coste de bcrypt y token de sesión local
+        self.__login = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "Login")
+        self.bcryptRounds = 12
+        self.token = Token()
+
+        # Funcionalidades que necesitan conexión a Internet (sin ella se responde al momento)
+        self.onlineIntents = ("Google", "Wikipedia", "Youtube", "Weather", "Phone", "GetCalendar", "SetCalendar")
+
         # Extracción de la clave de la base de conocimiento de MongoDB.
         # Debe estar guardada en un archivo oculto del sistema de nombre "MongoDBKey"
         if os.path.isfile(self.__MongoFile):
@@ -110,7 +129,7 @@ class Teodoro(System, Applications, Calendar):
             self.GUI("Error", 
                     "No puede iniciar el asistente\nsin acceso a la Base de Conocimiento",
                     "Copie la url de acceso en el archivo\n'.MongoDBKey'",
-                    geometry="400x300")
+                    geometry="400x300", block=True)
             
             file = open(self.__MongoFile, 'r')
             mongo_key = file.read()
@@ -118,24 +137,28 @@ class Teodoro(System, Applications, Calendar):
         
         try:
             # Inicialización de la base de conocimiento
-            self.client = MongoClient(mongo_key)
-            self.db = self.client.KnowledgeBase
-            self.fs = gridfs.GridFS(self.db)
+            self.connectKnowledgeBase(mongo_key)
         except:
             self.GUI("Error", 
                     "No puede iniciar el asistente\nsin acceso a la Base de Conocimiento",
                     "Copie la url de acceso en el archivo\n'.MongoDBKey'",
-                    geometry="400x300")
+                    geometry="400x300", block=True)
             self.del_speak = False
             self.PhoneFunctions = False
             self.__del__()
 
-        # Proceso de *Login* del usuario
-        self.Login(self.default_user)
+        # Inicio del *Login* del usuario (la contraseña se verifica en segundo plano)
+        login = self.startLogin(self.default_user)
 
         # Obtención de datos de la base de conocimiento
         response = self.ExtractKnowledgeBase(self.default_name)
 
+        # Actualización de los comandos durante la ejecución
+        self.watchCommands(default_name = self.default_name)
+
+        # Fin del proceso de *Login* del usuario
+        self.Login(self.default_user, login = login)
+
         # Errores por falta de información en la Base de Conocimiento
         if response == -1:
             self.del_speak = False
@@ -160,11 +183,16 @@ class Teodoro(System, Applications, Calendar):
         Applications.__init__(self, self.SpotifyActions, self.MathOperations, self.Numbers)  # Applications
         Calendar.__init__(self, self.CalendarsID, self.CalendarsAPI, self.Numbers, self.Months)  # Calendar
 
+        # Contexto del usuario actual
+        self.contexts[self.User] = Context(self.profile)
+
     def __del__(self):
         """
         Función destructor de la clase Teodoro. En ella se comprueba si Teodoro está autorizado a emitir una frase de despedida o no, 
         y se termina el programa.
         """
+        if getattr(self, "profile", None) is not None:
+            self.profile.flush()                                # Envío de los cambios pendientes del perfil
         if self.del_speak:
             self.speak("Adiós " + self.User + ", que tenga un buen día")
         if self.PhoneFunctions:
@@ -174,52 +202,108 @@ class Teodoro(System, Applications, Calendar):
 
 #   ******************  Login  ******************
 
-    def Login(self, default_user, first = True):
+    def startLogin(self, default_user, first = True):
+        """
+        Función que inicia el login de un usuario. Al inicio del sistema, si existe un token de sesión válido (*Token*),
+        no se pide la contraseña. Si no, se muestra la GUI de login y la verificación de la contraseña se lanza en un hilo
+        aparte, de forma que el arranque puede continuar mientras se calcula el bcrypt.
+
+        Args:
+            default_user (str): Nombre del usuario por defecto
+            first (boolean, optional): Flag que indica si el login se realiza el principio del programa o no. Defaults to True.
+
+        Returns:
+            login (tuple): Nombre del usuario, flag del teléfono móvil y *future* que se resuelve con el perfil del usuario
+            (None si la contraseña no es correcta).
+        """
+        if first:
+            session = self.token.read()
+            if session is not None:
+                name, phone, token = session
+                profile = self.loadProfile(name)
+                if profile is not None and self.token.verify(token, profile.get("_hash")):
+                    verification = Future()
+                    verification.set_result(profile)
+                    return name, phone, verification
+                self.token.delete()
+
+        try:
+            name, password, phone = self.GUI("Login", text = "Bienvenido/a!", default_text = default_user)
+        except Exception as e:                                                              # Se resuelve en *Login*
+            verification = Future()
+            verification.set_exception(e)
+            return default_user, False, verification
+        return name, phone, self.__login.submit(self.verifyPassword, name, password)
+
+    def verifyPassword(self, name, password):
+        """
+        Función que comprueba la contraseña de un usuario. Si su hash tiene un coste menor que el actual (*bcryptRounds*),
+        se calcula de nuevo con el coste actual y se guarda.
+
+        Args:
+            name (str): Nombre del usuario.
+            password (str): Contraseña.
+
+        Returns:
+            profile (Profile): Perfil del usuario, o None si la contraseña no es correcta.
+        """
+        profile = self.loadProfile(name)
+        if profile is None:
+            return None
+        myHash = profile.get("_hash").encode('utf-8')
+        password = password.encode('utf-8')
+        if not bcrypt.checkpw(password, myHash):
+            return None
+        if int(myHash.split(b"$")[2]) < self.bcryptRounds:                                  # Actualización del coste
+            salt = bcrypt.gensalt(self.bcryptRounds)
+            profile.set({"_salt": salt.decode("utf-8"), "_hash": bcrypt.hashpw(password, salt).decode("utf-8")})
+        return profile
+
+    def loadProfile(self, name):
+        """
+        Función que devuelve el perfil de un usuario, desde su contexto en caché o desde la base de conocimiento.
+
+        Args:
+            name (str): Nombre del usuario.
+
+        Returns:
+            profile (Profile): Perfil del usuario, o None si no existe.
+        """
+        if name in self.contexts:
+            return self.contexts[name].profile
+        return Profile.load(self.db["Users"], name, self.profileVersionCheck, self.profileWriteBehind)
+
+    def Login(self, default_user, first = True, login = None):
         """
         Función que realiza la lógica de inicio de un usuario
 
         Args:
             default_user (str): Nombre del usuario por defecto
             first (boolean, optional): Flag que indica si el login se realiza el principio del programa o no. Defaults to True.
+            login (tuple, optional): Login ya iniciado con *startLogin*. Defaults to None.
         Returns:
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
             text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
         """
         try:
-            name, password, phone = self.GUI("Login", text = "Bienvenido/a!", default_text = default_user)
-            phone = phone.get()
-            info = self.db["Users"].find_one(
-                {"nombre": name}, {"_id": 0, "_salt": 1, "_hash": 1})
-            mySalt = info["_salt"].encode('utf-8')
-            myHash = info["_hash"].encode('utf-8')
-            password = password.encode('utf-8')
-            newHash = bcrypt.hashpw(password, mySalt)
-            if myHash == newHash:
+            if login is None:
+                login = self.startLogin(default_user, first)
+            name, phone, verification = login
+            profile = verification.result()                                                 # Espera a la verificación
+            if profile is not None:
                 self.GUI(
                     "Show", "Inicialización correcta.\nBienvenido " + name + "!")
-                self.User = name
-                info = self.db["Users"].find_one(
-                    {"nombre": name}, {"_id": 0, "_CalendarsID": 1, "_CalendarsAPI": 1, "_PhoneFunctions": 1, "_OnMacro": 1, "_OffMacro": 1, "_EmergencyMacro": 1})
-                self.CalendarsID = info["_CalendarsID"]
-                self.CalendarsAPI = info["_CalendarsAPI"]
-                self.PhoneFunctions = info["_PhoneFunctions"]
-                self.OnMacro = info["_OnMacro"]
-                self.OffMacro = info["_OffMacro"]
-                self.EmergencyMacro= info["_EmergencyMacro"]
+                if first == True:
+                    self.setProfile(profile)
+                else:
+                    self.switchUser(profile)
+                self.token.write(name, phone, profile.get("_hash"))                         # Token de sesión
                 speech = "Cambio de usuario realizado"
                 text = "Operación aceptada"
             elif first == True:
-                self.User = self.__defaultUser
                 self.GUI("Show", "Has inicializado como \n " +
-                        self.User + ".\nBienvenido!")
-                info = self.db["Users"].find_one(
-                    {"nombre": self.User}, {"_id": 0, "_CalendarsID": 1, "_CalendarsAPI": 1, "_PhoneFunctions": 1, "_OnMacro": 1, "_OffMacro": 1, "_EmergencyMacro": 1})
-                self.CalendarsID = info["_CalendarsID"]
-                self.CalendarsAPI = info["_CalendarsAPI"]
-                self.PhoneFunctions = info["_PhoneFunctions"]
-                self.OnMacro = info["_OnMacro"]
-                self.OffMacro = info["_OffMacro"]
-                self.EmergencyMacro= info["_EmergencyMacro"]
+                        self.__defaultUser + ".\nBienvenido!")
+                self.setProfile(self.loadProfile(self.__defaultUser))
                 speech = None
                 text = None
             else:
@@ -228,17 +312,9 @@ class Teodoro(System, Applications, Calendar):
                 return speech, text
         except:
             if first == True:
-                self.User = self.__defaultUser
                 self.GUI("Show", "Has inicializado como " +
-                        self.User + ".\nBienvenido!")
-                info = self.db["Users"].find_one(
-                    {"nombre": self.User}, {"_id": 0, "_CalendarsID": 1, "_CalendarsAPI": 1, "_PhoneFunctions": 1, "_OnMacro": 1, "_OffMacro": 1, "_EmergencyMacro": 1})
-                self.CalendarsID = info["_CalendarsID"]
-                self.CalendarsAPI = info["_CalendarsAPI"]
-                self.PhoneFunctions = info["_PhoneFunctions"]
-                self.OnMacro = info["_OnMacro"]
-                self.OffMacro = info["_OffMacro"]
-                self.EmergencyMacro= info["_EmergencyMacro"]
+                        self.__defaultUser + ".\nBienvenido!")
+                self.setProfile(self.loadProfile(self.__defaultUser))
                 phone = False
                 speech = None
                 text = None
@@ -249,106 +325,60 @@ class Teodoro(System, Applications, Calendar):
 
         # Inicialización de las funcionalides relacionadas con el teléfono móvil del usuario
         if phone and self.PhoneFunctions:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.sock.bind(("", 50000))
-            self.sock.setblocking(0)
+            if getattr(self, "sock", None) is None:                                         # El socket se abre una única vez
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.sock.bind(("", 50000))
+                self.sock.setblocking(0)
             webbrowser.open(self.OnMacro)
 
         return speech, text
 
-
-#   ******************  Extracción de información básica de la Base de Conocimiento  ******************
-
-    def ExtractKnowledgeBase(self, default_name):
+    def switchUser(self, profile):
         """
-        Función que extrae la información básica de la base de conocimiento para el correcto funcionamiento del sistema.
-        En concreto, extrae información de las colecciones:
-            - *General*:
-                > *Names*. Si no existe, el programa pone como nombre por defecto "Teodoro".
-                > *Days*. Si no existe, funcionalidad *Today* no disponible.
-                > *Months*. Si no existe, funcionalidades *Today*, *getCalendar* y *setCalendar* no disponibles.
-                > *Numbers*. Si no existe, funcionalidades *Reminder*, *Math*, *getCalendar* y *setCalendar* no disponibles.
-                > *Commands*. Si no existe, se termina la ejecución del programa.
-            - *Applications*:
-                > *SpotifyActions*. Si no existe, funcionalidades relacionadas con Spotify no disponibles.
-                > *MathOperations*. Si no existe, funcionalidad *Math* no disponible.
+        Función que cambia el usuario actual tras su autenticación. El contexto del usuario anterior (perfil, calendario
+        y recordatorios) se guarda en una caché LRU de *maxContexts* usuarios. Si el nuevo usuario ya tiene
+        contexto, se restablece sin consultar la base de conocimiento; si no, se carga y se añade a la caché.
 
         Args:
-            default_name (str): El nombre del asistente por defecto del sistema.
-
-        Returns:
-            response (int): Variable de verificación de ejecución correcta.
+            profile (Profile): Perfil del nuevo usuario.
         """
-        # General
-        general = []
-        for collection in self.db.list_collection_names():
-            if collection == "General":
-                for element in self.db[collection].find({}):
-                    general.append(element)
-        common = general[0]
-        commands = general[1]
-
-        # Names
-        if "Names" in common:
-            self.Names = common["Names"]  
+        current = self.contexts.get(self.User)
+        if current is not None:
+            current.calendar = self.calendarState()
+            current.schedule = self.detachSchedule()
+
+        context = self.contexts.pop(profile.name, None)
+        self.setProfile(profile)
+        if context is None:
+            self.loadCalendar(self.User)
+            self.loadReminders(self.User)
+            context = Context(profile)
         else:
-            self.Names = default_name
+            self.setCalendarState(context.calendar)
+            self.attachSchedule(context.schedule)
+        self.contexts[self.User] = context
 
-        response = 0 # Por defecto, no hay ningún fallo en la Base de Conocimiento
-            
-        # Days and Months
-        keys = []
-        for i in range(len(common["Time"]["Days"])):
-            keys.append(str(i+1))
-        if "Days" in common["Time"]:
-            self.Days = dict(zip(keys, common["Time"]["Days"]))
-        else:
-            self.Days = None
-            response = 1
-        keys = []
-        for i in range(len(common["Time"]["Months"])):
-            keys.append(str(i+1))
-        if "Months" in common["Time"]:
-            self.Months = dict(zip(keys, common["Time"]["Months"])) 
-        else:
-            self.Months = None
-            response = 2
-
-        # Numbers
-        if "Numbers" in common:
-            self.Numbers = common["Numbers"]  
-        else:
-            self.Numbers = None
-            response = 3
-
-        # Commands
-        if "Commands" in commands:
-            self.Commands = commands["Commands"]  
-        else:
-            response = -1
+        while len(self.contexts) > self.maxContexts:                                        # Usuario menos reciente
+            self.contexts.popitem(last = False)[1].profile.flush()
 
-        # Applications
-        applications = []
-        for collection in self.db.list_collection_names():
-            if collection == "Applications":
-                for element in self.db[collection].find({}):
-                    applications.append(element)
+    def setProfile(self, profile):
+        """
+        Función que establece el perfil del usuario actual y los atributos que dependen de él.
 
-        # Spotify Actions
-        if "SpotifyActions" in applications[0]:
-            self.SpotifyActions = applications[0]["SpotifyActions"]
-        else:
-            self.SpotifyActions = None
-            response = 4
-        
-        # Math Operations
-        if "MathOperations" in applications[0]:
-            self.MathOperations = applications[0]["MathOperations"]
-        else:
-            self.MathOperations = None
-            response = 5
-        
-        return response
+        Args:
+            profile (Profile): Perfil del usuario.
+        """
+        if getattr(self, "profile", None) is not None:
+            self.profile.flush()                # Envío de los cambios pendientes del usuario anterior
+        self.profile = profile
+        self.User = profile.name
+        self.CalendarsID = profile.get("_CalendarsID")
+        self.CalendarsAPI = profile.get("_CalendarsAPI")
+        self.PhoneFunctions = profile.get("_PhoneFunctions")
+        self.OnMacro = profile.get("_OnMacro")
+        self.OffMacro = profile.get("_OffMacro")
+        self.EmergencyMacro = profile.get("_EmergencyMacro")
+        self.media.prime([self.User, "EmergencyCall"])     # Foto del usuario y audio de emergencia a la caché local
 
 
 #   ******************  Funcionalides de comunicación común  ******************
@@ -358,7 +388,7 @@ class Teodoro(System, Applications, Calendar):
         Función que pronuncia el mensaje de bienvenida al sistema.
 
         Args:
-            window (tkinter.Tk, optional): Ventana de la interfaz de usuario. Defaults to None.
+            window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
         """
         if window is not None:
             self.GUI("Close", prev_window = window)
@@ -446,6 +476,8 @@ class Teodoro(System, Applications, Calendar):
         elif action == "remove":
             name2find = {"nombre": name}
             self.db["Users"].delete_one(name2find)
+            if name != self.User:
+                self.contexts.pop(name, None)
             speech = "Usuario borrado"
             text = "Usuario: " + name + " borrado"
 
@@ -463,10 +495,7 @@ class Teodoro(System, Applications, Calendar):
             speech (str): Cadena de texto que contiene la frase que debe pronunciar el sistema.
             text (str): Cadena de texto que contiene la frase que debe mostrar el sistema.
         """
-        name2find = {"nombre": self.User}
-        for i in range(len(field)):
-            newvalues = {"$set": {field[i]: attribute[i]}}
-            self.db["Users"].update_one(name2find, newvalues)
+        self.profile.set(dict(zip(field, attribute)))
         speech = "Nueva información guardada"
         text = "Información guardada"
         return speech, text
@@ -482,25 +511,33 @@ class Teodoro(System, Applications, Calendar):
 
         Args:
             query (str): Cadena de texto que contiene la petición del usuario.
-            window (tkinter.Tk, optional): Ventana de la interfaz de usuario. Defaults to None.
+            window (Dialog, optional): Ventana de la interfaz de usuario. Defaults to None.
 
         Returns:
             (response) (int): Variable de verificación de ejecución correcta.
         """
-        
-        if bool([match for match in self.Commands["Name"] if(match in query)]):             # Funcionalidad *Name*
+        intent = self.matcher.match(query)                                                  # Reconocimiento de la funcionalidad
+
+        if intent in self.onlineIntents and not self.online():                              # Sin conexión a Internet
+            if window is not None:
+                self.GUI("Close", prev_window=window)
+            self.speak("Ahora mismo no tengo conexión a Internet, inténtalo más tarde")
+            response = 0
+            return response
+
+        if intent == "Name":                                                                # Funcionalidad *Name*
             speech, text = self.tellNames()                                                 # Llamada al método *tellNames*
+            self.notify(text, prev_window = window)                                         # Notificar *text*
             self.speak(speech)                                                              # Enunciar *speech*
-            self.GUI("Show", text = text, prev_window = window)                             # Mostrar *text*
             response = 0    
             return response
 
-        elif bool([match for match in self.Commands["Greetings"] if(match in query)]):      # Funcionalidad *Greetings*
+        elif intent == "Greetings":                                                         # Funcionalidad *Greetings*
             self.Hello(window)                                                              # Llamada al método *Hello*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Cheer up"] if(match in query)]):       # Funcionalidad *Cheer up*
+        elif intent == "Cheer up":                                                          # Funcionalidad *Cheer up*
             if window is not None:                                                          # Cierre de ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -508,7 +545,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Secret"] if(match in query)]):         # Funcionalidad *Secret*
+        elif intent == "Secret":                                                            # Funcionalidad *Secret*
             if window is not None:                                                          # Cierre de ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -520,24 +557,24 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Today"] if(match in query)]):          # Funcionalidad *Today*
+        elif intent == "Today":                                                             # Funcionalidad *Today*
             if self.Days and self.Months:
                 speech, text = self.tellDay()                                               # Llamada al método *tellDay*
+                self.notify(text, prev_window = window)                                     # Notificar *text*
                 self.speak(speech)                                                          # Enunciar *speech*
-                self.GUI("Show", text = text, prev_window = window)                         # Mostrar *text*
             else:
                 self.GUI("Show", text = self.Error, prev_window = window)                   # Mostrar error
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Time"] if(match in query)]):           # Funcionalidad *Time*
+        elif intent == "Time":                                                              # Funcionalidad *Time*
             speech, text = self.tellTime()                                                  # Llamada al método *tellTime*
+            self.notify(text, prev_window=window)                                           # Notificar *text*
             self.speak(speech)                                                              # Enunciar *speech*
-            self.GUI("Show", text=text, prev_window=window)                                 # Mostrar *text*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Users"] if(match in query)]):          # Funcionalidad *Users*
+        elif intent == "Users":                                                             # Funcionalidad *Users*
             if window is not None:                                                          # Cierre de ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -547,7 +584,8 @@ class Teodoro(System, Applications, Calendar):
             if "nombre" in query:
                 name = list_of_words[list_of_words.index("nombre") + 1]                     # Nombre por voz
             else:
-                name = self.GUI("Text", text="Introduce nombre del usuario")                # Nombre por texto
+                name = self.askSlot("text", "¿Cuál es el nombre del usuario?",
+                                    text="Introduce nombre del usuario")                    # Nombre por voz o texto
 
             # Determinación de acción
             if "nuevo" in list_of_words:                                                    
@@ -566,7 +604,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["NewInformation"] if(match in query)]): # Funcionalidad *NewInformation*
+        elif intent == "NewInformation":                                                    # Funcionalidad *NewInformation*
             self.speak("Perfecto, dime primero cómo vamos a llamar esta nueva información") # Enunciar frase campo
             field_text = self.GUI("Text", text="Introduce el campo", prev_window=window)    # Campo por texto
             field = [field_text]
@@ -579,7 +617,7 @@ class Teodoro(System, Applications, Calendar):
                     if self.User != self.__defaultUser:
                         password = self.GUI("Text", "secret")
                         password = password.encode('utf-8')
-                        salt = bcrypt.gensalt()
+                        salt = bcrypt.gensalt(self.bcryptRounds)
                         newHash = bcrypt.hashpw(password, salt)
                         field = ["_salt", "_hash"]
                         attribute = [salt.decode("utf-8"), newHash.decode("utf-8")]
@@ -599,24 +637,21 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
                 return response
 
-        elif bool([match for match in self.Commands["Information"] if(match in query)]):    # Funcionalidad *Information*
+        elif intent == "Information":                                                       # Funcionalidad *Information*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
             # Obtención de imagen del usuario
             try:
-                image = self.fs.find_one({"filename": self.User})
-                bytedata = image.read()
-                ima_IO = BytesIO(base64.b64decode(bytedata))
-                img_PIL = Image.open(ima_IO)
-                img_PIL.show()
+                shown = self.showImage(lambda: self.media.open(self.User),                  # Caché local de GridFS
+                                       key = self.media.entry(self.User), text = self.User)
             except:
+                shown = None
+            if shown is None:
                 self.speak("Parece que no tienes una foto asociada a tu usuario")
 
             # Obtención información pública del usuario
-            info = self.db["Users"].find_one({"nombre": self.User}, {
-                                             "_id": 0, "_salt": 0, "_hash": 0, "_CalendarsID": 0, "_CalendarsAPI": 0,
-                                             "_PhoneFunctions": 0, "_OnMacro": 0, "_OffMacro": 0, "_EmergencyMacro": 0})
+            info = self.profile.public()
             
             # Enunciar información
             self.speak("Lo que sé de ti es: ")
@@ -625,11 +660,9 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["DelInformation"] if(match in query)]): # Funcionalidad *DelInformation*
+        elif intent == "DelInformation":                                                    # Funcionalidad *DelInformation*
             # Obtención información pública del usuario
-            info = self.db["Users"].find_one({"nombre": self.User}, {
-                                             "nombre": 0, "_id": 0, "_salt": 0, "_hash": 0, "_CalendarsID": 0, "_CalendarsAPI": 0,
-                                             "_PhoneFunctions": 0, "_OnMacro": 0, "_OffMacro": 0, "_EmergencyMacro": 0})
+            info = self.profile.public(name = False)
             l = list(info.keys())
             height = 200 + 20*len(l)
 
@@ -639,23 +672,21 @@ class Teodoro(System, Applications, Calendar):
                 self.GUI("Show", "\n".join(str(e) for e in l), geometry="400x"+str(height), prev_window=window)
                 del_field = self.GUI("Text", "¿Qué información deseas eliminar?")
                 if del_field in l:
-                    self.db["Users"].update_one({"nombre": self.User},{"$unset": {del_field: ""}})
+                    self.profile.unset([del_field])
                     self.speak("Información eliminada")
                     self.GUI("Show", "Información eliminada\ncorrectamente")
                 else:
                     response = 4
                     return response
             else:
-                self.speck("No hay campos que se puedan eliminar de tu usuario")
+                self.speak("No hay campos que se puedan eliminar de tu usuario")
 
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["ChgInformation"] if(match in query)]): # Funcionalidad *ChgInformation* 
+        elif intent == "ChgInformation":                                                    # Funcionalidad *ChgInformation* 
             # Obtención información pública del usuario
-            info = self.db["Users"].find_one({"nombre": self.User}, {
-                                             "nombre": 0, "_id": 0, "_salt": 0, "_hash": 0, "_CalendarsID": 0, "_CalendarsAPI": 0,
-                                             "_PhoneFunctions": 0, "_OnMacro": 0, "_OffMacro": 0, "_EmergencyMacro": 0})
+            info = self.profile.public(name = False)
             l = list(info.items())
             k = list(info.keys())
             height = 200 + 20*len(l)
@@ -667,19 +698,19 @@ class Teodoro(System, Applications, Calendar):
                 chg_field = self.GUI("Text", "¿Qué información deseas cambiar?")
                 if chg_field in k:
                     chg_attr = self.GUI("Text", "Introduce aquí el nuevo valor de\n" + chg_field)
-                    self.db["Users"].update_one({"nombre": self.User},{"$set": {chg_field: chg_attr}})
+                    self.profile.set({chg_field: chg_attr})
                     self.speak("Información cambiada")
                     self.GUI("Show", "Información cambiada\ncorrectamente")
                 else:
                     response = 4
                     return response
             else:
-                self.speck("No hay campos que se puedan cambiar en tu usuario")
+                self.speak("No hay campos que se puedan cambiar en tu usuario")
 
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["ChangeVoice"] if(match in query)]):    # Funcionalidad *ChangeVoice*
+        elif intent == "ChangeVoice":                                                       # Funcionalidad *ChangeVoice*
             self.speak("Perfecto. Tiene " + str(Teo.maxVoices) +
                        "voces para poder elegir")                                           # Frase inicial
             speech, text = self.changeVoice()                                               # Llamada al método *changeVoice*
@@ -688,7 +719,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Google"] if(match in query)]):         # Funcionalidad *Google*
+        elif intent == "Google":                                                            # Funcionalidad *Google*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -696,7 +727,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Wikipedia"] if(match in query)]):      # Funcionalidad *Wikipedia*
+        elif intent == "Wikipedia":                                                         # Funcionalidad *Wikipedia*
             if window is not None:                                                          # Cierre de ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -704,7 +735,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Youtube"] if(match in query)]):        # Funcionalidad *Youtube*
+        elif intent == "Youtube":                                                           # Funcionalidad *Youtube*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -712,7 +743,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Play"] if(match in query)]):           # Funcionalidad *Play*
+        elif intent == "Play":                                                              # Funcionalidad *Play*
             if self.SpotifyActions:                                                         
                 spotify_response = self.spotify("play", window)                             # Llamada al método *spotify*
                 if spotify_response == 256:                                                         
@@ -725,7 +756,7 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Next"] if(match in query)]):           # Funcionalidad *Next*
+        elif intent == "Next":                                                              # Funcionalidad *Next*
             if self.SpotifyActions:                                                         
                 spotify_response = self.spotify("next", window)                             # Llamada al método *spotify*
                 if spotify_response == 256:                                                         
@@ -738,7 +769,7 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Previous"] if(match in query)]):       # Funcionalidad *Previous*
+        elif intent == "Previous":                                                          # Funcionalidad *Previous*
             if self.SpotifyActions:                                                         
                 spotify_response = self.spotify("previous", window)                             # Llamada al método *spotify*
                 if spotify_response == 256:                                                         
@@ -751,7 +782,7 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Pause"] if(match in query)]):          # Funcionalidad *Pause*
+        elif intent == "Pause":                                                             # Funcionalidad *Pause*
             if self.SpotifyActions:                                                         
                 spotify_response = self.spotify("pause", window)                             # Llamada al método *spotify*
                 if spotify_response == 256:                                                         
@@ -764,7 +795,7 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Stop"] if(match in query)]):           # Funcionalidad *Stop*
+        elif intent == "Stop":                                                              # Funcionalidad *Stop*
             if self.SpotifyActions:                                                         
                 spotify_response = self.spotify("stop", window)                             # Llamada al método *spotify*
                 if spotify_response == 256:                                                         
@@ -777,41 +808,55 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Song"] if(match in query)]):           # Funcionalidad *Song*
+        elif intent == "Song":                                                              # Funcionalidad *Song*
             if self.SpotifyActions:                                                         
-                spotify_response = self.spotify("song", window)                             # Llamada al método *spotify*
-                if spotify_response == 256:                                                         
-                    self.GUI("Show", text=self.SpotifyError)                                # Mostrar error
-                    response = 5
-                else:
-                    response = 0
+                speech, text = self.spotify("song", window)                                 # Llamada al método *spotify*
+                self.notify(text, timeout=8000)                                             # Notificar *text*
+                self.speak(speech)                                                          # Enunciar *speech*
+                response = 0
             else:
                 self.GUI("Show", text=self.Error, prev_window=window)                       # Mostrar *text*
                 response = 0
             return response
 
-        elif bool([match for match in self.Commands["Weather"] if(match in query)]):        # Funcionalidad *Weather*
+        elif intent == "Weather":                                                           # Funcionalidad *Weather*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
-            speech, place = self.weather(query)                                             # Llamada al método *weather*
+            speech, place, image = self.weather(query)                                      # Llamada al método *weather*
+            self.showImage(image, text = place)                                             # Mostrar imagen (si es válida)
             self.speak(speech)                                                              # Enunciar *speech*
-            os.system("display " + place + ".png")                                          # Mostrar imagen información meteorológica
-            os.remove(place + ".png")                                                       # Eliminar imagen información meteorológica
             response = 0
             return response
  
-        elif bool([match for match in self.Commands["Alarm"] if(match in query)]):          # Funcionalidad *Alarm*
+        elif intent == "Alarm":                                                             # Funcionalidad *Alarm*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
-            t, speech, text = self.setAlarm(query)                                          # Llamada al método *setAlarm*
-            timer = threading.Timer(t, self.alarm, args=(speech, text))                     # Inicialización temporizador
-            timer.start()                                                                   # Inicio temporizador    
+            speech, text = self.setAlarm(query, self.User)                                  # Llamada al método *setAlarm*
+            self.notify(text)                                                               # Notificar *text*
+            self.speak(speech)                                                              # Enunciar *speech*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Reminder"] if(match in query)]):       # Funcionalidad *Reminder*
+        elif intent == "Alarms":                                                            # Funcionalidad *Alarms*
+            speech, text = self.listAlarms()                                                # Llamada al método *listAlarms*
+            self.GUI("Show", text=text, prev_window=window)                                 # Mostrar *text*
+            self.speak(speech)                                                              # Enunciar *speech*
+            response = 0
+            return response
+
+        elif intent == "CancelAlarm":                                                       # Funcionalidad *CancelAlarm*
+            if window is not None:                                                          # Cierre ventana anterior
+                self.GUI("Close", prev_window=window)
+
+            speech, text = self.cancelAlarm(query)                                          # Llamada al método *cancelAlarm*
+            self.notify(text)                                                               # Notificar *text*
+            self.speak(speech)                                                              # Enunciar *speech*
+            response = 0
+            return response
+
+        elif intent == "Reminder":                                                          # Funcionalidad *Reminder*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
             
@@ -824,17 +869,17 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
  
-        elif bool([match for match in self.Commands["Math"] if(match in query)]):           # Funcionalidad *Math*
+        elif intent == "Math":                                                              # Funcionalidad *Math*
             if self.Numbers and self.MathOperations:            
                 speech, text = self.mathOperation(query)                                    # Llamada al método *mathOperation*
+                self.notify(text, prev_window=window)                                       # Notificar *text*
                 self.speak(speech)                                                          # Enunciar *speech*
-                self.GUI("Show", text=text, prev_window=window)                             # Mostrar *text*
             else:
                 self.GUI("Show", text=self.Error, prev_window=window)                       # Mostrar error
             response = 0
             return response
  
-        elif bool([match for match in self.Commands["Phone"] if(match in query)]):          # Funcionalidad *Phone*
+        elif intent == "Phone":                                                             # Funcionalidad *Phone*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
 
@@ -846,7 +891,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
         
-        elif bool([match for match in self.Commands["EmergencyCall"] if(match in query)]):  # Funcionalidad *EmergencyCall*
+        elif intent == "EmergencyCall":                                                     # Funcionalidad *EmergencyCall*
             if window is not None:                                                          # Cierre ventana anterior
                 self.GUI("Close", prev_window=window)
             
@@ -861,16 +906,16 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["GetCalendar"] if(match in query)]):    # Funcionalidad *GetCalendar*
+        elif intent == "GetCalendar":                                                       # Funcionalidad *GetCalendar*
             if self.CalendarsID and self.Months and self.Numbers:   
                 speech, text = self.getCalendar(query)                                      # Llamada al método *getCalendar*
                 if speech == -1:
                     self.GUI("Show", text="Petición incorrecta", prev_window=window)        # Mostrar error en la petición
                     response = 6
                 else:
-                    self.speak(speech)                                                      # Enunciar *speech*
                     self.GUI("GetCalendar", text=text, size=12,
-                             geometry="800x600", prev_window=window)                        # Mostrar *text*
+                             geometry="800x600", prev_window=window)                        # Mostrar *text* por páginas
+                    self.speak(speech)                                                      # Enunciar *speech*
                     response = 0
                 return response
             else:
@@ -878,7 +923,7 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
                 return response
 
-        elif bool([match for match in self.Commands["SetCalendar"] if(match in query)]):    # Funcionalidad *SetCalendar*
+        elif intent == "SetCalendar":                                                       # Funcionalidad *SetCalendar*
             if window is not None:                                                          # Cierre ventana anterior  
                 self.GUI("Close", prev_window=window)
             
@@ -893,22 +938,22 @@ class Teodoro(System, Applications, Calendar):
                 response = 0
                 return response
 
-        elif bool([match for match in self.Commands["Shutdown"] if(match in query)]):       # Funcionalidad *Shutdown*
+        elif intent == "Shutdown":                                                          # Funcionalidad *Shutdown*
             self.shutdown()                                                                 # Llamada al método *shutdown*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Suspend"] if(match in query)]):        # Funcionalidad *Suspend*
+        elif intent == "Suspend":                                                           # Funcionalidad *Suspend*
             self.suspend()                                                                  # Llamada al método *suspend*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Restart"] if(match in query)]):        # Funcionalidad *Restart*
+        elif intent == "Restart":                                                           # Funcionalidad *Restart*
             self.restart()                                                                  # Llamada al método *restart*
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Nothing"] if(match in query)]):        # Funcionalidad *Nothing*
+        elif intent == "Nothing":                                                           # Funcionalidad *Nothing*
             if window is not None:                                                          
                 self.GUI("Close", prev_window=window)                                       # Cierre ventana anterior
 
@@ -919,7 +964,7 @@ class Teodoro(System, Applications, Calendar):
             response = 0
             return response
 
-        elif bool([match for match in self.Commands["Del"] if(match in query)]):            # Funcionalidad *Del*                                                                    
+        elif intent == "Del":                                                               # Funcionalidad *Del*                                                                    
             response = -2
             return response
 
@@ -934,6 +979,28 @@ class Teodoro(System, Applications, Calendar):
 
 #   ******************  Bucle principal del sistema  ******************
 
+def runAction(Teo, query, window):
+    """
+    Función que ejecuta la funcionalidad de una petición, con los cambios del perfil en una única escritura. Si un
+    servicio externo está caído o no responde a tiempo (*ServiceUnavailable*), se responde al momento con un mensaje.
+
+    Args:
+        Teo (class): Instancia de la clase Teodoro.
+        query (str): Cadena de texto que contiene la petición del usuario.
+        window (Dialog): Ventana de la interfaz de usuario.
+
+    Returns:
+        (response) (int): Variable de verificación de ejecución correcta.
+    """
+    try:
+        with Teo.profile.batch():
+            return Teo.getAction(query, window)
+    except ServiceUnavailable as e:
+        if window is not None:
+            Teo.GUI("Close", prev_window=window)
+        Teo.speak(e.speech)
+        return 0
+
 def takeQuery(Teo):
     """ 
     Función principal del sistema. Contiene un bucle infinito en el cual se realizan las siguientes acciones:
@@ -952,14 +1019,15 @@ def takeQuery(Teo):
 
     # Bucle principal
     while(True):
-        internetOk = Teo.internetCheck()                        # Llamada al método *internetCheck*
+        internetOk = Teo.internetCheck()                        # Estado del monitor de la conexión (sin peticiones)
         if internetOk != 0:                                     # COMPROBACIÓN ACCESO A INTERNET
-            Teo.GUI("Show", text=internetOk)                    # Mostrar error
+            Teo.GUI("Show", text=internetOk, block=True)        # Mostrar error
+            Teo.connectivity.wait(5)                            # Espera a que vuelva la conexión
         else:
             query, window = Teo.takeCommand()                   # Llamada al método *takeCommand*
             if query != None:                                   # PETICIÓN REALIZADA
                 query = query.lower()
-                response = Teo.getAction(query, window)         # Llamada al método *getAction*
+                response = runAction(Teo, query, window)        # Llamada al método *getAction*
 
                 # Fin del programa
                 if response == -2:
@@ -973,7 +1041,7 @@ def takeQuery(Teo):
                     if query == None:
                         Teo.speak("No he reconocido lo que ha dicho, lo siento")
                     else:
-                        Teo.getAction(query, window)            # Llamada al método *getAction*
+                        runAction(Teo, query, window)           # Llamada al método *getAction*
                 elif response == 1:
                     Teo.GUI("Error", 
                             "Petición de acción sobre usuario incorrecta.\n",
@@ -1009,10 +1077,6 @@ def takeQuery(Teo):
                             geometry="600x350")
                 
             elif time() - lastsave > 60:                        # PETICIÓN NO REALIZADA / COMPROBACIÓN TIEMPO DE CHEQUEO
-                speech, text = Teo.checkReminder(Teo.User)      # Llamada al método *checkReminder*
-                if speech != None:
-                    Teo.speak(speech)                           # Enunciar *speech*
-                    Teo.GUI("Show", text=text)                  # Mostrar *text*
                 if Teo.PhoneFunctions:                          
                     Teo.checkPhone()                            # Llamada al método *checkPhone*
                 lastsave = time()                               # Reseteo del tiempo de chequeo
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+
+class Token():
+
+    """ Clase Token.
+
+    Token de sesión local firmado y con caducidad. Tras un inicio de sesión correcto se guarda en un archivo oculto
+    (*path*), de forma que al reiniciar el asistente dentro del periodo de validez no es necesario volver a pedir la
+    contraseña ni calcular su bcrypt.
+
+    El token contiene el nombre del usuario, si usa las funcionalidades del teléfono móvil y la fecha de caducidad, y se
+    firma con HMAC-SHA256 usando una clave aleatoria guardada en otro archivo oculto (*key_path*) junto con el hash de la
+    contraseña del usuario: si la contraseña cambia, el token deja de ser válido.
+    """
+
+    def __init__(self, path = ".sessionToken", key_path = ".sessionKey", hours = 12):
+        """
+        Función de inicialización de la clase Token.
+
+        Args:
+            path (str, optional): Archivo del token. Defaults to ".sessionToken".
+            key_path (str, optional): Archivo de la clave de firma. Defaults to ".sessionKey".
+            hours (float, optional): Horas de validez del token. Defaults to 12.
+        """
+        self.path = path
+        self.key_path = key_path
+        self.hours = hours
+
+    def __key(self):
+        """
+        Función que devuelve la clave de firma. Si no existe, se crea con permisos sólo para el propietario.
+        """
+        if not os.path.isfile(self.key_path):
+            fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(32))
+        with open(self.key_path, "rb") as f:
+            return f.read()
+
+    def __sign(self, payload, password_hash):
+        return hmac.new(self.__key(), payload + password_hash.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def read(self):
+        """
+        Función que lee el token sin comprobar todavía su firma (para ello se necesita el hash de la contraseña).
+
+        Returns:
+            (tuple): Nombre del usuario, flag del teléfono móvil y token, o None si no hay token o ha caducado.
+        """
+        try:
+            with open(self.path) as f:
+                token = f.read().strip()
+            data = json.loads(base64.urlsafe_b64decode(token.partition(".")[0]))
+            if data["exp"] < time.time():
+                self.delete()
+                return None
+            return data["nombre"], data["phone"], token
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def verify(self, token, password_hash):
+        """
+        Función que comprueba la firma de un token.
+
+        Args:
+            token (str): Token leído con *read*.
+            password_hash (str): Hash de la contraseña del usuario.
+
+        Returns:
+            (bool): True si la firma es correcta.
+        """
+        payload, _, signature = token.partition(".")
+        return hmac.compare_digest(self.__sign(payload.encode("utf-8"), password_hash), signature)
+
+    def write(self, name, phone, password_hash):
+        """
+        Función que crea y guarda el token de un usuario.
+
+        Args:
+            name (str): Nombre del usuario.
+            phone (bool): Flag de uso de las funcionalidades del teléfono móvil.
+            password_hash (str): Hash de la contraseña del usuario.
+        """
+        data = {"nombre": name, "phone": bool(phone), "exp": time.time() + 3600 * self.hours}
+        payload = base64.urlsafe_b64encode(json.dumps(data).encode("utf-8"))
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(payload.decode("utf-8") + "." + self.__sign(payload, password_hash))
+
+    def delete(self):
+        """
+        Función que borra el token.
+        """
+        if os.path.isfile(self.path):
+            os.remove(self.path)
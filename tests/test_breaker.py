@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+""" Pruebas de *Breaker* con inyección de fallos contra un servidor HTTP local que hace de servicio externo. """
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("httplib2")
+pytest.importorskip("google.auth")
+
+from Breaker import Breaker, ServiceUnavailable
+from Http import Http
+
+
+class StandIn(BaseHTTPRequestHandler):
+
+    """ Servicio falso: según *mode* responde al momento ("ok"), con un error 500 ("error"), no responde ("hang") o
+    envía la respuesta byte a byte ("trickle"). """
+
+    mode = "ok"
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if self.mode == "hang":
+            time.sleep(1)
+        elif self.mode == "trickle":
+            self.send_response(200)
+            self.send_header("Content-Length", "20")
+            self.end_headers()
+            for _ in range(20):
+                time.sleep(0.1)             # Cada lectura llega antes del plazo por operación
+                self.wfile.write(b"x")
+                self.wfile.flush()
+            return
+        status = 500 if self.mode == "error" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def service():
+    StandIn.mode, StandIn.requests = "ok", 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.daemon_threads = True
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    yield "http://127.0.0.1:%d/" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def breaker(url):
+    return Breaker("test", "el servicio de prueba", Http(), url, deadline = 0.3, threshold = 3, reset = 0.2,
+                   max_reset = 0.4, errors = Http.errors)
+
+
+def wait_state(b, state, timeout = 5):
+    end = time.monotonic() + timeout
+    while b.state != state and time.monotonic() < end:
+        time.sleep(0.02)
+    return b.state == state
+
+
+def test_opens_fails_fast_and_probe_closes(service):
+    b = breaker(service)
+    response = b.request("GET", service)
+    assert response.status_code == 200 and response.content == b"ok" and response.text == "ok"
+
+    # El servicio deja de responder: los fallos por plazo abren el circuito al tercero
+    StandIn.mode = "hang"
+    opened = []
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailable) as e:
+            b.request("GET", service)
+        opened.append(e.value.opened)
+    assert opened == [False, False, True]
+    assert b.state != "closed"
+
+    # Con el circuito abierto se falla al momento, sin llamar al servicio
+    sent = StandIn.requests
+    start = time.perf_counter()
+    with pytest.raises(ServiceUnavailable) as e:
+        b.request("GET", service)
+    assert time.perf_counter() - start < 0.05
+    assert not e.value.opened and "no responde" in e.value.speech
+    assert StandIn.requests == sent
+
+    # Mientras responde con 500, la comprobación en segundo plano no cierra el circuito
+    StandIn.mode = "error"
+    time.sleep(1)
+    assert b.state != "closed"
+
+    # Cuando se recupera, la comprobación cierra el circuito
+    StandIn.mode = "ok"
+    assert wait_state(b, "closed")
+    assert b.failures == 0
+    assert b.request("GET", service).status_code == 200
+
+
+def test_deadline_bounds_whole_response(service):
+    b = breaker(service)
+    StandIn.mode = "trickle"
+    start = time.perf_counter()
+    with pytest.raises(ServiceUnavailable):
+        b.request("GET", service)
+    assert time.perf_counter() - start < 0.5
+    assert b.failures == 1
+
+
+def test_server_errors_count_as_failures(service):
+    b = breaker(service)
+    StandIn.mode = "error"
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailable):
+            b.request("GET", service)
+    assert b.state != "closed"
+
+
+def test_local_errors_do_not_open(service):
+    b = breaker(service)
+
+    def broken():
+        raise KeyError("token")             # Error de configuración, no del servicio
+
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            b.call(broken)
+    assert b.state == "closed" and b.failures == 0
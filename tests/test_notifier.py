@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+
+""" Pruebas de *Notifier* contra un servidor de notificaciones falso en un bus privado de D-Bus. """
+
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+jeepney = pytest.importorskip("jeepney")
+from jeepney import MessageType, new_method_return
+from jeepney.bus_messages import message_bus
+from jeepney.io.blocking import open_dbus_connection
+
+from Notifier import Notifier
+
+
+@pytest.fixture
+def bus(tmp_path):
+    """
+    Bus de sesión privado (*dbus-daemon*) para las pruebas.
+    """
+    if shutil.which("dbus-daemon") is None:
+        pytest.skip("dbus-daemon no disponible")
+    daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address",
+                               "--address=unix:path=" + str(tmp_path / "bus")],
+                              stdout = subprocess.PIPE, stderr = subprocess.DEVNULL, text = True)
+    address = daemon.stdout.readline().strip()
+    yield address
+    daemon.terminate()
+    daemon.wait()
+
+
+class FakeNotifications():
+
+    """ Servidor de notificaciones falso: responde a *Notify* y guarda el texto de cada notificación. """
+
+    def __init__(self, address):
+        self.received = []
+        self.arrived = threading.Condition()
+        self.conn = open_dbus_connection(bus = address)
+        self.conn.send_and_get_reply(message_bus.RequestName("org.freedesktop.Notifications"))
+        threading.Thread(target = self.run, daemon = True).start()
+
+    def run(self):
+        while True:
+            try:
+                message = self.conn.receive()
+            except Exception:
+                return
+            if message.header.message_type != MessageType.method_call:
+                continue
+            self.conn.send(new_method_return(message, "u", (len(self.received) + 1,)))
+            with self.arrived:
+                self.received.append(message.body[4])
+                self.arrived.notify_all()
+
+    def wait(self, count, timeout = 5):
+        with self.arrived:
+            return self.arrived.wait_for(lambda: len(self.received) >= count, timeout)
+
+
+def test_notify(bus):
+    server = FakeNotifications(bus)
+    notifier = Notifier(address = bus)
+    assert notifier.available
+    assert notifier.notify("Son las cinco")
+    assert server.wait(1)
+    assert server.received == ["Son las cinco"]
+
+
+def test_resend_after_reconnect(bus):
+    server = FakeNotifications(bus)
+    fallback = []
+    notifier = Notifier(address = bus, fallback = fallback.append)
+    notifier.notify("primera")
+    assert server.wait(1)
+    end = time.monotonic() + 5                          # Respuesta recibida: la conexión ya no se usa
+    while notifier.last_id != 1 and time.monotonic() < end:
+        time.sleep(0.01)
+
+    notifier._Notifier__conn.close()                    # Conexión perdida: la siguiente se reenvía por una nueva
+    notifier.notify("segunda")
+    assert server.wait(2)
+    assert server.received == ["primera", "segunda"]
+    assert notifier.available and fallback == []
+
+
+def test_fallback_without_server(bus):
+    fallback = []
+    done = threading.Event()
+    notifier = Notifier(address = bus, fallback = lambda text: (fallback.append(text), done.set()))
+    notifier.notify("sin servidor")
+    assert done.wait(5)
+    assert fallback == ["sin servidor"] and not notifier.available